@@ -1,22 +1,38 @@
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from src.agents.specify_agent import SpecifyAgent
-from src.agents.synthesize_agent import SynthesizeAgent
-from src.agents.decomposer_agent import Decomposer
-from src.agents.specialist_agent import SpecialistAgent, get_other_areas_subtasks
-from src.agents.task_refiner_agent import TaskRefiner
-from src.agents.executor_agent import execute_tasks_postorder
-from src.utils.class_task import TaskManager, create_and_link_subtasks
+from fastapi.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from src.executor.batch_executor import BATCH_LEAVES, execute_tasks_batched
+from src.executor.context_budget import context_budget_report, enable_context_budget
+from src.executor.incremental import IncrementalExecution, compute_fingerprints
+from src.utils.class_task import create_and_link_subtasks
+from src.utils.task_index import IndexedTaskManager
 from src.utils.recursive_refiner_parent_subtask import refine_recursively
-from src.utils.task_exporter import export_task_tree
+from src.utils.task_checkpoint import TaskCheckpoint, restore_task_tree
+from src.utils.session_store import SessionBusyError, create_session_store
+from src.utils.job_queue import JobQueue, QueueFullError
+from src.utils.tracing import METRICS, Tracer
+from src.utils.rate_limiter import get_default_governor
+from src.utils.agent_registry import get_default_registry
+from src.utils.speculation import Speculator, looks_complete
+from src.utils.graph_view import GraphViews
+from src.utils.task_graph import CycleError, DanglingDependencyError, analyze_task_graph, check_task_graph
 from main import (
     create_root_task, decompose_into_areas, create_area_tasks,
-    plan_area_subtasks, refine_all_subtasks, print_task_tree
+    plan_area_subtasks, refine_all_subtasks, print_task_tree, export_tree, STRICT_GRAPH
 )
 import uvicorn
 
 app = FastAPI()
 
+@app.exception_handler(SessionBusyError)
+async def session_busy_handler(request: Request, exc: SessionBusyError):
+    return JSONResponse(status_code=409, content={"detail": str(exc)})
+
 # Enable CORS for local and deployed frontends
 app.add_middleware(
     CORSMiddleware,
@@ -31,32 +47,248 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory session storage for each user/session
-SESSION = {}
+# Agents are created once per process (lazily) and share one pooled model client
+AGENTS = get_default_registry()
+
+# Session storage for each user/session (memory LRU/TTL or SQLite, see create_session_store)
+SESSION = create_session_store()
+
+# Agent calls are synchronous; they run on this pool so the event loop keeps serving other sessions
+AGENT_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("STRATMIND_AGENT_WORKERS", "16")),
+    thread_name_prefix="agent"
+)
+
+# Background jobs for the long stages (plan_subtasks, refine, execute)
+JOBS = JobQueue(
+    max_workers=int(os.getenv("STRATMIND_JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("STRATMIND_JOB_QUEUE", "50"))
+)
+
+# Speculative synthesis/decomposition once the clarification is finished (STRATMIND_SPECULATE=1).
+# STRATMIND_SPECULATE_TURNS > 0 also starts it after that many user answers.
+SPECULATE = os.getenv("STRATMIND_SPECULATE", "0") == "1"
+SPECULATE_AFTER_TURNS = int(os.getenv("STRATMIND_SPECULATE_TURNS", "0"))
+# Seconds /synthesize and /decompose wait for a running speculation before computing it themselves
+SPECULATE_WAIT_S = float(os.getenv("STRATMIND_SPECULATE_WAIT_S", "30"))
+# Speculations get their own pool: the endpoints wait for them from AGENT_EXECUTOR threads
+SPECULATION_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.getenv("STRATMIND_SPECULATE_WORKERS", "4")),
+    thread_name_prefix="speculation"
+)
+SPECULATOR = Speculator(SPECULATION_EXECUTOR)
+
+# Versioned vis-network views of the session trees, refreshed at most every STRATMIND_GRAPH_REFRESH_S seconds
+GRAPH_VIEWS = GraphViews(min_interval=float(os.getenv("STRATMIND_GRAPH_REFRESH_S", "0.25")))
+
+# Execution checkpoints of /execute {"checkpoint": true}, one JSONL file per session
+CHECKPOINT_DIR = os.getenv("STRATMIND_CHECKPOINT_DIR", os.path.join(".cache", "checkpoints"))
+
+# Task fields /edit_task may change
+EDITABLE_FIELDS = ("title", "description", "expected_output", "execution_type")
+
+@app.on_event("shutdown")
+def shutdown_agent_executor():
+    AGENT_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    SPECULATION_EXECUTOR.shutdown(wait=False, cancel_futures=True)
+    JOBS.shutdown()
+
+async def run_blocking(fn, *args, **kwargs):
+    """
+    Run a blocking agent call or session store access on AGENT_EXECUTOR without
+    blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(AGENT_EXECUTOR, partial(fn, *args, **kwargs))
+
+def session_tracer(session):
+    """
+    Return the session's Tracer, creating it on first use; it is exported with the tree.
+    """
+    if "tracer" not in session:
+        session["tracer"] = Tracer()
+    return session["tracer"]
+
+def session_execution(session):
+    """
+    Return the session's IncrementalExecution, creating it on first use, so /execute
+    only reruns the tasks edited (or depending on an edit) since the last run.
+    """
+    if "execution" not in session:
+        session["execution"] = IncrementalExecution()
+    return session["execution"]
+
+def session_checkpoint(session_id, root_task):
+    """
+    Return the session's execution checkpoint, with the tree recorded in it.
+
+    A checkpoint left by an interrupted /execute of a different tree (edited or
+    re-planned since) is discarded first, so only results for the current inputs come back.
+    """
+    checkpoint = TaskCheckpoint(os.path.join(CHECKPOINT_DIR, f"{session_id}.jsonl"))
+    planned_tree = checkpoint.load()[0]
+    if planned_tree is not None:
+        planned_root = restore_task_tree(planned_tree, IndexedTaskManager())
+        if compute_fingerprints(planned_root)[planned_root.task_id] != compute_fingerprints(root_task)[root_task.task_id]:
+            os.remove(checkpoint.path)
+    checkpoint.write_tree(root_task)
+    return checkpoint
+
+def require_session(session_id, keys, detail="Previous steps not completed."):
+    """
+    Return the session, or answer 400 when a previous stage has not filled `keys` yet.
+    """
+    session = SESSION.get(session_id, {})
+    if not all(session.get(key) for key in keys):
+        raise HTTPException(status_code=400, detail=detail)
+    return session
+
+def session_stage(session_id, stage):
+    """
+    Wrap a stage so it runs on the session's current state, under the session lock.
+
+    `stage(session, on_event)` changes the session in place. The returned
+    `run(on_event=None)` takes the lock, reloads the session, runs the stage, stores the
+    session and returns its root task. While another stage holds the lock it raises
+    SessionBusyError (409), so two stages never overwrite each other's changes.
+    """
+    def run(on_event=None):
+        with SESSION.lock(session_id):
+            session = SESSION.get(session_id, {})
+            stage(session, on_event)
+            SESSION.set(session_id, session)
+            return session["root_task"]
+
+    return run
+
+def check_graph(root_task):
+    """
+    Pre-execution dependency check; a tree that cannot be executed is rejected with a 409.
+    """
+    try:
+        return check_task_graph(root_task, strict=STRICT_GRAPH)
+    except (CycleError, DanglingDependencyError) as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+def speculate(session_id, history, tracer):
+    """
+    Start synthesizing and decomposing `history` in the background for /synthesize and /decompose.
+    """
+    def synthesize_fn(history):
+        with tracer.span("synthesize", speculative=True):
+            return AGENTS.get("synthesize", tracer).synthesize(history)
+
+    def decompose_fn(spec):
+        task_manager = IndexedTaskManager()
+        root_task = create_root_task(task_manager, spec["description"], spec["expected_output"])
+        with tracer.span("decompose", speculative=True):
+            area_divisions = decompose_into_areas(root_task, AGENTS.get("decomposer", tracer))
+        return task_manager, root_task, area_divisions
+
+    SPECULATOR.speculate(session_id, history, synthesize_fn, decompose_fn)
+
+def format_sse(event):
+    """
+    Format a pipeline event as a Server-Sent Events message.
+    """
+    return f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False, default=str)}\n\n"
+
+def stream_pipeline(run):
+    """
+    Run a pipeline stage in a worker thread and stream its events as SSE.
+
+    Args:
+        run (callable): Runs the stage (see `session_stage`); receives the `on_event`
+            callback to report progress and returns the root task, sent in a final `tree` event.
+
+    Returns:
+        StreamingResponse: The event stream; an `error` event replaces `tree` if the stage fails.
+    """
+    async def events():
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+
+        def on_event(event):
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+        def worker():
+            try:
+                root_task = run(on_event)
+                on_event({"event": "tree", "tree": root_task.to_dict()})
+            except Exception as exc:
+                on_event({"event": "error", "detail": repr(exc)})
+            finally:
+                on_event(None)
+
+        loop.run_in_executor(AGENT_EXECUTOR, worker)
+        while True:
+            event = await queue.get()
+            if event is None:
+                break
+            yield format_sse(event)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+def submit_job(kind, session_id, run):
+    """
+    Submit a pipeline stage as a background job and answer 202 with its id.
+
+    Args:
+        kind (str): Stage name, used with the session id to deduplicate jobs.
+        session_id (str): The session id.
+        run (callable): Runs the stage (see `session_stage`); receives the job's `emit`
+            as `on_event` and returns the root task, whose tree is the job result.
+
+    Returns:
+        JSONResponse: 202 with the job id, or raises 429 when the queue is full.
+    """
+    def job_fn(job):
+        return {"tree": run(job.emit).to_dict()}
+
+    try:
+        job = JOBS.submit(kind, session_id, job_fn)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
+    return JSONResponse(status_code=202, content={"job_id": job.job_id, "status": job.status})
 
 @app.post("/clarify")
 async def clarify(request: Request):
     """
     Endpoint for the clarification step.
     Receives user input and conversation history, returns updated history and agent response.
+    With STRATMIND_SPECULATE=1, a finished clarification starts synthesis and decomposition
+    in the background, so /synthesize and /decompose can answer from it.
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
     history = data.get("history", [])
     user_input = data.get("user_input", "")
 
-    # If history is empty, build it using the agent's method
-    if not history:
-        history = SpecifyAgent.initial_history(user_input)
-        user_input = None  # Already included in history
-    elif user_input:
-        history.append({"role": "user", "content": user_input})
-
-    specify_agent = SpecifyAgent()
-    agent_response = specify_agent.get_response(history)
-    history.append({"role": "assistant", "content": agent_response})
-    finished = "fully specified" in agent_response.lower() or (user_input and user_input.lower() == "finish")
-    SESSION[session_id] = {"history": history}
+    def run(history, user_input):
+        with SESSION.lock(session_id):
+            session = SESSION.get(session_id, {}) if history else {}
+            tracer = session_tracer(session)
+
+            # If history is empty, build it using the agent's method
+            if not history:
+                history = AGENTS.agent_class("specify").initial_history(user_input)
+                user_input = None  # Already included in history
+            elif user_input:
+                history.append({"role": "user", "content": user_input})
+
+            specify_agent = AGENTS.get("specify", tracer, lane="interactive")
+            with tracer.span("specify"):
+                agent_response = specify_agent.get_response(history)
+            history.append({"role": "assistant", "content": agent_response})
+            finished = "fully specified" in agent_response.lower() or (user_input and user_input.lower() == "finish")
+            SESSION.set(session_id, {"history": history, "tracer": tracer})
+        return history, tracer, agent_response, finished
+
+    history, tracer, agent_response, finished = await run_blocking(run, history, user_input)
+    if SPECULATE and looks_complete(history, agent_response, SPECULATE_AFTER_TURNS):
+        speculate(session_id, history, tracer)
+    else:
+        SPECULATOR.discard(session_id)
     return {"history": history, "agent_response": agent_response, "finished": finished}
 
 @app.post("/synthesize")
@@ -67,13 +299,24 @@ async def synthesize(request: Request):
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    history = SESSION.get(session_id, {}).get("history", [])
-    if not history:
-        raise HTTPException(status_code=400, detail="Clarification step not completed.")
-    synthesize_agent = SynthesizeAgent()
-    spec = synthesize_agent.synthesize(history)
-    SESSION[session_id]["spec"] = spec
-    return spec
+
+    def run():
+        with SESSION.lock(session_id):
+            session = require_session(session_id, ("history",), "Clarification step not completed.")
+            history = session["history"]
+            tracer = session_tracer(session)
+            spec = None
+            if SPECULATE:
+                spec = SPECULATOR.take_synthesis(session_id, history, timeout=SPECULATE_WAIT_S)
+            if spec is None:
+                synthesize_agent = AGENTS.get("synthesize", tracer, lane="interactive")
+                with tracer.span("synthesize"):
+                    spec = synthesize_agent.synthesize(history)
+            session["spec"] = spec
+            SESSION.set(session_id, session)
+        return spec
+
+    return await run_blocking(run)
 
 @app.post("/decompose")
 async def decompose(request: Request):
@@ -83,20 +326,88 @@ async def decompose(request: Request):
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    spec = SESSION.get(session_id, {}).get("spec")
-    if not spec:
-        raise HTTPException(status_code=400, detail="Synthesis step not completed.")
-    task_manager = TaskManager()
-    root_task = create_root_task(task_manager, spec["description"], spec["expected_output"])
-    decomposer = Decomposer()
-    area_divisions = decompose_into_areas(root_task, decomposer)
-    SESSION[session_id].update({
-        "task_manager": task_manager,
-        "root_task": root_task,
-        "area_divisions": area_divisions
-    })
+
+    def run():
+        with SESSION.lock(session_id):
+            session = require_session(session_id, ("spec",), "Synthesis step not completed.")
+            spec = session["spec"]
+            tracer = session_tracer(session)
+            speculative = None
+            if SPECULATE:
+                speculative = SPECULATOR.take_decomposition(session_id, session.get("history", []), spec,
+                                                            timeout=SPECULATE_WAIT_S)
+            if speculative is not None:
+                task_manager, root_task, area_divisions = speculative
+            else:
+                task_manager = IndexedTaskManager()
+                root_task = create_root_task(task_manager, spec["description"], spec["expected_output"])
+                decomposer = AGENTS.get("decomposer", tracer, lane="interactive")
+                with tracer.span("decompose"):
+                    area_divisions = decompose_into_areas(root_task, decomposer)
+            session.update({
+                "task_manager": task_manager,
+                "root_task": root_task,
+                "area_divisions": area_divisions,
+                "execution": IncrementalExecution()
+            })
+            SESSION.set(session_id, session)
+        return area_divisions
+
+    area_divisions = await run_blocking(run)
     return {"areas": area_divisions["subtasks"]}
 
+def create_area_stage(session, on_event=None):
+    create_area_tasks(session["task_manager"], session["root_task"], session["area_divisions"])
+
+def plan_stage(session, on_event=None):
+    tracer = session_tracer(session)
+    specialist = AGENTS.get("specialist", tracer, lane="batch")
+    with tracer.span("plan"):
+        plan_area_subtasks(session["task_manager"], session["root_task"], specialist,
+                           session["spec"]["description"], on_event=on_event)
+
+def refine_stage(session, on_event=None):
+    tracer = session_tracer(session)
+    task_refiner = AGENTS.get("refiner", tracer, lane="batch")
+    with tracer.span("refine"):
+        refine_all_subtasks(session["task_manager"], session["root_task"], task_refiner,
+                            session["spec"]["description"], on_event=on_event)
+
+def execute_stage(session_id, checkpoint=False):
+    """
+    Stage that executes the session tree (only what changed, see IncrementalExecution) and exports it.
+
+    With `checkpoint`, every finished task is also appended to the session's checkpoint,
+    and a rerun after a crash (e.g. with the SQLite store) gets those results back
+    instead of executing them again. The checkpoint is removed once the tree is exported.
+    """
+    def stage(session, on_event=None):
+        tm, root_task = session["task_manager"], session["root_task"]
+        tracer = session_tracer(session)
+        execution = session_execution(session)
+        if checkpoint:
+            task_checkpoint = session_checkpoint(session_id, root_task)
+            restored = task_checkpoint.restore(root_task)
+            if restored:
+                print(f"Restored {len(restored)} results from checkpoint {task_checkpoint.path}")
+                fingerprints = compute_fingerprints(root_task)
+                execution.fingerprints.update({task_id: fingerprints[task_id] for task_id in restored})
+            on_event = task_checkpoint.wrap_events(on_event)
+        executor = enable_context_budget(AGENTS.get("executor", tracer, lane="batch"))
+        batch_executor = AGENTS.get("batch_executor", tracer, lane="batch") if BATCH_LEAVES > 1 else None
+        with tracer.span("execute"):
+            execution.execute(root_task, on_event=tracer.wrap_events(on_event), execute=execute_tasks_batched,
+                              batch_executor=batch_executor, executor=executor)
+        trace = tracer.summary()
+        with tracer.span("export"):
+            export_tree(root_task, tm, out_name=f"task_tree_{session_id}",
+                             metadata={"trace": trace, "fingerprints": execution.fingerprints,
+                                       "context_budget": context_budget_report(executor)})
+        if checkpoint:
+            os.remove(task_checkpoint.path)
+
+    return stage
+
 @app.post("/create_area_tasks")
 async def create_area_tasks_endpoint(request: Request):
     """
@@ -104,61 +415,120 @@ async def create_area_tasks_endpoint(request: Request):
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    tm = SESSION.get(session_id, {}).get("task_manager")
-    root_task = SESSION.get(session_id, {}).get("root_task")
-    area_divisions = SESSION.get(session_id, {}).get("area_divisions")
-    if not (tm and root_task and area_divisions):
-        raise HTTPException(status_code=400, detail="Decomposition step not completed.")
-    create_area_tasks(tm, root_task, area_divisions)
+    await run_blocking(require_session, session_id, ("task_manager", "root_task", "area_divisions"), "Decomposition step not completed.")
+    await run_blocking(session_stage(session_id, create_area_stage))
     return {"status": "area tasks created"}
 
 @app.post("/plan_subtasks")
 async def plan_subtasks_endpoint(request: Request):
     """
     Endpoint to plan subtasks for each area using the specialist agent.
+    With "background": true the stage runs as a job and the response is its job id.
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    tm = SESSION.get(session_id, {}).get("task_manager")
-    root_task = SESSION.get(session_id, {}).get("root_task")
-    spec = SESSION.get(session_id, {}).get("spec")
-    if not (tm and root_task and spec):
-        raise HTTPException(status_code=400, detail="Previous steps not completed.")
-    specialist = SpecialistAgent()
-    plan_area_subtasks(tm, root_task, specialist, spec["description"])
+    await run_blocking(require_session, session_id, ("task_manager", "root_task", "spec"))
+    run = session_stage(session_id, plan_stage)
+    if data.get("background"):
+        return submit_job("plan_subtasks", session_id, run)
+    root_task = await run_blocking(run)
     return {"tree": root_task.to_dict()}
 
+@app.post("/plan_subtasks/stream")
+async def plan_subtasks_stream_endpoint(request: Request):
+    """
+    Streaming variant of /plan_subtasks: emits an `area_planned` event per area, then the tree.
+    """
+    data = await request.json()
+    session_id = data.get("session_id", "default")
+    await run_blocking(require_session, session_id, ("task_manager", "root_task", "spec"))
+    return stream_pipeline(session_stage(session_id, plan_stage))
+
 @app.post("/refine")
 async def refine_endpoint(request: Request):
     """
     Endpoint to recursively refine ambiguous subtasks using the refiner agent.
+    With "background": true the stage runs as a job and the response is its job id.
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    tm = SESSION.get(session_id, {}).get("task_manager")
-    root_task = SESSION.get(session_id, {}).get("root_task")
-    spec = SESSION.get(session_id, {}).get("spec")
-    if not (tm and root_task and spec):
-        raise HTTPException(status_code=400, detail="Previous steps not completed.")
-    task_refiner = TaskRefiner()
-    refine_all_subtasks(tm, root_task, task_refiner, spec["description"])
+    await run_blocking(require_session, session_id, ("task_manager", "root_task", "spec"))
+    run = session_stage(session_id, refine_stage)
+    if data.get("background"):
+        return submit_job("refine", session_id, run)
+    root_task = await run_blocking(run)
     return {"tree": root_task.to_dict()}
 
+@app.post("/refine/stream")
+async def refine_stream_endpoint(request: Request):
+    """
+    Streaming variant of /refine: emits a `subtask_refined` event per subtask, then the tree.
+    """
+    data = await request.json()
+    session_id = data.get("session_id", "default")
+    await run_blocking(require_session, session_id, ("task_manager", "root_task", "spec"))
+    return stream_pipeline(session_stage(session_id, refine_stage))
+
 @app.post("/execute")
 async def execute_endpoint(request: Request):
     """
-    Endpoint to execute all tasks in the tree (post-order) and export the results.
+    Endpoint to execute the tree (independent units in parallel) and export the results.
+    Only the tasks without a result, or whose inputs changed since they ran, are executed.
+    With "background": true the stage runs as a job and the response is its job id.
+    With "checkpoint": true finished tasks are checkpointed, so a rerun after a crash resumes.
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    tm = SESSION.get(session_id, {}).get("task_manager")
-    root_task = SESSION.get(session_id, {}).get("root_task")
-    if not (tm and root_task):
-        raise HTTPException(status_code=400, detail="Previous steps not completed.")
-    execute_tasks_postorder(root_task)
-    export_task_tree(root_task, tm, out_name=f"task_tree_{session_id}")
+    session = await run_blocking(require_session, session_id, ("task_manager", "root_task"))
+    await run_blocking(check_graph, session["root_task"])
+    run = session_stage(session_id, execute_stage(session_id, checkpoint=bool(data.get("checkpoint"))))
+    if data.get("background"):
+        return submit_job("execute", session_id, run)
+    root_task = await run_blocking(run)
     return {"tree": root_task.to_dict()}
 
+@app.post("/execute/stream")
+async def execute_stream_endpoint(request: Request):
+    """
+    Streaming variant of /execute: emits task_started / task_finished / task_failed events
+    (task_id, area, result, elapsed_s) as the tree executes, then exports it and sends the tree.
+    """
+    data = await request.json()
+    session_id = data.get("session_id", "default")
+    session = await run_blocking(require_session, session_id, ("task_manager", "root_task"))
+    await run_blocking(check_graph, session["root_task"])
+    return stream_pipeline(session_stage(session_id, execute_stage(session_id, checkpoint=bool(data.get("checkpoint")))))
+
+@app.post("/edit_task")
+async def edit_task(request: Request):
+    """
+    Endpoint to edit a task of the session tree (title, description, expected_output,
+    execution_type). Returns the tasks the next /execute will rerun: the edited task,
+    its transitive dependents and their ancestors.
+    """
+    data = await request.json()
+    session_id = data.get("session_id", "default")
+    changes = {name: data[name] for name in EDITABLE_FIELDS if name in data}
+
+    def run():
+        with SESSION.lock(session_id):
+            session = require_session(session_id, ("task_manager", "root_task"))
+            tm, root_task = session["task_manager"], session["root_task"]
+            task = tm.tasks.get(data.get("task_id"))
+            if task is None:
+                raise HTTPException(status_code=404, detail="Task not found.")
+            if not changes:
+                raise HTTPException(status_code=400,
+                                    detail=f"Nothing to edit; expected one of {', '.join(EDITABLE_FIELDS)}.")
+            for name, value in changes.items():
+                setattr(task, name, value)
+            tm.reindex(task)
+            dirty = session_execution(session).dirty_tasks(root_task)
+            SESSION.set(session_id, session)
+        return {"task": task.to_dict(), "dirty": sorted(dirty)}
+
+    return await run_blocking(run)
+
 @app.post("/get_tree")
 async def get_tree(request: Request):
     """
@@ -166,11 +536,57 @@ async def get_tree(request: Request):
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    root_task = SESSION.get(session_id, {}).get("root_task")
+    session = await run_blocking(SESSION.get, session_id, {})
+    root_task = session.get("root_task")
     if not root_task:
         raise HTTPException(status_code=404, detail="No tree found for this session.")
     return {"tree": root_task.to_dict()}
 
+@app.get("/graph")
+async def get_graph(request: Request, session_id: str = "default", since: int = None, root: str = None,
+                    depth: int = None):
+    """
+    Endpoint returning the session tree as vis-network nodes and edges (subtask and dependency).
+
+    `since` returns only what changed after that version (plus removed ids), `root` and
+    `depth` return one subtree down to `depth` levels for lazy expansion. The response
+    carries an ETag; a matching If-None-Match gets an empty 304.
+    """
+    def refresh():
+        root_task = SESSION.get(session_id, {}).get("root_task")
+        if not root_task:
+            raise HTTPException(status_code=404, detail="No tree found for this session.")
+        view = GRAPH_VIEWS.get(session_id, root_task)
+        view.refresh(root_task)
+        return view
+
+    view = await run_blocking(refresh)
+    if root is not None and root not in view:
+        raise HTTPException(status_code=404, detail="Task not found.")
+    etag = view.etag
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    try:
+        payload = view.payload(since=since, root_id=root, depth=depth)
+    except KeyError:
+        raise HTTPException(status_code=404, detail="Task not found.")
+    return JSONResponse(payload, headers=headers)
+
+@app.get("/graph/analysis")
+async def get_graph_analysis(session_id: str = "default"):
+    """
+    Endpoint returning the dependency analysis of the session tree: dangling dependencies,
+    cycles, critical path (task ids), width per level and maximum parallelism.
+    """
+    session = await run_blocking(SESSION.get, session_id, {})
+    root_task = session.get("root_task")
+    if not root_task:
+        raise HTTPException(status_code=404, detail="No tree found for this session.")
+    analysis = await run_blocking(analyze_task_graph, root_task)
+    del analysis["order"]
+    return analysis
+
 @app.post("/print_tree")
 async def print_tree(request: Request):
     """
@@ -178,9 +594,106 @@ async def print_tree(request: Request):
     """
     data = await request.json()
     session_id = data.get("session_id", "default")
-    root_task = SESSION.get(session_id, {}).get("root_task")
+    session = await run_blocking(SESSION.get, session_id, {})
+    root_task = session.get("root_task")
     if not root_task:
         raise HTTPException(status_code=404, detail="No tree found for this session.")
     print_task_tree(root_task)
     return {"status": "printed"}
 
+@app.get("/sessions/stats")
+async def session_stats():
+    """
+    Endpoint exposing session store size and eviction metrics.
+    """
+    return SESSION.stats()
+
+@app.get("/metrics")
+async def metrics():
+    """
+    Prometheus endpoint: stage timings, model calls, tokens, latency and cost, plus
+    session, job queue and request governor gauges.
+    """
+    sessions, jobs, governor = SESSION.stats(), JOBS.stats(), get_default_governor().stats()
+    gauges = {
+        "stratmind_sessions": sessions["size"],
+        "stratmind_job_queue_depth": jobs["queue_depth"],
+        "stratmind_jobs_running": jobs["running"],
+        "stratmind_llm_concurrency_limit": governor["limit"],
+        "stratmind_llm_in_flight": governor["in_flight"],
+        "stratmind_llm_waiting": sum(governor["waiting"].values()),
+    }
+    return PlainTextResponse(METRICS.render(gauges), media_type="text/plain; version=0.0.4")
+
+@app.get("/governor/stats")
+async def governor_stats():
+    """
+    Endpoint exposing the request governor: adaptive concurrency limit, calls in flight,
+    waiting calls per priority lane and retry/throttle counters.
+    """
+    return get_default_governor().stats()
+
+@app.get("/agents/stats")
+async def agent_stats():
+    """
+    Endpoint exposing the agent registry: agents created, per-request setup time and import time.
+    """
+    return AGENTS.stats()
+
+@app.get("/speculation/stats")
+async def speculation_stats():
+    """
+    Endpoint exposing speculative synthesis/decomposition: started, cancelled, hits and misses.
+    """
+    return dict(SPECULATOR.stats(), enabled=SPECULATE)
+
+@app.get("/jobs/stats")
+async def job_stats():
+    """
+    Endpoint exposing job queue depth, running jobs and counters.
+    """
+    return JOBS.stats()
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str, since: int = 0):
+    """
+    Endpoint to poll a background job: status, result and progress events from index `since`.
+    """
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return job.to_dict(since)
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, since: int = 0):
+    """
+    Endpoint to subscribe to a background job's progress as Server-Sent Events.
+    Ends with a `job_finished` event carrying the final status and result.
+    """
+    job = JOBS.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+
+    async def events():
+        sent = since
+        while True:
+            active = job.active
+            for event in job.events[sent:]:
+                yield format_sse(event)
+                sent += 1
+            if not active:
+                break
+            await asyncio.sleep(0.5)
+        yield format_sse({"event": "job_finished", "status": job.status, "result": job.result, "error": job.error})
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """
+    Endpoint to cancel a background job; running stages stop at their next progress event.
+    """
+    job = JOBS.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found.")
+    return {"job_id": job.job_id, "status": job.status}
@@ -0,0 +1,249 @@
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from src.utils.compact_export import load_compact
+from src.utils.task_graph import analyze_task_graph
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+METRICS = ["total_nodes", "max_depth", "area_count", "avg_children_per_node",
+           "leaf_count", "llm_task_ratio", "result_coverage"]
+TRACE_COLUMNS = ["llm_calls", "prompt_tokens", "completion_tokens", "cost_usd", "llm_latency_s", "wall_s"]
+GRAPH_COLUMNS = ["dependency_edges", "dangling_dependencies", "cyclic_tasks", "critical_path_length",
+                 "max_parallelism", "avg_parallelism", "level_widths"]
+CACHE_VERSION = 3
+CASE_PATTERN = re.compile(r"(CASE\d+)(?:_([A-Z]+))?_task_tree")
+# Exports written with STRATMIND_EXPORT_FORMAT=compact
+COMPACT_SUFFIX = re.compile(r"\.compact\.json(\.gz|\.zst)?$")
+
+
+def load_task_tree(file_path):
+    if COMPACT_SUFFIX.search(file_path):
+        return load_compact(file_path)
+    with open(file_path, "rb") as f:
+        data = f.read()
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+def tree_stats(tree):
+    """
+    Compute every structural metric of a task tree in a single iterative pass.
+
+    Result coverage is the share of nodes carrying a `result` key whose result is
+    neither None nor "" (an empty aggregated result, e.g. {}, still counts as covered).
+    """
+    total_nodes = max_depth = llm_tasks = leaf_count = 0
+    inner_nodes = child_total = 0
+    with_result = covered = 0
+    stack = [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        total_nodes += 1
+        if depth > max_depth:
+            max_depth = depth
+        if node.get("execution_type", "llm") == "llm":
+            llm_tasks += 1
+        if "result" in node:
+            with_result += 1
+            if node["result"] is not None and node["result"] != "":
+                covered += 1
+        subtasks = node.get("subtasks")
+        if not subtasks:
+            leaf_count += 1
+        else:
+            inner_nodes += 1
+            child_total += len(subtasks)
+            stack.extend((child, depth + 1) for child in subtasks)
+    return {
+        "total_nodes": total_nodes,
+        "max_depth": max_depth,
+        "llm_tasks": llm_tasks,
+        "leaf_count": leaf_count,
+        "area_count": len(tree.get("subtasks", [])),
+        "avg_children_per_node": child_total / inner_nodes if inner_nodes else 0,
+        "llm_task_ratio": llm_tasks / total_nodes if total_nodes else 0,
+        "result_coverage": covered / with_result if with_result else 0,
+    }
+
+
+def trace_stats(tree):
+    """
+    Cost and latency columns from the `trace` block of the export metadata (None when absent).
+    """
+    trace = (tree.get("_metadata") or {}).get("trace") or {}
+    llm = trace.get("llm") or {}
+    return {
+        "llm_calls": llm.get("calls"),
+        "prompt_tokens": llm.get("prompt_tokens"),
+        "completion_tokens": llm.get("completion_tokens"),
+        "cost_usd": llm.get("cost_usd"),
+        "llm_latency_s": llm.get("latency_s"),
+        "wall_s": trace.get("wall_s"),
+    }
+
+
+def graph_stats(tree):
+    """
+    Dependency-graph columns of a tree (see analyze_task_graph); level_widths is space-separated.
+    """
+    analysis = analyze_task_graph(tree)
+    return {
+        "dependency_edges": analysis["dependency_edges"],
+        "dangling_dependencies": len(analysis["dangling"]),
+        "cyclic_tasks": analysis["cyclic_tasks"],
+        "critical_path_length": analysis["critical_path_length"],
+        "max_parallelism": analysis["max_parallelism"],
+        "avg_parallelism": analysis["avg_parallelism"],
+        "level_widths": " ".join(map(str, analysis["level_widths"])),
+    }
+
+
+def file_stats(path):
+    """
+    Load one exported tree and return its metrics plus case/variant identifiers.
+    """
+    tree = load_task_tree(path)
+    stats = tree_stats(tree)
+    stats.update(trace_stats(tree))
+    stats.update(graph_stats(tree))
+    filename = os.path.basename(path)
+    match = CASE_PATTERN.search(filename)
+    stats["case_id"] = match.group(1) if match else "unknown"
+    stats["variant"] = match.group(2) if match and match.group(2) else None
+    stats["file"] = filename
+    return stats
+
+
+def find_tree_files(root_dir, recursive=True):
+    """
+    List exported `*CASE*.json` task trees (compact ones included) under `root_dir`, sorted by path.
+    """
+    found = []
+    stack = [root_dir]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive:
+                        stack.append(entry.path)
+                elif "CASE" in entry.name and (entry.name.endswith(".json") or COMPACT_SUFFIX.search(entry.name)):
+                    found.append(entry.path)
+    return sorted(found)
+
+
+class StatsCache:
+    """
+    Per-file metrics cache stored as JSON, keyed on path and validated by (mtime, size).
+
+    A file whose modification time and size are unchanged is never parsed again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        if path and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == CACHE_VERSION:
+                self.entries = data["entries"]
+
+    @staticmethod
+    def signature(file_path):
+        st = os.stat(file_path)
+        return [st.st_mtime_ns, st.st_size]
+
+    def get(self, file_path):
+        entry = self.entries.get(file_path)
+        if entry and entry["signature"] == self.signature(file_path):
+            return entry["stats"]
+        return None
+
+    def put(self, file_path, stats):
+        self.entries[file_path] = {"signature": self.signature(file_path), "stats": stats}
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "entries": self.entries}, f)
+        os.replace(tmp_path, self.path)
+
+
+def analyze_corpus(root_dir, recursive=True, workers=None, cache_path=None):
+    """
+    Compute the metrics of every exported tree under `root_dir`.
+
+    Unchanged files are served from the cache; the rest are parsed in parallel
+    across a process pool.
+
+    Args:
+        root_dir (str): Directory holding exported trees (e.g. "output").
+        recursive (bool): Also scan subdirectories such as output/robustness.
+        workers (int): Process pool size (None = CPU count, 1 = in-process).
+        cache_path (str): JSON file for the per-file stats cache (None disables it).
+
+    Returns:
+        list: One metrics dict per file, in path order, with a `path` field.
+    """
+    cache = StatsCache(cache_path)
+    paths = find_tree_files(root_dir, recursive)
+    stale = [path for path in paths if cache.get(path) is None]
+    if stale:
+        if workers == 1 or len(stale) == 1:
+            fresh = [file_stats(path) for path in stale]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                fresh = list(pool.map(file_stats, stale, chunksize=max(1, len(stale) // 64)))
+        for path, stats in zip(stale, fresh):
+            cache.put(path, stats)
+        cache.save()
+    return [dict(cache.get(path), path=os.path.relpath(path, root_dir)) for path in paths]
+
+
+def plot_radar(df, out_path=None, show=False, metrics=METRICS):
+    """
+    Draw a normalized radar chart of the metrics, one polygon per case.
+
+    Headless by default: the figure is written to `out_path` and only shown
+    interactively when `show` is True.
+    """
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    df_norm = df.copy()
+    span = (df[metrics].max() - df[metrics].min()).replace(0, 1)
+    df_norm[metrics] = (df[metrics] - df[metrics].min()) / span
+
+    angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
+    angles += angles[:1]
+
+    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    for _, row in df_norm.iterrows():
+        values = row[metrics].tolist()
+        values += values[:1]
+        ax.plot(angles, values, label=row["case_id"])
+        ax.fill(angles, values, alpha=0.1)
+
+    ax.set_theta_offset(np.pi / 2)
+    ax.set_theta_direction(-1)
+    ax.set_thetagrids(np.degrees(angles[:-1]), metrics)
+    ax.set_title("Comparativa de árboles por caso")
+    ax.legend(loc="lower center", bbox_to_anchor=(0.5, -0.3), ncol=3)
+    plt.tight_layout()
+    if out_path:
+        fig.savefig(out_path, dpi=150)
+    if show:
+        plt.show()
+    plt.close(fig)
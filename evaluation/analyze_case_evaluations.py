@@ -1,113 +1,69 @@
+import argparse
 import os
-import json
+import sys
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import re
-from datetime import datetime
-
-def load_task_tree(file_path):
-    with open(file_path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-def analyze_tree(tree):
-    def walk(node, depth=0):
-        stats["total_nodes"] += 1
-        stats["max_depth"] = max(stats["max_depth"], depth)
-        if node.get("execution_type", "llm") == "llm":
-            stats["llm_tasks"] += 1
-        if not node.get("subtasks"):
-            stats["leaf_count"] += 1
-        else:
-            child_counts.append(len(node["subtasks"]))
-            for child in node["subtasks"]:
-                walk(child, depth + 1)
-
-    stats = {
-        "total_nodes": 0,
-        "max_depth": 0,
-        "llm_tasks": 0,
-        "leaf_count": 0,
-        "area_count": 0
-    }
-    child_counts = []
-
-    stats["area_count"] = len(tree.get("subtasks", []))
-    walk(tree)
-
-    stats["avg_children_per_node"] = np.mean(child_counts) if child_counts else 0
-    stats["llm_task_ratio"] = stats["llm_tasks"] / stats["total_nodes"] if stats["total_nodes"] else 0
-    stats["result_coverage"] = compute_result_coverage(tree)
-    return stats
-
-def compute_result_coverage(tree):
-    results = []
-
-    def collect(node):
-        if "result" in node:
-            results.append(node["result"] is not None and node["result"] != "")
-        for child in node.get("subtasks", []):
-            collect(child)
-
-    collect(tree)
-    return sum(results) / len(results) if results else 0
 
-def main():
-    output_dir = "output"
-    results = []
+if __package__ in (None, ""):  # run as `python evaluation/analyze_case_evaluations.py`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-    for filename in os.listdir(output_dir):
-        if filename.endswith(".json") and "CASE" in filename:
-            file_path = os.path.join(output_dir, filename)
-            tree = load_task_tree(file_path)
-            stats = analyze_tree(tree)
+from evaluation.analysis_engine import GRAPH_COLUMNS, TRACE_COLUMNS, analyze_corpus, plot_radar
 
-            # Extraer el case_id correctamente del nombre
-            case_id_match = re.search(r"(CASE\d+)", filename)
-            case_id = case_id_match.group(1) if case_id_match else "unknown"
+COLUMNS = ["total_nodes", "max_depth", "llm_tasks", "leaf_count", "area_count", "avg_children_per_node",
+           "llm_task_ratio", "result_coverage", *TRACE_COLUMNS, *GRAPH_COLUMNS, "case_id", "file"]
 
-            stats["case_id"] = case_id
-            stats["file"] = filename
-            results.append(stats)
 
-    df = pd.DataFrame(results)
-    df = df.sort_values("case_id").reset_index(drop=True)
+def summarize_corpus(output_dir="output", recursive=False, workers=None, cache_path=None, variants=None):
+    """
+    One row of metrics per exported tree, sorted by case and file.
 
-    print("\n=== Resultados comparativos ===")
-    print(df[["case_id", "total_nodes", "max_depth", "area_count", "avg_children_per_node",
-              "leaf_count", "llm_task_ratio", "result_coverage"]])
+    This is the table written to evaluation_summary_cases.csv; the analysis notebooks
+    load their data through it too. `result_coverage` is the share of nodes carrying a
+    `result` key whose result is neither None nor "" (see `tree_stats`).
+
+    Args:
+        output_dir (str): Directory with exported trees.
+        recursive (bool): Also analyze subdirectories (output/robustness, ...).
+        workers (int): Parser processes (None = CPU count).
+        cache_path (str): Per-file stats cache (None disables it).
+        variants (bool): Add the `variant` and `path` columns. Defaults to `recursive`.
 
-    df.to_csv("evaluation/evaluation_summary_cases.csv", index=False)
+    Returns:
+        pandas.DataFrame: The metrics.
+    """
+    results = analyze_corpus(output_dir, recursive=recursive, workers=workers, cache_path=cache_path)
+    columns = COLUMNS + (["variant", "path"] if (recursive if variants is None else variants) else [])
+    return pd.DataFrame(results, columns=columns).sort_values(["case_id", "file"]).reset_index(drop=True)
 
-    plot_radar(df)
 
-def plot_radar(df):
-    metrics = ["total_nodes", "max_depth", "area_count", "avg_children_per_node",
-               "leaf_count", "llm_task_ratio", "result_coverage"]
+def parse_args():
+    parser = argparse.ArgumentParser(description="Structural metrics for exported task trees.")
+    parser.add_argument("--output-dir", default="output", help="Directory with exported trees.")
+    parser.add_argument("--recursive", action="store_true", help="Also analyze subdirectories (output/robustness, ...).")
+    parser.add_argument("--workers", type=int, default=None, help="Parser processes (default: CPU count).")
+    parser.add_argument("--cache", default=".cache/analysis_stats.json", help="Per-file stats cache ('' disables it).")
+    parser.add_argument("--csv", default="evaluation/evaluation_summary_cases.csv")
+    parser.add_argument("--plot", default=None, help="Save the radar chart to this image file.")
+    parser.add_argument("--show", action="store_true", help="Open the radar chart in a window.")
+    return parser.parse_args()
 
-    df_norm = df.copy()
-    df_norm[metrics] = (df[metrics] - df[metrics].min()) / (df[metrics].max() - df[metrics].min())
 
-    labels = metrics
-    num_vars = len(labels)
-    angles = np.linspace(0, 2 * np.pi, num_vars, endpoint=False).tolist()
-    angles += angles[:1]
+def main():
+    args = parse_args()
+    df = summarize_corpus(args.output_dir, recursive=args.recursive,
+                          workers=args.workers, cache_path=args.cache or None)
+
+    print("\n=== Resultados comparativos ===")
+    print(df[["case_id", "total_nodes", "max_depth", "area_count", "avg_children_per_node",
+              "leaf_count", "llm_task_ratio", "result_coverage"]])
 
-    fig, ax = plt.subplots(figsize=(8, 8), subplot_kw=dict(polar=True))
+    print("\n=== Grafo de dependencias ===")
+    print(df[["case_id", "dependency_edges", "dangling_dependencies", "cyclic_tasks", "critical_path_length",
+              "max_parallelism", "avg_parallelism"]])
 
-    for i, row in df_norm.iterrows():
-        values = row[labels].tolist()
-        values += values[:1]
-        ax.plot(angles, values, label=row["case_id"])
-        ax.fill(angles, values, alpha=0.1)
+    df.to_csv(args.csv, index=False)
 
-    ax.set_theta_offset(np.pi / 2)
-    ax.set_theta_direction(-1)
-    ax.set_thetagrids(np.degrees(angles[:-1]), labels)
-    ax.set_title("Comparativa de árboles por caso")
-    ax.legend(loc="lower center", bbox_to_anchor=(0.5, -0.3), ncol=3)
-    plt.tight_layout()
-    plt.show()
+    if args.plot or args.show:
+        plot_radar(df, out_path=args.plot, show=args.show)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,165 @@
+import argparse
+import contextlib
+import io
+import json
+import sys
+import time
+import tracemalloc
+
+from evaluation.benchmarks.bench_task_index import build_synthetic_tree
+from main import plan_area_subtasks
+from src.executor.task_executor import TaskExecutor
+from src.executor.task_scheduler import build_execution_units, execute_tasks_parallel, unit_order
+from src.utils.fake_llm import FakeChatClient
+from src.utils.task_graph import dependency_ids, iter_tasks, topological_order
+
+class FakeSpecialist:
+    """Plans a fixed number of subtasks per area through the fake client."""
+
+    def __init__(self, client, subtasks_per_area):
+        self.client = client
+        self.subtasks_per_area = subtasks_per_area
+
+    def plan_subtasks(self, area_divisions, task_description):
+        area = area_divisions["subtasks"][0]
+        self.client.chat.completions.create(
+            model="fake-llm", messages=[{"role": "user", "content": f"Plan {area['area']}: {area['description']}"}]
+        )
+        return [{"area": area["area"], "subtasks": [
+            {"title": f"{area['area']} step {i}", "description": f"Step {i} of {area['area']}",
+             "expected_output": "Deliverable", "execution_type": "llm", "dependencies": []}
+            for i in range(self.subtasks_per_area)
+        ]}]
+
+
+def build_tree(n_nodes):
+    """
+    Synthetic tree whose cross-unit dependencies only point to earlier units, so it is schedulable.
+    """
+    tm, root = build_synthetic_tree(n_nodes)
+    units = build_execution_units(root)[0]
+    unit_of = {task.task_id: index for index, unit in enumerate(units.values()) for task in iter_tasks(unit)}
+    for task in tm.tasks.values():
+        if task.task_id in unit_of:
+            task.dependencies = [dep_id for dep_id in dependency_ids(task)
+                                 if unit_of.get(dep_id, -1) <= unit_of[task.task_id]]
+    tm.rebuild_indexes()
+    return tm, root
+
+
+def timed(fn):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    return time.perf_counter() - start
+
+
+def bench_execute(n_nodes, latency, workers):
+    tm, root = build_tree(n_nodes)
+    execute = TaskExecutor(FakeChatClient(latency=latency)).bind(root)
+    return timed(lambda: execute_tasks_parallel(root, max_workers=workers, execute_task=execute)), tm, root
+
+
+def bench_direct(n_nodes):
+    """Same work without the scheduler: units run one after another in dependency order."""
+    tm, root = build_tree(n_nodes)
+    execute = TaskExecutor(FakeChatClient()).bind(root)
+    units, edges, _ = build_execution_units(root)
+    order = topological_order(list(units), edges)
+    return timed(lambda: [execute(task) for unit_id in order for task in unit_order(units[unit_id])])
+
+
+def bench_memory(n_nodes):
+    tm, root = build_tree(n_nodes)
+    execute = TaskExecutor(FakeChatClient()).bind(root)
+    tracemalloc.start()
+    try:
+        timed(lambda: execute_tasks_parallel(root, max_workers=8, execute_task=execute))
+        return tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+
+
+def bench_plan(n_areas, subtasks_per_area, latency, workers):
+    tm, root = build_synthetic_tree(n_areas + 1, n_areas=n_areas)
+    specialist = FakeSpecialist(FakeChatClient(latency=latency), subtasks_per_area)
+    return timed(lambda: plan_area_subtasks(tm, root, specialist, "Synthetic project", max_workers=workers))
+
+
+def run(args):
+    results = {}
+    print(f"{'nodes':>7}{'units':>7}{'direct s':>10}{'sched s':>10}{'overhead us/node':>18}"
+          f"{'speedup':>9}{'peak MB':>9}")
+    for n_nodes in args.sizes:
+        direct_s = bench_direct(n_nodes)
+        sched_s, tm, root = bench_execute(n_nodes, 0.0, 1)
+        units = len(build_execution_units(root)[0])
+        row = {
+            "units": units,
+            "direct_s": round(direct_s, 4),
+            "scheduler_s": round(sched_s, 4),
+            "overhead_us_per_node": round(max(sched_s - direct_s, 0) / n_nodes * 1e6, 2),
+            "peak_mb": round(bench_memory(n_nodes), 2),
+        }
+        if n_nodes <= args.speedup_max_nodes:
+            serial_s = bench_execute(n_nodes, args.latency, 1)[0]
+            parallel_s = bench_execute(n_nodes, args.latency, args.workers)[0]
+            row["speedup"] = round(serial_s / parallel_s, 2)
+        results[str(n_nodes)] = row
+        print(f"{n_nodes:>7}{units:>7}{row['direct_s']:>10.3f}{row['scheduler_s']:>10.3f}"
+              f"{row['overhead_us_per_node']:>18.1f}{row.get('speedup', float('nan')):>8.2f}x{row['peak_mb']:>9.1f}")
+
+    serial_s = bench_plan(8, 5, args.latency * 10, 1)
+    parallel_s = bench_plan(8, 5, args.latency * 10, args.workers)
+    results["plan"] = {"serial_s": round(serial_s, 4), "parallel_s": round(parallel_s, 4),
+                       "speedup": round(serial_s / parallel_s, 2)}
+    print(f"\nplan_area_subtasks (8 areas): {serial_s:.3f}s serial, {parallel_s:.3f}s "
+          f"with {args.workers} workers ({results['plan']['speedup']:.2f}x)")
+    return results
+
+
+def regressions(results, baseline, tolerance):
+    """
+    Compare against a baseline file: overhead may not grow, nor speedup shrink, by more than `tolerance`.
+    """
+    found = []
+    for key, row in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if "overhead_us_per_node" in base:
+            limit = base["overhead_us_per_node"] * (1 + tolerance) + 5
+            if row["overhead_us_per_node"] > limit:
+                found.append(f"{key} nodes: overhead {row['overhead_us_per_node']}us/node > {limit:.1f}")
+        if "speedup" in base and "speedup" in row and row["speedup"] < base["speedup"] * (1 - tolerance):
+            found.append(f"{key}: speedup {row['speedup']}x < {base['speedup'] * (1 - tolerance):.2f}x")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline orchestration on an offline fake model.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 100, 1000, 10000])
+    parser.add_argument("--latency", type=float, default=0.002, help="Fake model latency per call (s).")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--speedup-max-nodes", type=int, default=1000,
+                        help="Largest tree the latency-bound speedup run is measured on.")
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--baseline", help="Fail (exit 1) on regressions against this results file.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = run(args)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
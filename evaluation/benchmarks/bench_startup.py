@@ -0,0 +1,158 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.utils.agent_registry import AGENT_CLASSES, AgentRegistry
+from src.utils.fake_llm import make_completion
+from src.utils.rate_limiter import enable_governor
+from src.utils.tracing import Tracer, enable_tracing
+
+COLD_START = """
+import importlib, json, time
+start = time.perf_counter()
+import back
+app_s = time.perf_counter() - start
+start = time.perf_counter()
+for path in {paths!r}:
+    importlib.import_module(path.partition(":")[0])
+print(json.dumps({{"app_s": app_s, "agents_s": time.perf_counter() - start}}))
+"""
+
+
+def cold_start(runs):
+    """
+    Import back.py in fresh interpreters; the agent modules are imported afterwards,
+    as the first request would.
+    """
+    code = COLD_START.format(paths=list(AGENT_CLASSES.values()))
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {key: round(statistics.median(s[key] for s in samples), 4) for key in ("app_s", "agents_s")}
+
+
+def request_setup(n):
+    """
+    Time the per-request agent setup: a new instance per request vs a registry view.
+    """
+    registry = AgentRegistry()
+    results = {}
+    for name in AGENT_CLASSES:
+        cls = registry.agent_class(name)
+        tracer = Tracer()
+        start = time.perf_counter()
+        for _ in range(n):
+            enable_governor(enable_tracing(cls(), tracer))
+        fresh = (time.perf_counter() - start) / n
+        registry.base(name)
+        start = time.perf_counter()
+        for _ in range(n):
+            registry.get(name, tracer)
+        shared = (time.perf_counter() - start) / n
+        results[name] = {"new_instance_us": round(fresh * 1e6, 1), "registry_us": round(shared * 1e6, 1)}
+    return results
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers every POST with a fixed chat completion and counts new connections."""
+
+    protocol_version = "HTTP/1.1"
+    wbufsize = 1 << 16
+    connections = 0
+    lock = threading.Lock()
+
+    def setup(self):
+        super().setup()
+        with StubHandler.lock:
+            StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("content-length", 0)))
+        body = make_completion("ok", "gpt-4o-mini", 10, 1).model_dump_json().encode("utf-8")
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def connection_reuse(n):
+    """
+    Send `n` chat requests to a local stub server, with a new client per request and
+    with one shared client, and count the TCP connections each opened.
+
+    Uses the OpenAI SDK when installed, plain httpx (its transport) otherwise.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    messages = [{"role": "user", "content": "ping"}]
+    try:
+        from openai import OpenAI
+        sdk = "openai"
+        make_client = lambda: OpenAI(base_url=base_url, api_key="offline", max_retries=0)
+        send = lambda client: client.chat.completions.create(model="gpt-4o-mini", messages=messages)
+    except ImportError:
+        import httpx
+        sdk = "httpx"
+        make_client = lambda: httpx.Client(base_url=base_url)
+        send = lambda client: client.post("/chat/completions", json={"model": "gpt-4o-mini", "messages": messages})
+
+    results = {"client": sdk}
+    try:
+        for mode in ("new_client", "shared_client"):
+            StubHandler.connections = 0
+            shared = make_client() if mode == "shared_client" else None
+            start = time.perf_counter()
+            for _ in range(n):
+                send(shared or make_client())
+            results[mode] = {"connections": StubHandler.connections,
+                             "ms_per_request": round((time.perf_counter() - start) / n * 1e3, 3)}
+    finally:
+        server.shutdown()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure back.py cold start, per-request agent setup and "
+                                                 "HTTP connection reuse.")
+    parser.add_argument("--cold-runs", type=int, default=5)
+    parser.add_argument("--setup-requests", type=int, default=200)
+    parser.add_argument("--http-requests", type=int, default=50)
+    parser.add_argument("--json", help="Write the results to this file.")
+    args = parser.parse_args()
+    # Agents build their OpenAI client in __init__; no call leaves the machine
+    os.environ.setdefault("OPENAI_API_KEY", "offline")
+
+    results = {"cold_start": cold_start(args.cold_runs)}
+    print(f"Cold start: import back {results['cold_start']['app_s']:.3f}s, "
+          f"agent modules on first request {results['cold_start']['agents_s']:.3f}s")
+
+    results["request_setup"] = request_setup(args.setup_requests)
+    print(f"\n{'agent':<12}{'new instance us':>17}{'registry us':>13}")
+    for name, row in results["request_setup"].items():
+        print(f"{name:<12}{row['new_instance_us']:>17.1f}{row['registry_us']:>13.1f}")
+
+    results["connections"] = connection_reuse(args.http_requests)
+    print(f"\n{args.http_requests} requests ({results['connections']['client']}):")
+    for mode in ("new_client", "shared_client"):
+        row = results["connections"][mode]
+        print(f"  {mode:<14}{row['connections']:>4} connections, {row['ms_per_request']:.2f} ms/request")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
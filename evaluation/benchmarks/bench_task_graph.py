@@ -0,0 +1,60 @@
+import argparse
+import time
+
+from evaluation.benchmarks.bench_task_index import build_synthetic_tree
+from src.utils.task_graph import analyze_task_graph
+
+
+def close_cycle(root):
+    """
+    Make the deepest task depend on one of the root's grandchildren, its own ancestor,
+    so every task on the chain between them (and whatever joins it) ends up on a cycle.
+
+    Returns:
+        int: Length of that chain.
+    """
+    stack, deepest = [(root, ())], (root, ())
+    while stack:
+        task, ancestors = stack.pop()
+        if len(ancestors) > len(deepest[1]):
+            deepest = (task, ancestors)
+        stack.extend((child, ancestors + (task,)) for child in task.subtasks)
+    task, ancestors = deepest
+    task.dependencies = list(task.dependencies or []) + [ancestors[2].task_id]
+    return len(ancestors) - 1
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def run(n_nodes, repeat):
+    _, root = build_synthetic_tree(n_nodes)
+    exported = root.to_dict()
+    task_s, analysis = timed(lambda: analyze_task_graph(root), repeat)
+    dict_s, _ = timed(lambda: analyze_task_graph(exported), repeat)
+    cycle_length = close_cycle(root)
+    cycle_s, cyclic = timed(lambda: analyze_task_graph(root), repeat)
+    print(f"{n_nodes:>8}{task_s * 1e3:>11.1f}{task_s / n_nodes * 1e6:>9.2f}{dict_s * 1e3:>11.1f}"
+          f"{cycle_s * 1e3:>11.1f}{analysis['critical_path_length']:>7}{analysis['max_parallelism']:>7}"
+          f"{cyclic['cyclic_tasks']:>8}{cyclic['blocked_tasks']:>9}")
+    assert cyclic["cyclic_tasks"] >= cycle_length
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time analyze_task_graph on synthetic trees, acyclic and with "
+                                                 "one long cycle.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(f"{'nodes':>8}{'tree (ms)':>11}{'us/node':>9}{'dict (ms)':>11}{'cycle (ms)':>11}"
+          f"{'span':>7}{'width':>7}{'cyclic':>8}{'blocked':>9}")
+    for n_nodes in args.sizes:
+        run(n_nodes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
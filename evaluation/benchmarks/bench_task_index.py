@@ -0,0 +1,85 @@
+import argparse
+import random
+import time
+
+from src.utils.task_index import IndexedTaskManager
+
+
+def build_synthetic_tree(n_nodes, n_areas=8, dep_probability=0.2, seed=0):
+    """
+    Build a synthetic project with `n_nodes` tasks spread over `n_areas` areas.
+
+    Subtasks hang from a random earlier task of the same area, and some of them
+    depend on an earlier subtask of that area, mimicking refined specialist plans.
+    """
+    rng = random.Random(seed)
+    tm = IndexedTaskManager()
+    root = tm.create_task(title="Project", description="Synthetic project", expected_output="Plan")
+    areas = [
+        tm.create_task(title=f"Area {i}", description="", expected_output="", area=f"Area {i}",
+                       responsibilities=[], parent_id=root.task_id)
+        for i in range(n_areas)
+    ]
+    members = {area.area: [area] for area in areas}
+    for i in range(n_nodes - n_areas - 1):
+        area = rng.choice(areas)
+        parent = rng.choice(members[area.area])
+        task = tm.create_task(title=f"Task {i}", description="", expected_output="", area=area.area,
+                              parent_id=parent.task_id, execution_type=rng.choice(["llm", "llm", "simulation"]))
+        if len(members[area.area]) > 1 and rng.random() < dep_probability:
+            task.dependencies = [rng.choice(members[area.area][1:]).task_id]
+        members[area.area].append(task)
+    return tm, root
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def run(n_nodes, repeat):
+    start = time.perf_counter()
+    tm, root = build_synthetic_tree(n_nodes)
+    build_s = time.perf_counter() - start
+    tasks = list(tm.tasks.values())
+    areas = tm.area_tasks(root)
+    probe = random.Random(1).sample(tasks, 100)
+
+    scans = {
+        "area tasks": lambda: [t for t in tm.tasks.values() if t.parent == root],
+        "area lookup (all areas)": lambda: [
+            next((t for t in tm.tasks.values() if t.area == a.area and t.parent == root), None) for a in areas
+        ],
+        "children (100 nodes)": lambda: [[t for t in tm.tasks.values() if t.parent == p] for p in probe],
+        "dependents (100 nodes)": lambda: [
+            [t for t in tm.tasks.values() if p.task_id in (t.dependencies or [])] for p in probe
+        ],
+    }
+    indexed = {
+        "area tasks": lambda: tm.area_tasks(root),
+        "area lookup (all areas)": lambda: [tm.area_task(root, a.area) for a in areas],
+        "children (100 nodes)": lambda: [tm.children(p) for p in probe],
+        "dependents (100 nodes)": lambda: [tm.dependents(p.task_id) for p in probe],
+    }
+
+    print(f"\n{n_nodes} nodes (tree built in {build_s:.2f}s)")
+    print(f"{'query':<26}{'scan (ms)':>12}{'index (ms)':>12}{'speedup':>10}")
+    for name in scans:
+        scan_s = timed(scans[name], repeat)
+        index_s = timed(indexed[name], repeat)
+        print(f"{name:<26}{scan_s * 1e3:>12.3f}{index_s * 1e3:>12.3f}{scan_s / max(index_s, 1e-9):>9.0f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark IndexedTaskManager queries against linear scans.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for n_nodes in args.sizes:
+        run(n_nodes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
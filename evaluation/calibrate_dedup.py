@@ -0,0 +1,61 @@
+import argparse
+import itertools
+import os
+import sys
+
+if __package__ in (None, ""):  # run as `python evaluation/calibrate_dedup.py`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from evaluation.analysis_engine import find_tree_files, load_task_tree
+from src.utils.deduplication import DEFAULT_DEDUP_THRESHOLD, NUMBER
+from src.utils.similarity_index import jaccard, shingles
+
+THRESHOLDS = [0.15, 0.2, 0.25, 0.3, 0.35, 0.4, 0.5]
+
+
+def cross_area_pairs(tree):
+    """
+    Every pair of tasks below the areas of an exported tree that `find_duplicate_subtasks`
+    would compare: different areas, same numbers in the title.
+
+    Returns:
+        list: (similarity, title, area, other title, other area), most similar first.
+    """
+    nodes, stack = [], [(tree, 0)]
+    while stack:
+        node, depth = stack.pop()
+        if depth >= 2:
+            nodes.append(node)
+        stack.extend((child, depth + 1) for child in node.get("subtasks") or [])
+    features = [shingles(f"{node.get('title') or ''} {node.get('description') or ''}") for node in nodes]
+    pairs = []
+    for (i, a), (j, b) in itertools.combinations(enumerate(nodes), 2):
+        if a.get("area") == b.get("area") or set(NUMBER.findall(a.get("title") or "")) != set(
+                NUMBER.findall(b.get("title") or "")):
+            continue
+        pairs.append((round(jaccard(features[i], features[j]), 3), a["title"], a.get("area"), b["title"], b.get("area")))
+    return sorted(pairs, key=lambda pair: -pair[0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-area subtask similarities of exported trees, "
+                                                 "to calibrate STRATMIND_DEDUP_THRESHOLD.")
+    parser.add_argument("--output-dir", default="output", help="Directory with exported trees.")
+    parser.add_argument("--top", type=int, default=3, help="Most similar pairs listed per tree.")
+    args = parser.parse_args()
+
+    flagged = {threshold: 0 for threshold in THRESHOLDS}
+    for path in find_tree_files(args.output_dir, recursive=False):
+        pairs = cross_area_pairs(load_task_tree(path))
+        print(f"{os.path.basename(path)}: {len(pairs)} cross-area pairs")
+        for similarity, title, area, other_title, other_area in pairs[:args.top]:
+            print(f"  {similarity:.3f}  {title} ({area}) ~ {other_title} ({other_area})")
+        for threshold in THRESHOLDS:
+            flagged[threshold] += sum(1 for pair in pairs if pair[0] >= threshold)
+    print(f"\nPairs at or above each threshold (current default {DEFAULT_DEDUP_THRESHOLD}):")
+    for threshold, count in flagged.items():
+        print(f"  {threshold:.2f}: {count}")
+
+
+if __name__ == "__main__":
+    main()
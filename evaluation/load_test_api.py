@@ -0,0 +1,53 @@
+import argparse
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+def clarify_session(base_url, user_input):
+    """
+    Open one clarification session and time its first /clarify round-trip.
+
+    Returns:
+        float: Latency of the request in seconds.
+    """
+    start = time.perf_counter()
+    response = requests.post(
+        f"{base_url}/clarify",
+        json={"session_id": f"load-{uuid.uuid4()}", "user_input": user_input},
+        timeout=300
+    )
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    """
+    Fire concurrent /clarify sessions at a running backend and report whether they serialize.
+
+    If the server handled sessions one at a time, the wall time would be close to the
+    sum of the latencies (serialization ratio ~1). Sessions served concurrently finish
+    in roughly the slowest latency (ratio ~1/sessions).
+    """
+    parser = argparse.ArgumentParser(description="Concurrent-session load test for back.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--sessions", type=int, default=8)
+    parser.add_argument("--input", default="Organize a week-long cultural festival in a medium-sized city.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        latencies = list(pool.map(lambda _: clarify_session(args.url, args.input), range(args.sessions)))
+    wall = time.perf_counter() - start
+
+    ratio = wall / sum(latencies)
+    print(f"Sessions:            {args.sessions}")
+    print(f"Mean latency:        {sum(latencies) / len(latencies):.2f}s (max {max(latencies):.2f}s)")
+    print(f"Wall time:           {wall:.2f}s")
+    print(f"Serialization ratio: {ratio:.2f} (1.00 = fully serialized, {1 / args.sessions:.2f} = fully concurrent)")
+
+
+if __name__ == "__main__":
+    main()
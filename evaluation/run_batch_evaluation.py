@@ -1,128 +1,223 @@
+import argparse
+import glob
 import json
 import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dotenv import load_dotenv
 from datetime import datetime
 
-from src.utils.class_task import TaskManager, create_and_link_subtasks
+from src.utils.task_index import IndexedTaskManager
 from src.agents.decomposer_agent import Decomposer
-from src.agents.executor_agent import execute_tasks_postorder
-from src.utils.recursive_refiner_parent_subtask import refine_recursively
-from src.agents.specialist_agent import SpecialistAgent, get_other_areas_subtasks
+from src.executor.batch_executor import BATCH_LEAVES, BatchLeafExecutor, execute_tasks_batched
+from src.executor.task_executor import TaskExecutor
+from src.executor.context_budget import context_budget_report, enable_context_budget
+from src.agents.specialist_agent import SpecialistAgent
 from src.agents.task_refiner_agent import TaskRefiner
-from src.utils.task_exporter import export_task_tree
+from src.utils.llm_cache import enable_llm_cache, get_default_cache
+from src.utils.task_checkpoint import TaskCheckpoint, restore_task_tree
+from src.utils.task_graph import check_task_graph, iter_tasks
+from src.utils.tracing import Tracer, enable_tracing
+from src.utils.fake_llm import fake_backend_enabled, use_backend
+from src.utils.rate_limiter import enable_governor, governor_budget, share_default_governor
+from main import (
+    create_root_task, decompose_into_areas, create_area_tasks,
+    plan_area_subtasks, refine_all_subtasks, export_tree, EXPORT_DIR, STRICT_GRAPH
+)
 
 load_dotenv()
 
-def create_root_task(task_manager, task_description, expected_output):
-    return task_manager.create_task(
-        title=task_description,
-        description=task_description,
-        expected_output=expected_output
-    )
-
-def decompose_into_areas(root_task, decomposer):
-    area_divisions = decomposer.decompose(
-        root_task.description,
-        root_task.expected_output
-    )
-    root_task.intro = area_divisions["intro"]
-    return area_divisions
-
-def create_area_tasks(task_manager, root_task, area_divisions):
-    for subtask in area_divisions["subtasks"]:
-        task_manager.create_task(
-            title=subtask["area"],
-            description=subtask["description"],
-            expected_output=subtask["expected_output"], 
-            area=subtask["area"],
-            responsibilities=subtask["responsibilities"],
-            parent_id=root_task.task_id,
-            execution_type=subtask.get("execution_type", "llm")
-        )
 
-def plan_area_subtasks(task_manager, root_task, specialist, task_description):
-    areas = [t for t in task_manager.tasks.values() if t.parent == root_task]
-    all_area_names = [area.area for area in areas]
-    for area in areas:
-        other_area_subtasks = get_other_areas_subtasks(task_manager, area, root_task)
-        area_division = {
-            "area": area.area,
-            "description": area.description,
-            "expected_output": area.expected_output,
-            "responsibilities": getattr(area, "responsibilities", []),
-            "other_area_subtasks": other_area_subtasks,
-            "all_area_names": all_area_names
-        }
-        subtasks_by_area = specialist.plan_subtasks({"subtasks": [area_division]}, task_description)
-        for area_data in subtasks_by_area:
-            area_name = area_data["area"]
-            subtasks = area_data["subtasks"]
-            area_task = next(
-                (t for t in task_manager.tasks.values()
-                if t.area == area_name and t.parent == root_task),
-                None
-            )
-            if not area_task:
-                continue
-            create_and_link_subtasks(subtasks, area_name, area_task, task_manager)
-
-def refine_all_subtasks(task_manager, root_task, task_refiner, task_description, max_depth=2):
-    for area_task in [t for t in task_manager.tasks.values() if t.parent == root_task]:
-        area_name = area_task.area
-        def refine_subtree(task, depth=0):
-            refine_recursively(
-                subtask=task,
-                area_name=area_name,
-                global_task=task_description,
-                refiner=task_refiner,
-                task_manager=task_manager,
-                depth=depth,
-                max_depth=max_depth
-            )
-            for child in task.subtasks:
-                refine_subtree(child, depth=depth+1)
-        for subtask_task in area_task.subtasks:
-            refine_subtree(subtask_task, depth=0)
-
-def run_test_case(case):
+def prepare_agent(agent, tracer):
+    """
+    Point an agent at the configured backend, then add tracing, the request governor
+    (batch lane) and the LLM cache.
+
+    Answers from the offline backends (STRATMIND_LLM_BACKEND=fake/replay) are never cached.
+    """
+    agent = enable_governor(enable_tracing(use_backend(agent), tracer), lane="batch")
+    return agent if fake_backend_enabled() else enable_llm_cache(agent)
+
+def run_test_case(case, checkpoint_path=None):
+    """
+    Run the whole pipeline for one case and export its tree.
+
+    With a checkpoint path, the planned tree and every finished task are appended to a
+    JSONL checkpoint. A rerun after a crash restores the planned tree from it and only
+    executes the tasks that have no result yet.
+
+    Returns:
+        dict: The trace summary (stage timings, tokens, cost), export included; the one in the
+            export's `_metadata` is taken as the export starts.
+    """
     task_description = case["description"]
     expected_output = case["expected_output"]
-    task_manager = TaskManager()
-
-    root_task = create_root_task(task_manager, task_description, expected_output)
-    decomposer = Decomposer()
-    area_divisions = decompose_into_areas(root_task, decomposer)
-    create_area_tasks(task_manager, root_task, area_divisions)
-
-    specialist = SpecialistAgent()
-    plan_area_subtasks(task_manager, root_task, specialist, task_description)
-
-    task_refiner = TaskRefiner()
-    refine_all_subtasks(task_manager, root_task, task_refiner, task_description)
-
-    execute_tasks_postorder(root_task)
-
-    # Export task tree with metadata
-    export_task_tree(
-        root_task,
-        task_manager,
-        out_name=f"{case['id']}_task_tree",
-        metadata={
-            "clarified_description": task_description,
-            "expected_output": expected_output,
-            "case_id": case["id"],
-            "timestamp": datetime.now().isoformat()
-        }
-    )
+    task_manager = IndexedTaskManager()
+    tracer = Tracer()
+    checkpoint = TaskCheckpoint(checkpoint_path) if checkpoint_path else None
+    planned_tree = checkpoint.load()[0] if checkpoint else None
+
+    if planned_tree is not None:
+        print(f"Resuming {case['id']} from checkpoint {checkpoint_path}")
+        root_task = restore_task_tree(planned_tree, task_manager)
+    else:
+        root_task = create_root_task(task_manager, task_description, expected_output)
+        decomposer = prepare_agent(Decomposer(), tracer)
+        with tracer.span("decompose"):
+            area_divisions = decompose_into_areas(root_task, decomposer)
+        create_area_tasks(task_manager, root_task, area_divisions)
+
+        specialist = prepare_agent(SpecialistAgent(), tracer)
+        with tracer.span("plan"):
+            plan_area_subtasks(task_manager, root_task, specialist, task_description)
+
+        task_refiner = prepare_agent(TaskRefiner(), tracer)
+        with tracer.span("refine"):
+            refine_all_subtasks(task_manager, root_task, task_refiner, task_description)
+        if checkpoint:
+            checkpoint.write_tree(root_task)
+
+    check_task_graph(root_task, strict=STRICT_GRAPH)
+    done = checkpoint.restore(root_task) if checkpoint else set()
+    on_event = tracer.wrap_events(checkpoint.on_event if checkpoint else None)
+    skip_fn = lambda unit: all(task.task_id in done for task in iter_tasks(unit))
+    executor = enable_context_budget(prepare_agent(TaskExecutor(), tracer))
+    batch_executor = prepare_agent(BatchLeafExecutor(), tracer) if BATCH_LEAVES > 1 else None
+    with tracer.span("execute"):
+        execute_tasks_batched(root_task, batch_executor, on_event=on_event, skip_fn=skip_fn, executor=executor)
+
+    # Export task tree with metadata; the trace returned afterwards also covers the export
+    with tracer.span("export"):
+        export_tree(
+            root_task,
+            task_manager,
+            out_name=f"{case['id']}_task_tree",
+            metadata={
+                "clarified_description": task_description,
+                "expected_output": expected_output,
+                "case_id": case["id"],
+                "timestamp": datetime.now().isoformat(),
+                "trace": tracer.summary(),
+                "context_budget": context_budget_report(executor)
+            }
+        )
+    if checkpoint:
+        os.remove(checkpoint.path)
+    return tracer.summary()
+
+def load_test_cases(path):
+    """
+    Load test cases, flattening robustness files into one case per variant.
+
+    Accepts both layouts used in `evaluation/`: a flat list of cases with an `id`
+    (test_cases.json) and a list of `{"base_case", "variants"}` groups
+    (test_cases_robustness.json).
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        raw_cases = json.load(f)
+    test_cases = []
+    for case in raw_cases:
+        if "variants" in case:
+            test_cases.extend(dict(variant, base_case=case["base_case"]) for variant in case["variants"])
+        else:
+            test_cases.append(case)
+    return test_cases
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    # Write then rename so a crash never leaves a truncated manifest behind
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def find_case_exports(output_dir, case_id):
+    pattern = os.path.join(glob.escape(output_dir), "**", f"*_{glob.escape(case_id)}_task_tree.*")
+    return sorted(glob.glob(pattern, recursive=True))
+
+def relocate_exports(case_id, since, output_dir):
+    """
+    Move the files export_tree just wrote for a case into `output_dir`.
+
+    The exporter always writes into EXPORT_DIR; files older than `since` belong to
+    earlier runs and are left alone.
+    """
+    files = [p for p in find_case_exports(EXPORT_DIR, case_id)
+             if os.path.dirname(p) == EXPORT_DIR and os.path.getmtime(p) >= since]
+    if os.path.abspath(output_dir) == os.path.abspath(EXPORT_DIR):
+        return files
+    os.makedirs(output_dir, exist_ok=True)
+    moved = []
+    for path in files:
+        target = os.path.join(output_dir, os.path.basename(path))
+        shutil.move(path, target)
+        moved.append(target)
+    return moved
+
+def run_case_job(case, output_dir):
+    """Worker entry point: run one case and report what it produced."""
+    start = time.time()
+    trace = run_test_case(case, checkpoint_path=os.path.join(output_dir, "checkpoints", f"{case['id']}.jsonl"))
+    return {
+        "status": "done",
+        "files": relocate_exports(case["id"], start, output_dir),
+        "elapsed_s": round(time.time() - start, 1),
+        "finished_at": datetime.now().isoformat(),
+        "llm_cache": get_default_cache().stats(),
+        "llm": trace["llm"]
+    }
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Run the StratMind pipeline over a set of test cases.")
+    parser.add_argument("--cases", default="evaluation/test_cases_robustness.json",
+                        help="Test-case JSON file (flat list or base_case/variants groups).")
+    parser.add_argument("--output-dir", default=EXPORT_DIR,
+                        help="Directory that receives the exported trees and the manifest.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of cases run in parallel.")
+    parser.add_argument("--manifest", default=None,
+                        help="Completion manifest (default: <output-dir>/batch_manifest.json).")
+    parser.add_argument("--force", action="store_true", help="Re-run cases that already finished.")
+    return parser.parse_args()
 
 def main():
-    #with open("evaluation/test_cases.json", "r", encoding="utf-8") as f:
-    with open("evaluation/test_cases_robustness.json", "r", encoding="utf-8") as f:
-        test_cases = json.load(f)
+    args = parse_args()
+    manifest_path = args.manifest or os.path.join(args.output_dir, "batch_manifest.json")
+    os.makedirs(args.output_dir, exist_ok=True)
+    manifest = load_manifest(manifest_path)
+    test_cases = load_test_cases(args.cases)
 
+    pending = []
     for case in test_cases:
-        print(f"\n🔹 Running test case: {case['id']} - {case['description'][:50]}...")
-        run_test_case(case)
+        finished = manifest.get(case["id"], {}).get("status") == "done" or find_case_exports(args.output_dir, case["id"])
+        if finished and not args.force:
+            print(f"⏭️  Skipping finished case: {case['id']}")
+            continue
+        pending.append(case)
+    workers = max(1, args.workers)
+    print(f"Running {len(pending)} of {len(test_cases)} cases with {workers} workers "
+          f"(governor budget per worker: {governor_budget(workers)})")
+
+    # Each worker process has its own governor, so each gets 1/workers of the budget
+    with ProcessPoolExecutor(max_workers=workers, initializer=share_default_governor, initargs=(workers,)) as pool:
+        futures = {}
+        for case in pending:
+            print(f"\n🔹 Running test case: {case['id']} - {case['description'][:50]}...")
+            futures[pool.submit(run_case_job, case, args.output_dir)] = case
+        for future in as_completed(futures):
+            case = futures[future]
+            try:
+                manifest[case["id"]] = future.result()
+                print(f"✅ {case['id']} finished in {manifest[case['id']]['elapsed_s']}s")
+            except Exception as exc:
+                manifest[case["id"]] = {"status": "failed", "error": repr(exc), "finished_at": datetime.now().isoformat()}
+                print(f"❌ {case['id']} failed: {exc!r}")
+            save_manifest(manifest_path, manifest)
 
 if __name__ == "__main__":
     main()
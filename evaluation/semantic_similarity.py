@@ -0,0 +1,213 @@
+import argparse
+import os
+import re
+import zlib
+
+import numpy as np
+import pandas as pd
+
+from evaluation.analysis_engine import analyze_corpus, find_tree_files, load_task_tree
+
+TOKEN_PATTERN = re.compile(r"\w\w+")
+DEFAULT_FEATURES = 2 ** 12
+REFERENCE_VARIANT = "ORIG"
+SIMILARITY_COLUMNS = ["alignment_mean", "alignment_to_orig", "result_similarity_mean", "result_similarity_to_orig"]
+
+
+def tokenize(text):
+    """
+    Lowercased word unigrams and bigrams (accents and ñ kept, so Spanish inputs work).
+    """
+    words = TOKEN_PATTERN.findall(text.lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def hash_counts(texts, n_features=DEFAULT_FEATURES):
+    """
+    Hash the tokens of each text into a dense (len(texts), n_features) count matrix.
+
+    crc32 is used instead of hash() so buckets are stable across processes and runs.
+    """
+    buckets = {}
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        for token in tokenize(text):
+            col = buckets.get(token)
+            if col is None:
+                col = buckets[token] = zlib.crc32(token.encode("utf-8")) % n_features
+            rows.append(row)
+            cols.append(col)
+    counts = np.zeros((len(texts), n_features), dtype=np.float32)
+    np.add.at(counts, (np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)), 1)
+    return counts
+
+
+def tfidf(counts):
+    """
+    Sublinear TF-IDF weighting with L2-normalized rows; empty rows stay zero.
+    """
+    n_docs = counts.shape[0]
+    df = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + n_docs) / (1 + df)).astype(np.float32) + 1
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    return weights / np.where(norms == 0, 1, norms)
+
+
+def node_text(node):
+    return " ".join(filter(None, [node.get("title"), node.get("description"), node.get("expected_output")]))
+
+
+def tree_documents(tree):
+    """
+    Split an exported tree into per-node texts and one text with all its results.
+
+    Only string results are kept: root/area results are maps of their children's
+    results and would count every leaf twice.
+    """
+    nodes, results = [], []
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        nodes.append(node_text(node))
+        if isinstance(node.get("result"), str):
+            results.append(node["result"])
+        stack.extend(reversed(node.get("subtasks") or []))
+    return nodes, " ".join(results)
+
+
+def alignment_matrix(vectors, tree_index, chunk_size=2048):
+    """
+    Tree alignment scores from L2-normalized node vectors grouped contiguously by tree.
+
+    Each node is matched to its most similar node in every tree (a row-wise max per
+    column block of the cosine matrix); averaging those best matches per tree gives
+    how well tree i is covered by tree j, symmetrized as (B + B.T) / 2. Rows are
+    processed in chunks so memory stays O(chunk_size * n_nodes).
+
+    Args:
+        vectors (np.ndarray): (n_nodes, n_features) normalized node vectors.
+        tree_index (np.ndarray): Tree number of every row, non-decreasing.
+        chunk_size (int): Rows per matrix product.
+
+    Returns:
+        np.ndarray: (n_trees, n_trees) symmetric alignment matrix with ones on the diagonal.
+    """
+    starts = np.flatnonzero(np.r_[True, tree_index[1:] != tree_index[:-1]])
+    sizes = np.diff(np.r_[starts, len(tree_index)])
+    best = np.empty((len(vectors), len(starts)), dtype=np.float32)
+    for lo in range(0, len(vectors), chunk_size):
+        best[lo:lo + chunk_size] = np.maximum.reduceat(vectors[lo:lo + chunk_size] @ vectors.T, starts, axis=1)
+    coverage = np.add.reduceat(best, starts, axis=0) / sizes[:, None]
+    return (coverage + coverage.T) / 2
+
+
+def _off_diagonal_mean(matrix):
+    n = len(matrix)
+    if n < 2:
+        return np.full(n, np.nan)
+    return (matrix.sum(axis=1) - np.diag(matrix)) / (n - 1)
+
+
+def _matrix_rows(case_id, files, variants, name, matrix):
+    n = len(files)
+    return pd.DataFrame({
+        "case_id": case_id,
+        "file_a": np.repeat(files, n),
+        "variant_a": np.repeat(variants, n),
+        "file_b": np.tile(files, n),
+        "variant_b": np.tile(variants, n),
+        "metric": name,
+        "value": matrix.ravel(),
+    })
+
+
+def similarity_tables(trees_dir, n_features=DEFAULT_FEATURES, reference=REFERENCE_VARIANT):
+    """
+    Compute cross-variant similarity for every case under `trees_dir`.
+
+    Per case, `alignment` compares the trees node by node (titles, descriptions and
+    expected outputs) and `result_similarity` is the cosine between the concatenated
+    results of each run. Result vectors for the whole corpus go through one matrix
+    product; node alignment is one chunked product per case.
+
+    Args:
+        trees_dir (str): Directory with exported `*_CASEnn_VARIANT_task_tree.json` files.
+        n_features (int): Hashing dimension.
+        reference (str): Variant the `*_to_orig` columns compare against.
+
+    Returns:
+        tuple: (per-file DataFrame of structural metrics plus SIMILARITY_COLUMNS,
+            long-form matrices DataFrame)
+    """
+    frame = pd.DataFrame(analyze_corpus(trees_dir, recursive=True, cache_path=None))
+    frame = frame.sort_values(["case_id", "path"]).reset_index(drop=True)
+
+    node_texts, result_texts = {}, []
+    for path in frame["path"]:
+        nodes, results = tree_documents(load_task_tree(os.path.join(trees_dir, path)))
+        node_texts[path] = nodes
+        result_texts.append(results)
+
+    result_vectors = tfidf(hash_counts(result_texts, n_features))
+    result_similarity = result_vectors @ result_vectors.T
+
+    for column in SIMILARITY_COLUMNS:
+        frame[column] = np.nan
+    matrices = []
+    for case_id, group in frame.groupby("case_id", sort=True):
+        index = group.index.to_numpy()
+        texts, tree_index = [], []
+        for position, path in enumerate(group["path"]):
+            texts.extend(node_texts[path])
+            tree_index.extend([position] * len(node_texts[path]))
+        alignment = alignment_matrix(tfidf(hash_counts(texts, n_features)), np.asarray(tree_index))
+        results = result_similarity[np.ix_(index, index)]
+
+        frame.loc[index, "alignment_mean"] = _off_diagonal_mean(alignment)
+        frame.loc[index, "result_similarity_mean"] = _off_diagonal_mean(results)
+        references = np.flatnonzero(group["variant"].to_numpy() == reference)
+        if len(references):
+            frame.loc[index, "alignment_to_orig"] = alignment[:, references[0]]
+            frame.loc[index, "result_similarity_to_orig"] = results[:, references[0]]
+
+        files, variants = group["file"].to_numpy(), group["variant"].to_numpy()
+        matrices.append(_matrix_rows(case_id, files, variants, "alignment", alignment))
+        matrices.append(_matrix_rows(case_id, files, variants, "result_similarity", results))
+
+    matrices = pd.concat(matrices, ignore_index=True) if matrices else pd.DataFrame()
+    return frame.drop(columns=["path"]), matrices
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Semantic robustness metrics across input variants.")
+    parser.add_argument("--trees-dir", default="output/robustness")
+    parser.add_argument("--summary", default="evaluation/robustness_analysis_summary.csv",
+                        help="Summary CSV to add the similarity columns to (created if missing).")
+    parser.add_argument("--matrices", default="evaluation/robustness_similarity_matrices.csv",
+                        help="Long-form CSV with the full per-case matrices.")
+    parser.add_argument("--features", type=int, default=DEFAULT_FEATURES, help="Hashing dimension.")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not find_tree_files(args.trees_dir):
+        raise SystemExit(f"No task trees found under {args.trees_dir}")
+    similarity, matrices = similarity_tables(args.trees_dir, args.features)
+
+    if os.path.exists(args.summary):
+        summary = pd.read_csv(args.summary)
+        summary = summary.drop(columns=[c for c in SIMILARITY_COLUMNS if c in summary.columns])
+        summary = summary.merge(similarity[["file"] + SIMILARITY_COLUMNS], on="file", how="left")
+    else:
+        summary = similarity
+    summary.to_csv(args.summary, index=False)
+    matrices.to_csv(args.matrices, index=False)
+
+    print(summary.groupby("case_id")[SIMILARITY_COLUMNS].mean().round(3))
+    print(f"\nUpdated {args.summary} and wrote {args.matrices}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,47 @@
+import os
+from datetime import datetime
 from dotenv import load_dotenv
 # Local modules
-from src.utils.class_task import TaskManager, create_and_link_subtasks
-from src.agents.decomposer_agent import Decomposer
-from src.agents.executor_agent import execute_tasks_postorder
+from src.utils.class_task import create_and_link_subtasks
+from src.utils.task_index import IndexedTaskManager
+from src.executor.context_budget import context_budget_report, enable_context_budget
+from src.executor.batch_executor import BATCH_LEAVES, execute_tasks_batched
 from src.utils.recursive_refiner_parent_subtask import refine_recursively
-from src.agents.specialist_agent import SpecialistAgent, get_other_areas_subtasks
-from src.agents.task_refiner_agent import TaskRefiner
 from src.utils.task_exporter import export_task_tree
-from src.agents.specify_agent import SpecifyAgent
-from src.agents.synthesize_agent import SynthesizeAgent
+from src.utils.compact_export import export_task_tree_compact
+from src.utils.task_checkpoint import TaskCheckpoint, restore_task_tree
+from src.utils.deduplication import DEFAULT_DEDUP_THRESHOLD, deduplicate_subtasks
+from src.utils.concurrency import map_concurrently, DEFAULT_MAX_WORKERS
+from src.utils.tracing import Tracer
+from src.utils.agent_registry import get_default_registry
+from src.utils.task_graph import check_task_graph, iter_tasks
 
 
 load_dotenv()
 
+# Areas planned at once. Concurrently planned areas do not see each other's subtasks,
+# so planning stays sequential unless this is raised.
+PLAN_WORKERS = int(os.getenv("STRATMIND_PLAN_WORKERS", "1"))
+# Other-area subtasks shown to the specialist, most relevant first (0 = all of them)
+SIBLING_TOP_K = int(os.getenv("STRATMIND_SIBLING_TOPK", "15"))
+# Near-duplicate subtasks across areas after refinement: "flag" (default), "merge" or "off"
+DEDUP_MODE = os.getenv("STRATMIND_DEDUP", "flag")
+DEDUP_THRESHOLD = float(os.getenv("STRATMIND_DEDUP_THRESHOLD", str(DEFAULT_DEDUP_THRESHOLD)))
+# Fail the pre-execution graph check on dependencies that point outside the tree (cycles always fail)
+STRICT_GRAPH = os.getenv("STRATMIND_STRICT_GRAPH", "0") == "1"
+# JSONL execution checkpoint of the CLI run; a rerun resumes from it (unset = no checkpoint)
+CHECKPOINT_PATH = os.getenv("STRATMIND_CHECKPOINT")
+# Exported tree format: "json" (export_task_tree) or "compact" (gzip compact file, see compact_export)
+EXPORT_FORMAT = os.getenv("STRATMIND_EXPORT_FORMAT", "json").lower()
+# Where export_task_tree writes its files (and export_tree its compact files)
+EXPORT_DIR = "output"
+
 def create_root_task(task_manager, task_description, expected_output):
     """
     Create the root task for the project.
 
     Args:
-        task_manager (TaskManager): The task manager instance.
+        task_manager (IndexedTaskManager): The task manager instance.
         task_description (str): The clarified task description.
         expected_output (str): The expected output for the root task.
 
@@ -55,7 +78,7 @@ def create_area_tasks(task_manager, root_task, area_divisions):
     Create area tasks under the root task.
 
     Args:
-        task_manager (TaskManager): The task manager instance.
+        task_manager (IndexedTaskManager): The task manager instance.
         root_task (Task): The root task object.
         area_divisions (dict): The area divisions from the decomposer.
     """
@@ -71,73 +94,180 @@ def create_area_tasks(task_manager, root_task, area_divisions):
             execution_type=subtask.get("execution_type", "llm")
         )
 
-def plan_area_subtasks(task_manager, root_task, specialist, task_description):
+def build_area_division(task_manager, area, root_task, all_area_names):
+    """
+    Build the specialist input for one area, including the subtasks already planned in other areas.
+
+    Args:
+        task_manager (IndexedTaskManager): The task manager instance.
+        area (Task): The area task.
+        root_task (Task): The root task object.
+        all_area_names (list): Names of every area of the project.
+
+    Returns:
+        dict: The area division passed to `SpecialistAgent.plan_subtasks`.
+    """
+    # Imported here so importing main (e.g. from back.py) does not load the agent modules
+    from src.agents.specialist_agent import get_other_areas_subtasks
+    other_area_subtasks = get_other_areas_subtasks(task_manager, area, root_task)
+    return {
+        "area": area.area,
+        "description": area.description,
+        "expected_output": area.expected_output,
+        "responsibilities": getattr(area, "responsibilities", []),
+        "other_area_subtasks": select_relevant_subtasks(task_manager, area, other_area_subtasks),
+        "all_area_names": all_area_names
+    }
+
+def select_relevant_subtasks(task_manager, area, other_area_subtasks, k=SIBLING_TOP_K):
+    """
+    Keep only the `k` other-area subtasks most relevant to an area, so the specialist
+    prompt stops growing with the whole tree.
+
+    Relevance comes from the task manager's similarity index, queried with the area's
+    name, description and responsibilities; entries are matched on their title.
+
+    Args:
+        task_manager (IndexedTaskManager): The task manager instance.
+        area (Task): The area being planned.
+        other_area_subtasks (list): Output of `get_other_areas_subtasks`: one dict per
+            subtask of the other areas, each with at least a "title".
+        k (int): Subtasks to keep; 0 keeps them all.
+
+    Returns:
+        list: The kept entries, in their original order.
+    """
+    if not k:
+        return other_area_subtasks
+    query = " ".join([area.area or "", area.description or ""] + list(getattr(area, "responsibilities", None) or []))
+    relevant = {task.title for task, _ in task_manager.similar_tasks(query, k * 2, exclude_area=area.area)
+                if task.parent is not None and task.parent.parent is not None}
+    return [entry for entry in other_area_subtasks if entry["title"] in relevant][:k]
+
+def link_area_subtasks(task_manager, area_index, subtasks_by_area, on_event=None):
+    """
+    Create the planned subtasks under their area tasks and resolve dependencies.
+
+    Args:
+        task_manager (IndexedTaskManager): The task manager instance.
+        area_index (dict): Area name -> area task.
+        subtasks_by_area (list): Output of `SpecialistAgent.plan_subtasks`.
+        on_event (callable): Called with an `area_planned` event for each linked area.
+    """
+    for area_data in subtasks_by_area:
+        area_name = area_data["area"]
+        subtasks = area_data["subtasks"]
+        print(f"  - Area: {area_name}, {len(subtasks)} subtasks")
+        area_task = area_index.get(area_name)
+        if not area_task:
+            print(f"!! Area task not found for {area_name}")
+            continue
+        create_and_link_subtasks(subtasks, area_name, area_task, task_manager)
+        if on_event:
+            on_event({
+                "event": "area_planned",
+                "task_id": area_task.task_id,
+                "area": area_name,
+                "subtasks": [t.to_dict() for t in area_task.subtasks]
+            })
+
+def plan_area_subtasks(task_manager, root_task, specialist, task_description, max_workers=PLAN_WORKERS, on_event=None):
     """
     Generate concrete subtasks for each area and resolve dependencies.
 
+    By default areas are planned one after another, and every area sees the subtasks
+    the previous ones planned (`other_area_subtasks`). With `max_workers` > 1 the
+    specialist plans the areas concurrently instead; no area is linked before all are
+    planned, so every area gets an empty `other_area_subtasks` and cannot reuse or
+    depend on the others' subtasks. Use it only when that trade-off is acceptable.
+
     Args:
-        task_manager (TaskManager): The task manager instance.
+        task_manager (IndexedTaskManager): The task manager instance.
         root_task (Task): The root task object.
         specialist (SpecialistAgent): The specialist agent.
         task_description (str): The clarified task description.
+        max_workers (int): Maximum number of areas planned at once.
+        on_event (callable): Called with an `area_planned` event as each area is linked.
     """
-    areas = [t for t in task_manager.tasks.values() if t.parent == root_task]
+    areas = task_manager.area_tasks(root_task)
     all_area_names = [area.area for area in areas]
-    for area in areas:
-        other_area_subtasks = get_other_areas_subtasks(task_manager, area, root_task)
-        area_division = {
-            "area": area.area,
-            "description": area.description,
-            "expected_output": area.expected_output,
-            "responsibilities": getattr(area, "responsibilities", []),
-            "other_area_subtasks": other_area_subtasks,
-            "all_area_names": all_area_names
-        }
-        subtasks_by_area = specialist.plan_subtasks({"subtasks": [area_division]}, task_description)
-        print("Creating concrete subtasks and resolving dependencies...")
-        for area_data in subtasks_by_area:
-            area_name = area_data["area"]
-            subtasks = area_data["subtasks"]
-            print(f"  - Area: {area_name}, {len(subtasks)} subtasks")
-            area_task = next(
-                (t for t in task_manager.tasks.values()
-                if t.area == area_name and t.parent == root_task),
-                None
-            )
-            if not area_task:
-                print(f"!! Area task not found for {area_name}")
-                continue
-            create_and_link_subtasks(subtasks, area_name, area_task, task_manager)
-
-def refine_all_subtasks(task_manager, root_task, task_refiner, task_description, max_depth=2):
+    area_index = {area.area: area for area in areas}
+
+    def plan(area_division):
+        return specialist.plan_subtasks({"subtasks": [area_division]}, task_description)
+
+    if max_workers is None or max_workers <= 1:
+        for area in areas:
+            area_division = build_area_division(task_manager, area, root_task, all_area_names)
+            subtasks_by_area = plan(area_division)
+            print("Creating concrete subtasks and resolving dependencies...")
+            link_area_subtasks(task_manager, area_index, subtasks_by_area, on_event)
+        return
+
+    area_divisions = [
+        build_area_division(task_manager, area, root_task, all_area_names) for area in areas
+    ]
+    planned = map_concurrently(plan, area_divisions, max_workers=max_workers)
+    print("Creating concrete subtasks and resolving dependencies...")
+    for subtasks_by_area in planned:
+        link_area_subtasks(task_manager, area_index, subtasks_by_area, on_event)
+
+def refine_all_subtasks(task_manager, root_task, task_refiner, task_description, max_depth=2, max_workers=DEFAULT_MAX_WORKERS, on_event=None):
     """
     Recursively refine ALL subtasks of each area, including all levels.
 
+    Refinement runs breadth-first: every subtask at the same depth, across all areas,
+    is sent to the refiner concurrently, then the children created by that wave are
+    refined at the next depth. Each subtask is refined exactly once, with the same
+    depth it would get in a depth-first walk.
+
     Args:
-        task_manager (TaskManager): The task manager instance.
+        task_manager (IndexedTaskManager): The task manager instance.
         root_task (Task): The root task object.
         task_refiner (TaskRefiner): The task refiner agent.
         task_description (str): The clarified task description.
         max_depth (int): Maximum recursion depth for refinement.
+        max_workers (int): Maximum number of subtasks refined at once.
+        on_event (callable): Called with a `subtask_refined` event after each refinement.
+            Called from worker threads.
     """
-    for area_task in [t for t in task_manager.tasks.values() if t.parent == root_task]:
-        area_name = area_task.area
-        print(f"  Refining area: {area_name}")
-        def refine_subtree(task, depth=0):
-            print(f"    Refining subtask: {task.title}")
-            refine_recursively(
-                subtask=task,
-                area_name=area_name,
-                global_task=task_description,
-                refiner=task_refiner,
-                task_manager=task_manager,
-                depth=depth,
-                max_depth=max_depth
-            )
-            for child in task.subtasks:
-                refine_subtree(child, depth=depth+1)
-        for subtask_task in area_task.subtasks:
-            refine_subtree(subtask_task, depth=0)
+    wave = [
+        (area_task.area, subtask)
+        for area_task in task_manager.area_tasks(root_task)
+        for subtask in task_manager.children(area_task)
+    ]
+    depth = 0
+
+    def refine(item):
+        area_name, task = item
+        print(f"    Refining subtask: {task.title}")
+        refine_recursively(
+            subtask=task,
+            area_name=area_name,
+            global_task=task_description,
+            refiner=task_refiner,
+            task_manager=task_manager,
+            depth=depth,
+            max_depth=max_depth
+        )
+        if on_event:
+            on_event({
+                "event": "subtask_refined",
+                "task_id": task.task_id,
+                "title": task.title,
+                "area": area_name,
+                "depth": depth,
+                "subtasks": [child.to_dict() for child in task.subtasks]
+            })
+
+    while wave:
+        print(f"  Refining {len(wave)} subtasks at depth {depth}")
+        map_concurrently(refine, wave, max_workers=max_workers)
+        wave = [(area_name, child) for area_name, task in wave for child in task_manager.children(task)]
+        depth += 1
+
+    if DEDUP_MODE != "off":
+        deduplicate_subtasks(task_manager, root_task, DEDUP_MODE, DEDUP_THRESHOLD, on_event)
 
 def print_task_tree(task, level=0):
     """
@@ -151,21 +281,50 @@ def print_task_tree(task, level=0):
     for sub in getattr(task, "subtasks", []):
         print_task_tree(sub, level + 1)
 
-def main():
+def export_tree(root_task, task_manager, out_name, metadata=None):
     """
-    Main entry point for the CLI workflow.
-    Guides the user through clarification, synthesis, decomposition,
-    subtask planning, refinement, execution, and export.
+    Export the task tree in the STRATMIND_EXPORT_FORMAT format.
+
+    "compact" writes `<EXPORT_DIR>/<timestamp>_<out_name>.compact.json.gz`, which
+    `compact_export.load_compact` expands back to the export_task_tree shape.
+
+    Args:
+        root_task (Task): The root task.
+        task_manager (IndexedTaskManager): The task manager instance.
+        out_name (str): Base name of the exported file.
+        metadata (dict): Stored as `_metadata` on the root.
     """
-    print("Starting main()")
+    if EXPORT_FORMAT == "compact":
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        out_path = os.path.join(EXPORT_DIR, f"{datetime.now():%Y%m%d_%H%M%S}_{out_name}.compact.json.gz")
+        export_task_tree_compact(root_task, out_path, metadata)
+        print(f"Exported {out_path}")
+    elif EXPORT_FORMAT == "json":
+        export_task_tree(root_task, task_manager, out_name=out_name, metadata=metadata)
+    else:
+        raise ValueError(f"Unknown export format: {EXPORT_FORMAT}")
 
+def plan_project(task_manager, agents, tracer):
+    """
+    Clarify, synthesize, decompose, plan and refine the project interactively.
+
+    Args:
+        task_manager (IndexedTaskManager): The task manager instance.
+        agents (AgentRegistry): Provides the agents.
+        tracer (Tracer): Records the stages.
+
+    Returns:
+        Task: The root task of the planned tree.
+    """
     # Step 1: Interactive clarification
-    specify_agent = SpecifyAgent()
-    history = specify_agent.interactive_specification()
+    specify_agent = agents.get("specify", tracer)
+    with tracer.span("specify"):
+        history = specify_agent.interactive_specification()
 
     # Step 2: Synthesize clarified task and expected output
-    synthesize_agent = SynthesizeAgent()
-    spec = synthesize_agent.synthesize(history)
+    synthesize_agent = agents.get("synthesize", tracer)
+    with tracer.span("synthesize"):
+        spec = synthesize_agent.synthesize(history)
     task_description = spec["description"]
     expected_output = spec["expected_output"]
 
@@ -173,38 +332,89 @@ def main():
     print("Task:", task_description)
     print("Expected Output:", expected_output)
 
-    task_manager = TaskManager()
-
     print("Creating root task...")
     root_task = create_root_task(task_manager, task_description, expected_output)
 
     print("Decomposing into functional areas...")
-    decomposer = Decomposer()
-    area_divisions = decompose_into_areas(root_task, decomposer)
+    decomposer = agents.get("decomposer", tracer)
+    with tracer.span("decompose"):
+        area_divisions = decompose_into_areas(root_task, decomposer)
 
     print("Creating area tasks...")
     create_area_tasks(task_manager, root_task, area_divisions)
 
     print("Preparing areas for SpecialistAgent...")
-    specialist = SpecialistAgent()
-    plan_area_subtasks(task_manager, root_task, specialist, task_description)
+    specialist = agents.get("specialist", tracer)
+    with tracer.span("plan"):
+        plan_area_subtasks(task_manager, root_task, specialist, task_description)
 
     print("Starting recursive refinement...")
-    task_refiner = TaskRefiner()
-    refine_all_subtasks(task_manager, root_task, task_refiner, task_description)
+    task_refiner = agents.get("refiner", tracer)
+    with tracer.span("refine"):
+        refine_all_subtasks(task_manager, root_task, task_refiner, task_description)
+    return root_task
+
+def main():
+    """
+    Main entry point for the CLI workflow.
+    Guides the user through clarification, synthesis, decomposition,
+    subtask planning, refinement, execution, and export.
+
+    With STRATMIND_CHECKPOINT set, the planned tree and every finished task are appended
+    to that JSONL checkpoint; a rerun after a crash skips planning and only executes the
+    tasks that have no result yet.
+    """
+    print("Starting main()")
+    tracer = Tracer()
+    agents = get_default_registry()
+    task_manager = IndexedTaskManager()
+    checkpoint = TaskCheckpoint(CHECKPOINT_PATH) if CHECKPOINT_PATH else None
+    planned_tree = checkpoint.load()[0] if checkpoint else None
+
+    if planned_tree is not None:
+        print(f"Resuming from checkpoint {CHECKPOINT_PATH}...")
+        root_task = restore_task_tree(planned_tree, task_manager)
+    else:
+        root_task = plan_project(task_manager, agents, tracer)
+        if checkpoint:
+            checkpoint.write_tree(root_task)
+    task_description, expected_output = root_task.description, root_task.expected_output
+
+    print("Checking the dependency graph...")
+    check_task_graph(root_task, strict=STRICT_GRAPH)
 
     print("Executing all tasks with LLM or simulation as needed...")
-    execute_tasks_postorder(root_task)
-
-    export_task_tree(
-        root_task,
-        task_manager,
-        out_name="task_tree",
-        metadata={
-            "clarified_description": task_description,
-            "expected_output": expected_output
-        }
-    )
+    done = checkpoint.restore(root_task) if checkpoint else set()
+    executor = enable_context_budget(agents.get("executor", tracer))
+    batch_executor = agents.get("batch_executor", tracer) if BATCH_LEAVES > 1 else None
+    with tracer.span("execute"):
+        execute_tasks_batched(
+            root_task, batch_executor, executor=executor,
+            on_event=tracer.wrap_events(checkpoint.on_event if checkpoint else None),
+            skip_fn=lambda unit: all(task.task_id in done for task in iter_tasks(unit))
+        )
+
+    # The exported trace is taken as the export starts; the one printed below also covers the export
+    with tracer.span("export"):
+        export_tree(
+            root_task,
+            task_manager,
+            out_name="task_tree",
+            metadata={
+                "clarified_description": task_description,
+                "expected_output": expected_output,
+                "trace": tracer.summary(),
+                "context_budget": context_budget_report(executor)
+            }
+        )
+
+    if checkpoint:
+        os.remove(checkpoint.path)
+
+    trace = tracer.summary()
+    print("\nStage timings:", ", ".join(f"{name} {stage['duration_s']:.1f}s" for name, stage in trace["stages"].items()))
+    print(f"LLM: {trace['llm']['calls']} calls, {trace['llm']['prompt_tokens']} prompt + "
+          f"{trace['llm']['completion_tokens']} completion tokens, ${trace['llm']['cost_usd']:.4f}")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
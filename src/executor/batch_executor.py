@@ -0,0 +1,207 @@
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from collections import defaultdict
+
+from src.executor.context_budget import estimate_tokens
+from src.executor.task_executor import SYSTEM_PROMPT
+from src.executor.task_scheduler import (
+    DEFAULT_MAX_WORKERS, execute_tasks_parallel, is_aggregate_task, prompt_tokens, task_event
+)
+from src.utils.concurrency import map_concurrently
+from src.utils.fake_llm import default_client
+from src.utils.task_graph import dependency_ids
+
+DEFAULT_BATCH_SIZE = 8
+# Independent same-area leaves sent per request (0 or 1 = one request per task)
+BATCH_LEAVES = int(os.getenv("STRATMIND_BATCH_LEAVES", "0"))
+INSTRUCTION = (
+    "You are responsible for completing each of the tasks above as part of the overall project.\n"
+    "The tasks are independent: answer each one completely, as if it were the only one assigned to you.\n"
+    "Present every answer as your own expert recommendation or decision, with no introductory statements.\n"
+    "If a task requires an external system or manual intervention, specify this clearly in its answer.\n"
+    "Respond ONLY with a JSON object whose keys are the task labels (T1, T2, ...) and whose values "
+    "are the answers, as plain text."
+)
+FENCE = re.compile(r"^```(?:json)?\s*|\s*```$")
+
+
+def batchable_leaves(root_task):
+    """
+    Find the leaves that can share a request: childless `llm` tasks right below an
+    area, with no dependencies and no result yet.
+
+    Returns:
+        dict: Area name -> list of tasks, in tree order.
+    """
+    by_area = defaultdict(list)
+    stack = [(root_task, 0)]
+    while stack:
+        task, depth = stack.pop()
+        if is_aggregate_task(task, depth):
+            stack.extend((child, depth + 1) for child in reversed(task.subtasks))
+        elif (depth == 2 and not task.subtasks and getattr(task, "execution_type", "llm") == "llm"
+              and not dependency_ids(task) and getattr(task, "result", None) is None):
+            by_area[task.area].append(task)
+    return by_area
+
+
+def batch_sections(root_task, area_task, tasks):
+    """
+    Split the batch prompt of several leaves of the same area into its parts.
+
+    Returns:
+        tuple: (header, blocks, footer) where `header` holds the PROJECT and AREA sections,
+            `blocks` the task blocks labelled T1..Tn and `footer` the INSTRUCTION section.
+    """
+    header = (
+        f"=== PROJECT ===\nTitle: {root_task.title}\n\n\n"
+        f"=== AREA ===\nTitle: {area_task.title}\nDescription: {area_task.description}\n\n\n"
+        "=== TASKS ===\n"
+    )
+    blocks = [
+        f"[T{i}]\nTitle: {task.title}\nDescription: {task.description}\nExpected Output: {task.expected_output}\n"
+        for i, task in enumerate(tasks, 1)
+    ]
+    return header, blocks, f"\n\n=== INSTRUCTION ===\n{INSTRUCTION}"
+
+
+def parse_batch_answer(content, count):
+    """
+    Parse a batch answer into {index: answer} for the labels T1..T{count} it answers.
+
+    Labels that are missing or empty are left out, and so are run with single calls.
+    """
+    try:
+        data = json.loads(FENCE.sub("", (content or "").strip()))
+    except json.JSONDecodeError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+    answers = {}
+    for i in range(1, count + 1):
+        value = data.get(f"T{i}")
+        if isinstance(value, (list, dict)):
+            value = json.dumps(value, ensure_ascii=False, indent=2)
+        if isinstance(value, str) and value.strip():
+            answers[i - 1] = value.strip()
+    return answers
+
+
+class BatchLeafExecutor:
+    """
+    Executes independent same-area leaves several per request.
+
+    Each batch is one structured request sharing the PROJECT/AREA header; the JSON
+    answer is split back into each leaf's `result`. Leaves whose answer is missing or
+    unparsable are left for the regular executor, so a bad batch costs one extra call
+    and never loses a task.
+
+    Each answered leaf records its own part of the request as `task.prompt`: the shared
+    header and instruction around its own task block, plus a `batch` entry with the
+    batch id, its label index and the batch size. Its `prompt_tokens` are its own block
+    plus an even share of the system prompt, header and instruction, so the leaves of a
+    batch add up to the tokens actually sent.
+
+    Args:
+        client: OpenAI-style client. Defaults to the configured backend (see `default_client`).
+        model (str): Model used for batch requests (STRATMIND_EXECUTOR_MODEL, default gpt-4o-mini).
+        batch_size (int): Maximum leaves per request. Defaults to STRATMIND_BATCH_LEAVES when
+            it is above 1, else DEFAULT_BATCH_SIZE.
+        max_workers (int): Batches sent at once.
+    """
+
+    def __init__(self, client=None, model=None, batch_size=None, max_workers=DEFAULT_MAX_WORKERS):
+        self.client = client if client is not None else default_client()
+        self.model = model or os.getenv("STRATMIND_EXECUTOR_MODEL", "gpt-4o-mini")
+        self.batch_size = batch_size or (BATCH_LEAVES if BATCH_LEAVES > 1 else DEFAULT_BATCH_SIZE)
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.counters = {"requests": 0, "batched_tasks": 0, "fallback_tasks": 0}
+
+    def run_batch(self, root_task, area_task, tasks, emit):
+        header, blocks, footer = batch_sections(root_task, area_task, tasks)
+        user = header + "\n".join(blocks) + footer
+        for task in tasks:
+            emit(task_event("task_started", task))
+        start = time.perf_counter()
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "system", "content": SYSTEM_PROMPT}, {"role": "user", "content": user}],
+                response_format={"type": "json_object"}
+            )
+            answers = parse_batch_answer(response.choices[0].message.content, len(tasks))
+        except Exception as exc:
+            print(f"!! Batch request failed for area {area_task.title}: {exc!r}")
+            answers = {}
+        elapsed = round(time.perf_counter() - start, 3)
+        batch_id = uuid.uuid4().hex[:12]
+        shared = prompt_tokens({"system": SYSTEM_PROMPT, "header": header, "footer": footer})
+        done = []
+        for index, task in enumerate(tasks):
+            if index not in answers:
+                continue
+            task.result = answers[index]
+            task.prompt = {"system": SYSTEM_PROMPT, "user": header + blocks[index] + footer,
+                           "batch": {"id": batch_id, "index": index + 1, "size": len(tasks)}}
+            tokens = estimate_tokens(blocks[index]) + shared // len(tasks) + (index < shared % len(tasks))
+            done.append(task)
+            emit(task_event("task_finished", task, result=task.result, prompt=task.prompt,
+                            prompt_tokens=tokens, batch_size=len(tasks), elapsed_s=elapsed))
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["batched_tasks"] += len(done)
+            self.counters["fallback_tasks"] += len(tasks) - len(done)
+        return done
+
+    def execute(self, root_task, on_event=None):
+        """
+        Run every batchable leaf of the tree in batches.
+
+        Returns:
+            set: Ids of the leaves that got their result from a batch.
+        """
+        emit = on_event or (lambda event: None)
+        areas = {area.area: area for area in root_task.subtasks}
+        batches = []
+        for area_name, leaves in batchable_leaves(root_task).items():
+            for start in range(0, len(leaves), self.batch_size):
+                chunk = leaves[start:start + self.batch_size]
+                if len(chunk) > 1:
+                    batches.append((areas.get(area_name, chunk[0].parent), chunk))
+        results = map_concurrently(
+            lambda batch: self.run_batch(root_task, batch[0], batch[1], emit), batches, max_workers=self.max_workers
+        )
+        batched = {task.task_id for done in results for task in done}
+        print(f"Batched {len(batched)} leaves in {len(batches)} requests "
+              f"({sum(len(chunk) for _, chunk in batches) - len(batched)} left for single calls)")
+        return batched
+
+
+def execute_tasks_batched(root_task, batch_executor=None, max_workers=DEFAULT_MAX_WORKERS, on_event=None, skip_fn=None,
+                          execute_task=None, executor=None):
+    """
+    Execute a task tree, packing independent same-area leaves into batch requests first.
+
+    The remaining units, including every leaf a batch did not answer, then run through
+    `execute_tasks_parallel` as usual.
+
+    Args:
+        root_task (Task): The root task of the tree.
+        batch_executor (BatchLeafExecutor): Runs the batches. None runs every task through
+            `execute_tasks_parallel`.
+        max_workers, on_event, skip_fn, execute_task, executor: As in `execute_tasks_parallel`.
+    """
+    batched = batch_executor.execute(root_task, on_event=on_event) if batch_executor is not None else set()
+    execute_tasks_parallel(
+        root_task,
+        max_workers=max_workers,
+        execute_task=execute_task,
+        executor=executor,
+        on_event=on_event,
+        skip_fn=lambda unit: unit.task_id in batched or (skip_fn is not None and skip_fn(unit))
+    )
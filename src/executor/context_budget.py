@@ -0,0 +1,257 @@
+import hashlib
+import math
+import os
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+    _ENCODING = tiktoken.get_encoding("cl100k_base")
+except ImportError:  # without tiktoken, ~4 characters per token is close enough for budgeting
+    _ENCODING = None
+
+DEFAULT_MAX_TOKENS = int(os.getenv("STRATMIND_PROMPT_TOKENS", "2000"))
+DEFAULT_ITEM_TOKENS = 300
+SECTION_SPLIT = re.compile(r"(?=^=== [A-Z ]+ ===$)", re.M)
+DEPENDENCY_SPLIT = re.compile(r"(?=^- Dependency: )", re.M)
+WORD = re.compile(r"\w\w+")
+ELLIPSIS = " [...]"
+
+
+def estimate_tokens(text):
+    """
+    Count the tokens of a text (exact with tiktoken installed, estimated otherwise).
+    """
+    if not text:
+        return 0
+    if _ENCODING is not None:
+        return len(_ENCODING.encode(text))
+    return math.ceil(len(text) / 4)
+
+
+def summarize_text(text, max_tokens):
+    """
+    Extractive summary: the leading lines of `text` that fit in `max_tokens`.
+
+    A first line longer than the budget is cut at a word boundary. Summaries end
+    with " [...]" so the model knows the result was shortened.
+    """
+    kept, used = [], estimate_tokens(ELLIPSIS)
+    for line in text.splitlines():
+        cost = estimate_tokens(line) + 1
+        if used + cost > max_tokens:
+            if not kept:
+                kept.append(line[:max(0, (max_tokens - used) * 4)].rsplit(" ", 1)[0])
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept).rstrip() + ELLIPSIS
+
+
+class SummaryCache:
+    """
+    Thread-safe LRU of result summaries keyed on (text digest, token budget).
+
+    A result is summarized once and the summary is reused by every task that
+    depends on it.
+    """
+
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0}
+
+    def get_or_create(self, text, max_tokens, summarize_fn):
+        key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), max_tokens)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return self._entries[key]
+            self.counters["misses"] += 1
+        summary = summarize_fn(text, max_tokens)
+        with self._lock:
+            self._entries[key] = summary
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return summary
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return dict(self.counters, size=len(self._entries),
+                        hit_rate=self.counters["hits"] / lookups if lookups else 0.0)
+
+
+def relevance(query_words, text):
+    """
+    Cosine overlap between the word set of the current task and a context item.
+    """
+    words = set(WORD.findall(text.lower()))
+    if not words or not query_words:
+        return 0.0
+    return len(words & query_words) / math.sqrt(len(words) * len(query_words))
+
+
+def _section_name(section):
+    return section.split("\n", 1)[0].strip("= \n")
+
+
+def _split_dependency(item):
+    head, sep, result = item.partition("\n  Result: ")
+    return (head + sep, result) if sep else (item, "")
+
+
+class ContextAssembler:
+    """
+    Fits executor prompts into a token budget.
+
+    The fixed sections (PROJECT, AREA, CURRENT TASK, INSTRUCTION) are kept as they
+    are. DEPENDENCY RESULTS are ranked by relevance to the current task and added
+    whole while they fit; the rest are replaced by cached summaries, and dropped
+    once even a summary no longer fits. SUBTASK RESULTS are kept in order and
+    summarized as one block when they exceed what is left. Every rewrite is
+    recorded in `usage`, one entry per prompt.
+
+    Args:
+        max_tokens (int): Budget of the whole user prompt.
+        item_tokens (int): Size of the summary of one dependency result.
+        summarize_fn (callable): (text, max_tokens) -> summary. Defaults to an
+            extractive summary; an LLM summarizer can be plugged in.
+        cache (SummaryCache): Summary cache, shared between assemblers if given.
+    """
+
+    def __init__(self, max_tokens=DEFAULT_MAX_TOKENS, item_tokens=DEFAULT_ITEM_TOKENS,
+                 summarize_fn=summarize_text, cache=None):
+        self.max_tokens = max_tokens
+        self.item_tokens = item_tokens
+        self.summarize_fn = summarize_fn
+        self.cache = cache or SummaryCache()
+        self.usage = []
+        self._lock = threading.Lock()
+
+    def summarize(self, text, max_tokens):
+        if estimate_tokens(text) <= max_tokens:
+            return text
+        return self.cache.get_or_create(text, max_tokens, self.summarize_fn)
+
+    def _fit_dependencies(self, body, query_words, budget, counts):
+        items = [item for item in DEPENDENCY_SPLIT.split(body) if item.strip()]
+        ranked = sorted(range(len(items)), key=lambda i: -relevance(query_words, items[i]))
+        kept = {}
+        for index in ranked:
+            item = items[index].rstrip() + "\n"
+            cost = estimate_tokens(item)
+            if cost <= budget:
+                kept[index] = item
+                budget -= cost
+                continue
+            head, result = _split_dependency(item)
+            room = min(self.item_tokens, budget - estimate_tokens(head) - 1)
+            if result and room > estimate_tokens(ELLIPSIS) + 8:
+                kept[index] = head + self.summarize(result.rstrip(), room) + "\n"
+                budget -= estimate_tokens(kept[index])
+                counts["summarized"] += 1
+            else:
+                counts["dropped"] += 1
+        return "".join(kept[i] for i in sorted(kept)), budget
+
+    def fit(self, user_prompt, task=None):
+        """
+        Rewrite one executor user prompt so it fits the budget.
+
+        Args:
+            user_prompt (str): The prompt built by the executor ("=== SECTION ===" blocks).
+            task (str): Label recorded in `usage`. Defaults to the CURRENT TASK title.
+
+        Returns:
+            str: The prompt, unchanged when it already fits.
+        """
+        before = estimate_tokens(user_prompt)
+        sections = SECTION_SPLIT.split(user_prompt)
+        names = [_section_name(section) for section in sections]
+        current = next((s for s, n in zip(sections, names) if n == "CURRENT TASK"), "")
+        if task is None:
+            match = re.search(r"^Title: (.*)$", current, re.M)
+            task = match.group(1) if match else None
+        counts = {"summarized": 0, "dropped": 0}
+
+        if before > self.max_tokens:
+            variable = ("DEPENDENCY RESULTS", "SUBTASK RESULTS")
+            budget = self.max_tokens - sum(estimate_tokens(s) for s, n in zip(sections, names) if n not in variable)
+            query_words = set(WORD.findall(current.lower()))
+            for i, name in enumerate(names):
+                if name not in variable:
+                    continue
+                header, _, body = sections[i].partition("\n")
+                budget -= estimate_tokens(header) + 1
+                if name == "DEPENDENCY RESULTS":
+                    body, budget = self._fit_dependencies(body, query_words, max(budget, 0), counts)
+                elif estimate_tokens(body) > budget:
+                    body = self.summarize(body.rstrip(), max(budget - 2, 0)) + "\n\n"
+                    counts["summarized"] += 1
+                    budget = 0
+                else:
+                    budget -= estimate_tokens(body)
+                sections[i] = header + "\n" + body + "\n"
+            user_prompt = "".join(sections)
+
+        with self._lock:
+            self.usage.append(dict(task=task, tokens_before=before,
+                                   tokens_after=estimate_tokens(user_prompt), **counts))
+        return user_prompt
+
+    def report(self):
+        """
+        Summarize prompt sizes over every prompt seen so far.
+
+        Returns:
+            dict: Prompt count, mean/max tokens before and after fitting, how many
+                results were summarized or dropped, and the summary cache stats.
+        """
+        with self._lock:
+            usage = list(self.usage)
+        if not usage:
+            return {"prompts": 0, "summary_cache": self.cache.stats()}
+        return {
+            "prompts": len(usage),
+            "mean_tokens_before": sum(u["tokens_before"] for u in usage) / len(usage),
+            "mean_tokens_after": sum(u["tokens_after"] for u in usage) / len(usage),
+            "max_tokens_before": max(u["tokens_before"] for u in usage),
+            "max_tokens_after": max(u["tokens_after"] for u in usage),
+            "summarized": sum(u["summarized"] for u in usage),
+            "dropped": sum(u["dropped"] for u in usage),
+            "summary_cache": self.cache.stats(),
+        }
+
+
+def enable_context_budget(agent, assembler=None):
+    """
+    Bound the prompts an executor sends to the model.
+
+    The assembler is applied where the executor builds its prompts, so the prompt
+    recorded on each task is the one that was sent. With STRATMIND_PROMPT_TOKENS=0
+    and no explicit assembler, prompts are left as they are.
+
+    Args:
+        agent (TaskExecutor): The executor.
+        assembler (ContextAssembler): Defaults to a new assembler with the
+            STRATMIND_PROMPT_TOKENS budget.
+
+    Returns:
+        The same agent; the assembler is available as `agent.context_assembler`.
+    """
+    if assembler is None and DEFAULT_MAX_TOKENS > 0:
+        assembler = ContextAssembler()
+    agent.context_assembler = assembler
+    return agent
+
+
+def context_budget_report(agent):
+    """
+    `ContextAssembler.report()` of an executor, or None when its prompts are not budgeted.
+    """
+    assembler = getattr(agent, "context_assembler", None)
+    return assembler.report() if assembler is not None else None
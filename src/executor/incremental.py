@@ -0,0 +1,139 @@
+import hashlib
+import json
+
+from src.executor.task_scheduler import execute_tasks_parallel
+from src.utils.task_graph import dependency_ids, iter_tasks
+
+# Fields of a task that go into its executor prompt
+FINGERPRINT_FIELDS = ("title", "description", "expected_output", "area", "execution_type", "responsibilities")
+
+
+def own_fingerprint(task):
+    """
+    Hash of a task's own prompt fields.
+    """
+    fields = {name: getattr(task, name, None) for name in FINGERPRINT_FIELDS}
+    payload = json.dumps(fields, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def compute_fingerprints(root_task):
+    """
+    Merkle fingerprint of every task's inputs.
+
+    A task's fingerprint hashes its own fields with the fingerprints of its subtasks
+    and of its dependencies, so an edit changes the fingerprint of the edited task,
+    of every task that transitively depends on it and of all their ancestors, and of
+    nothing else. Dependencies on a task's own ancestors would close a loop; such a
+    back edge contributes the ancestor's own fields only.
+
+    Args:
+        root_task (Task): The root task of the tree.
+
+    Returns:
+        dict: task_id -> hex digest.
+    """
+    tasks = {task.task_id: task for task in iter_tasks(root_task)}
+    own = {task_id: own_fingerprint(task) for task_id, task in tasks.items()}
+    fingerprints = {}
+    visiting = set()
+    for start_id in tasks:
+        if start_id in fingerprints:
+            continue
+        stack = [(start_id, False)]
+        while stack:
+            task_id, expanded = stack.pop()
+            if task_id in fingerprints:
+                continue
+            task = tasks[task_id]
+            inputs = [child.task_id for child in task.subtasks] + [
+                dep_id for dep_id in dependency_ids(task) if dep_id in tasks
+            ]
+            if not expanded:
+                visiting.add(task_id)
+                stack.append((task_id, True))
+                stack.extend((input_id, False) for input_id in reversed(inputs)
+                             if input_id not in fingerprints and input_id not in visiting)
+                continue
+            digest = hashlib.sha256(own[task_id].encode("ascii"))
+            for input_id in inputs:
+                digest.update(fingerprints.get(input_id, own[input_id]).encode("ascii"))
+            fingerprints[task_id] = digest.hexdigest()
+            visiting.discard(task_id)
+    return fingerprints
+
+
+class IncrementalExecution:
+    """
+    Remembers the input fingerprint each task had when its result was produced, so a
+    re-execution only reruns the tasks whose inputs changed since.
+
+    Keep one instance per tree (e.g. in the session) and call `execute` instead of
+    `execute_tasks_parallel`. Fingerprints are recorded from the task_finished events,
+    so tasks of a failed unit stay dirty and run again next time.
+
+    Args:
+        fingerprints (dict): task_id -> fingerprint of the last successful execution,
+            e.g. from the `_metadata` of an exported tree.
+    """
+
+    def __init__(self, fingerprints=None):
+        self.fingerprints = dict(fingerprints or {})
+        self._current = {}
+
+    @classmethod
+    def from_export(cls, tree):
+        """
+        Build the state recorded in an exported tree's `_metadata["fingerprints"]`.
+        """
+        return cls((tree.get("_metadata") or {}).get("fingerprints"))
+
+    def dirty_tasks(self, root_task):
+        """
+        Return the ids of the tasks that need to run: no result yet, or inputs changed.
+        """
+        self._current = compute_fingerprints(root_task)
+        return {
+            task.task_id for task in iter_tasks(root_task)
+            if task.result is None or self.fingerprints.get(task.task_id) != self._current[task.task_id]
+        }
+
+    def on_event(self, event):
+        """
+        Pipeline `on_event` callback: stores the fingerprint of every finished task.
+        """
+        if event.get("event") == "task_finished" and event["task_id"] in self._current:
+            self.fingerprints[event["task_id"]] = self._current[event["task_id"]]
+
+    def execute(self, root_task, on_event=None, skip_fn=None, execute=execute_tasks_parallel, **kwargs):
+        """
+        Execute the units that contain a dirty task; the others keep their results.
+
+        Dirty units run whole, since skipping is decided per unit. Area and root
+        results are re-aggregated as usual.
+
+        Args:
+            root_task (Task): The root task of the tree.
+            on_event (callable): Forwarded pipeline callback.
+            skip_fn (callable): Extra skip condition for clean units (e.g. a checkpoint).
+            execute (callable): `execute_tasks_parallel` or a compatible function.
+            **kwargs: Passed to `execute` (max_workers, executor, ...).
+
+        Returns:
+            set: Ids of the tasks that were dirty.
+        """
+        dirty = self.dirty_tasks(root_task)
+
+        def skip_unit(unit):
+            return (skip_fn is not None and skip_fn(unit)) or not any(
+                task.task_id in dirty for task in iter_tasks(unit)
+            )
+
+        def callback(event):
+            self.on_event(event)
+            if on_event is not None:
+                on_event(event)
+
+        print(f"Incremental execution: {len(dirty)} dirty tasks")
+        execute(root_task, on_event=callback, skip_fn=skip_unit, **kwargs)
+        return dirty
@@ -0,0 +1,146 @@
+import json
+import os
+
+from src.utils.fake_llm import default_client
+from src.utils.task_graph import dependency_ids, iter_tasks
+
+SYSTEM_PROMPT = (
+    "You are an expert autonomous agent collaborating in a multi-step project.\n"
+    "Your responsibility is to complete your assigned task using all available context and previous results.\n"
+    "Always act as the main expert for your task: be decisive, avoid repetition, and provide clear, actionable outputs.\n"
+    "Do NOT include any explanations, comments, or introductory phrases in your output."
+)
+INSTRUCTION = (
+    "You are responsible for completing the current task as part of the overall project.\n"
+    "Use all available context, including dependency and previous results, but present your answer as your own "
+    "expert recommendation or decision.\n"
+    "Do NOT use phrases like 'Based on previous research', 'According to earlier results', or any introductory "
+    "statements.\n"
+    "Respond directly and professionally, as if you are the main expert responsible for this part of the project.\n"
+    "If the task requires an external system or manual intervention, specify this clearly."
+)
+# Dependency and subtask results are cut to this many characters in the prompt
+RESULT_CHARS = 800
+TRUNCATED = "\n...[truncated]..."
+
+
+def result_text(result):
+    """
+    Text of a task result as it appears in prompts; aggregated (dict) results are JSON.
+    """
+    if result is None:
+        return ""
+    return result if isinstance(result, str) else json.dumps(result, ensure_ascii=False)
+
+
+def build_user_prompt(root_task, area_task, task, dependencies):
+    """
+    Build the executor user prompt of a task.
+
+    The layout is the one recorded in every exported tree: PROJECT (the root task),
+    AREA (the task's parent), DEPENDENCY RESULTS, CURRENT TASK, SUBTASK RESULTS and
+    INSTRUCTION. Dependency results are cut to RESULT_CHARS characters, subtask
+    results too, with a "...[truncated]..." marker.
+
+    Args:
+        root_task (Task): The root task of the tree.
+        area_task (Task): The parent of the task.
+        task (Task): The task to execute; its subtasks already have results.
+        dependencies (list): The tasks it depends on, already executed.
+
+    Returns:
+        str: The user prompt.
+    """
+    dependency_block = ""
+    if dependencies:
+        dependency_block = "=== DEPENDENCY RESULTS ===\n" + "\n".join(
+            f"- Dependency: {dep.title}\n  Description: {dep.description}\n"
+            f"  Result: {result_text(dep.result)[:RESULT_CHARS]}\n"
+            for dep in dependencies
+        )
+    subtask_block = ""
+    if task.subtasks:
+        lines = []
+        for child in task.subtasks:
+            text = result_text(child.result)
+            if len(text) > RESULT_CHARS:
+                text = text[:RESULT_CHARS] + TRUNCATED
+            lines.append(f"- {child.title}: {text}")
+        subtask_block = "=== SUBTASK RESULTS ===\n" + "\n".join(lines)
+    return (
+        f"=== PROJECT ===\nTitle: {root_task.title}\n\n\n"
+        f"=== AREA ===\nTitle: {area_task.title}\nDescription: {area_task.description}\n\n\n"
+        f"{dependency_block}\n\n"
+        f"=== CURRENT TASK ===\nTitle: {task.title}\nDescription: {task.description}\n"
+        f"Expected Output: {task.expected_output}\n\n"
+        f"{subtask_block}\n\n"
+        f"=== INSTRUCTION ===\n{INSTRUCTION}"
+    )
+
+
+class TaskExecutor:
+    """
+    Executes the tasks of a tree one at a time through `client`.
+
+    Prompts are built exactly as the ones stored in exported trees. Tasks whose
+    execution_type is not "llm" (manual, external_api) are simulated: their result is
+    their expected output and no call is made. The client is a plain attribute like in
+    the other agents, so the backend, tracing, governor and cache middleware apply to
+    executor calls as well.
+
+    Args:
+        client: OpenAI-style client. Defaults to the configured backend (see `default_client`).
+        model (str): Model used for task execution (STRATMIND_EXECUTOR_MODEL, default gpt-4o-mini).
+        context_assembler (ContextAssembler): Fits each user prompt into a token budget
+            when set (see `enable_context_budget`).
+    """
+
+    def __init__(self, client=None, model=None, context_assembler=None):
+        self.client = client if client is not None else default_client()
+        self.model = model or os.getenv("STRATMIND_EXECUTOR_MODEL", "gpt-4o-mini")
+        self.context_assembler = context_assembler
+
+    def build_prompt(self, root_task, area_task, task, dependencies):
+        user = build_user_prompt(root_task, area_task, task, dependencies)
+        if self.context_assembler is not None:
+            user = self.context_assembler.fit(user, task=task.title)
+        return {"system": SYSTEM_PROMPT, "user": user}
+
+    def execute_task(self, task, root_task, area_task, dependencies):
+        """
+        Execute one task whose subtasks and dependencies already have results.
+
+        Sets `task.prompt` and `task.result`.
+
+        Returns:
+            str: The result.
+        """
+        task.prompt = self.build_prompt(root_task, area_task, task, dependencies)
+        if getattr(task, "execution_type", "llm") != "llm":
+            task.result = task.expected_output
+            return task.result
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "system", "content": task.prompt["system"]},
+                      {"role": "user", "content": task.prompt["user"]}]
+        )
+        task.result = (response.choices[0].message.content or "").strip()
+        return task.result
+
+    def bind(self, root_task):
+        """
+        Return a one-argument `execute(task)` for the tasks of a tree.
+
+        Parents and dependencies are resolved against the tree once, up front.
+        """
+        tasks, parents = {}, {}
+        for task in iter_tasks(root_task):
+            tasks[task.task_id] = task
+            for child in task.subtasks:
+                parents[child.task_id] = task
+
+        def execute(task):
+            dependencies = [tasks[dep_id] for dep_id in dependency_ids(task) if dep_id in tasks]
+            return self.execute_task(task, root_task, parents.get(task.task_id, root_task), dependencies)
+
+        return execute
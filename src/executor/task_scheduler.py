@@ -0,0 +1,229 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from src.executor.context_budget import estimate_tokens
+from src.executor.task_executor import TaskExecutor
+from src.utils.task_graph import CycleError, iter_tasks, dependency_ids, topological_order
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def is_aggregate_task(task, depth):
+    """
+    Tell whether a task's result is just the aggregation of its children's results.
+
+    The root and the area tasks are never sent to the LLM: their result is a
+    {child title: child result} map. Everything below an area is executed.
+
+    Args:
+        task (Task): The task.
+        depth (int): Depth of the task (root is 0).
+
+    Returns:
+        bool: True for the root and area tasks that have subtasks.
+    """
+    return depth <= 1 and bool(task.subtasks)
+
+
+def build_execution_units(root_task):
+    """
+    Split a task tree into independently executable units and the dependencies between them.
+
+    A unit is a subtree rooted right below an area (or a childless root/area task).
+    It is executed in post-order, so child results keep flowing into their parents
+    exactly as in sequential execution. Two units depend on each other
+    when any node of one lists a node of the other in its `dependencies`.
+
+    Args:
+        root_task (Task): The root task of the tree.
+
+    Returns:
+        tuple: (units, edges, aggregates) where `units` maps unit id -> Task,
+            `edges` maps unit id -> list of unit ids that must wait for it, and
+            `aggregates` lists the aggregate tasks in post-order.
+    """
+    units = {}
+    owner = {}
+    aggregates = []
+    stack = [(root_task, 0)]
+    while stack:
+        task, depth = stack.pop()
+        if is_aggregate_task(task, depth):
+            aggregates.append(task)
+            stack.extend((child, depth + 1) for child in reversed(task.subtasks))
+            continue
+        units[task.task_id] = task
+        for node in iter_tasks(task):
+            owner[node.task_id] = task.task_id
+    aggregates.reverse()
+
+    edges = {unit_id: [] for unit_id in units}
+    for unit_id, unit in units.items():
+        upstream = set()
+        for node in iter_tasks(unit):
+            for dep_id in dependency_ids(node):
+                dep_unit = owner.get(dep_id)
+                if dep_unit is None:
+                    print(f"!! Unknown dependency {dep_id} in task: {node.title}")
+                elif dep_unit != unit_id:
+                    upstream.add(dep_unit)
+        for dep_unit in upstream:
+            edges[dep_unit].append(unit_id)
+    return units, edges, aggregates
+
+
+def aggregate_results(task):
+    """
+    Set an aggregate task's result to the {child title: child result} map.
+
+    Args:
+        task (Task): The root or area task.
+    """
+    task.result = {child.title: child.result for child in task.subtasks}
+
+
+def task_event(event, task, **fields):
+    """
+    Build a progress event for a task.
+
+    Args:
+        event (str): Event name (task_started, task_finished, task_failed).
+        task (Task): The task the event is about.
+        **fields: Extra fields (result, elapsed_s, error, ...).
+
+    Returns:
+        dict: The event payload.
+    """
+    return dict({"event": event, "task_id": task.task_id, "title": task.title, "area": task.area}, **fields)
+
+
+def prompt_tokens(prompt):
+    """
+    Token count of a recorded executor prompt ({"system": ..., "user": ...}).
+    """
+    if isinstance(prompt, dict):
+        return sum(estimate_tokens(text) for text in prompt.values() if isinstance(text, str))
+    return estimate_tokens(prompt) if isinstance(prompt, str) else 0
+
+
+def unit_order(unit):
+    """
+    Order the tasks of a unit for execution: post-order, children before their parent,
+    as in sequential execution.
+
+    Args:
+        unit (Task): The root task of the unit.
+
+    Returns:
+        list: The tasks of the unit.
+    """
+    order, stack = [], [unit]
+    while stack:
+        task = stack.pop()
+        order.append(task)
+        stack.extend(task.subtasks)
+    order.reverse()
+    return order
+
+
+def execute_tasks_parallel(root_task, max_workers=DEFAULT_MAX_WORKERS, execute_task=None, on_event=None,
+                           skip_fn=None, executor=None):
+    """
+    Execute the whole task tree, running independent units concurrently.
+
+    Units become ready once every unit they depend on has finished, and up to
+    `max_workers` ready units run at the same time. Inside a unit the tasks run one by
+    one in `unit_order`. Area and root results are aggregated afterwards, so the final
+    tree matches a sequential post-order execution.
+
+    Args:
+        root_task (Task): The root task of the tree.
+        max_workers (int): Maximum number of units executing at once.
+        execute_task (callable): Executes one task whose subtasks and dependencies have
+            results. Defaults to `executor.bind(root_task)`.
+        on_event (callable): Called with a `task_event` dict when a task starts, finishes or
+            fails. `elapsed_s` is the task's own execution time; for the root and area tasks
+            it is the wall time from the first start below them to their aggregation.
+            Called from worker threads.
+        skip_fn (callable): Called with a unit's root task; units for which it returns True
+            are treated as already executed (e.g. restored from a checkpoint).
+        executor (TaskExecutor): Used when no `execute_task` is given. Defaults to a
+            TaskExecutor on the configured backend, without tracing or governor.
+
+    Raises:
+        CycleError: If the dependencies between units form a cycle.
+        Exception: The first error raised by a task; no new units are started after it.
+    """
+    if execute_task is None:
+        execute_task = (executor or TaskExecutor()).bind(root_task)
+    emit = on_event or (lambda event: None)
+    first_start = {}
+
+    def run_unit(unit):
+        first_start[unit.task_id] = time.perf_counter()
+        for task in unit_order(unit):
+            task_start = time.perf_counter()
+            emit(task_event("task_started", task))
+            try:
+                execute_task(task)
+            except Exception as exc:
+                emit(task_event("task_failed", task, error=repr(exc),
+                                elapsed_s=round(time.perf_counter() - task_start, 3)))
+                raise
+            prompt = getattr(task, "prompt", None)
+            emit(task_event("task_finished", task, result=task.result, prompt=prompt,
+                            prompt_tokens=prompt_tokens(prompt),
+                            elapsed_s=round(time.perf_counter() - task_start, 3)))
+
+    units, edges, aggregates = build_execution_units(root_task)
+    try:
+        topological_order(list(units), edges)
+    except CycleError as exc:
+        raise CycleError(units[unit_id].title for unit_id in exc.cycle) from None
+
+    pending = {unit_id: 0 for unit_id in units}
+    for successors in edges.values():
+        for unit_id in successors:
+            pending[unit_id] += 1
+    ready = [unit_id for unit_id, count in pending.items() if count == 0]
+    running = {}
+    skipped = 0
+    error = None
+    start = time.perf_counter()
+
+    def release(unit_id):
+        for succ in edges[unit_id]:
+            pending[succ] -= 1
+            if pending[succ] == 0:
+                ready.append(succ)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while ready or running:
+            while ready and error is None:
+                unit_id = ready.pop(0)
+                if skip_fn is not None and skip_fn(units[unit_id]):
+                    skipped += 1
+                    release(unit_id)
+                    continue
+                print(f"  Executing: {units[unit_id].title}")
+                running[pool.submit(run_unit, units[unit_id])] = unit_id
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                unit_id = running.pop(future)
+                if future.exception() is not None:
+                    error = error or future.exception()
+                    continue
+                release(unit_id)
+    if error is not None:
+        raise error
+
+    for task in aggregates:
+        aggregate_results(task)
+        starts = [first_start[child.task_id] for child in task.subtasks if child.task_id in first_start]
+        if starts:
+            first_start[task.task_id] = min(starts)
+        elapsed = time.perf_counter() - first_start[task.task_id] if starts else 0.0
+        emit(task_event("task_finished", task, result=task.result, elapsed_s=round(elapsed, 3)))
+    print(f"Executed {len(units) - skipped} units ({skipped} skipped) in {time.perf_counter() - start:.1f}s")
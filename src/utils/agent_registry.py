@@ -0,0 +1,147 @@
+import copy
+import importlib
+import os
+import threading
+import time
+
+from src.utils.fake_llm import default_client, fake_backend_enabled, use_backend
+from src.utils.llm_cache import enable_llm_cache
+from src.utils.rate_limiter import enable_governor, without_sdk_retries
+from src.utils.tracing import enable_tracing
+
+# Agent name -> "module:Class"; modules are imported on first use
+AGENT_CLASSES = {
+    "specify": "src.agents.specify_agent:SpecifyAgent",
+    "synthesize": "src.agents.synthesize_agent:SynthesizeAgent",
+    "decomposer": "src.agents.decomposer_agent:Decomposer",
+    "specialist": "src.agents.specialist_agent:SpecialistAgent",
+    "refiner": "src.agents.task_refiner_agent:TaskRefiner",
+    "executor": "src.executor.task_executor:TaskExecutor",
+    "batch_executor": "src.executor.batch_executor:BatchLeafExecutor",
+}
+
+
+class AgentRegistry:
+    """
+    Creates each agent once per process and hands out cheap per-request views of it.
+
+    The first `get(name)` imports the agent's module, builds the agent (reading its
+    prompt files once) and points it at the shared client, whose HTTP connection pool
+    is then reused by every request. Later calls return a shallow copy of that
+    instance whose `client` is wrapped for the caller's tracer and governor lane, and
+    the LLM cache around both: prompts and pool are shared, the per-session middleware
+    is not. Agents keep no per-call state on themselves, so the copies are safe to use
+    concurrently. Answers from the offline backends (STRATMIND_LLM_BACKEND=fake/replay)
+    are never cached.
+
+    Args:
+        classes (dict): Agent name -> "module:Class". Defaults to AGENT_CLASSES.
+        client_factory (callable): Builds the shared client. Defaults to `default_client`
+            with an HTTP pool of STRATMIND_HTTP_POOL connections (default 32) and without
+            SDK retries, since every agent goes through the request governor.
+        cache (LLMCache): Cache of the agents' calls. Defaults to the process-wide cache.
+    """
+
+    def __init__(self, classes=None, client_factory=None, cache=None):
+        self.classes = dict(classes or AGENT_CLASSES)
+        self.client_factory = client_factory or (
+            lambda: without_sdk_retries(default_client(max_connections=int(os.getenv("STRATMIND_HTTP_POOL", "32"))))
+        )
+        self.cache = cache
+        self._client = None
+        self._agents = {}
+        self._lock = threading.Lock()
+        self._name_locks = {}
+        self.counters = {"created": 0, "requests": 0, "import_s": 0.0, "create_s": 0.0, "setup_s": 0.0}
+
+    @property
+    def client(self):
+        """The client shared by every agent of the registry, created on first use."""
+        with self._lock:
+            if self._client is None:
+                self._client = self.client_factory()
+            return self._client
+
+    def agent_class(self, name):
+        """
+        Import and return the class of an agent (for static helpers such as `initial_history`).
+        """
+        module_name, _, class_name = self.classes[name].partition(":")
+        start = time.perf_counter()
+        cls = getattr(importlib.import_module(module_name), class_name)
+        with self._lock:
+            self.counters["import_s"] += time.perf_counter() - start
+        return cls
+
+    def base(self, name):
+        """
+        Return the process-wide instance of an agent, creating it on first use.
+        """
+        agent = self._agents.get(name)
+        if agent is not None:
+            return agent
+        with self._lock:
+            name_lock = self._name_locks.setdefault(name, threading.Lock())
+        with name_lock:
+            agent = self._agents.get(name)
+            if agent is None:
+                cls = self.agent_class(name)
+                start = time.perf_counter()
+                agent = cls()
+                if getattr(agent, "client", None) is not None:
+                    agent.client = self.client
+                agent = use_backend(agent)
+                with self._lock:
+                    self.counters["created"] += 1
+                    self.counters["create_s"] += time.perf_counter() - start
+                self._agents[name] = agent
+        return agent
+
+    def get(self, name, tracer=None, lane="default", bypass_cache=False):
+        """
+        Return an agent ready for one request.
+
+        Args:
+            name (str): Agent name (see AGENT_CLASSES).
+            tracer (Tracer): Records the agent's calls, when given.
+            lane (str): Request governor lane.
+            bypass_cache (bool): Send every call to the model, skipping the LLM cache.
+
+        Returns:
+            A shallow copy of the shared agent with its own client middleware.
+        """
+        base = self.base(name)
+        start = time.perf_counter()
+        agent = copy.copy(base)
+        if tracer is not None:
+            agent = enable_tracing(agent, tracer)
+        agent = enable_governor(agent, lane=lane)
+        if not fake_backend_enabled():
+            agent = enable_llm_cache(agent, cache=self.cache, bypass=bypass_cache)
+        with self._lock:
+            self.counters["requests"] += 1
+            self.counters["setup_s"] += time.perf_counter() - start
+        return agent
+
+    def stats(self):
+        with self._lock:
+            requests = self.counters["requests"]
+            return dict(self.counters, agents=sorted(self._agents),
+                        import_s=round(self.counters["import_s"], 4), create_s=round(self.counters["create_s"], 4),
+                        setup_s=round(self.counters["setup_s"], 4),
+                        setup_us_per_request=round(self.counters["setup_s"] / requests * 1e6, 1) if requests else 0.0)
+
+
+_default_registry = None
+_default_registry_lock = threading.Lock()
+
+
+def get_default_registry():
+    """
+    Return the process-wide agent registry, creating it on first use.
+    """
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = AgentRegistry()
+        return _default_registry
@@ -0,0 +1,234 @@
+import argparse
+import gzip
+import json
+import os
+import re
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib json gives the same output, only slower
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT = "stratmind-compact/1"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_MAGIC = b"\x1f\x8b"
+# Executor prompts are made of "=== SECTION ===" blocks; PROJECT, AREA and INSTRUCTION repeat across nodes
+SECTION_SPLIT = re.compile(r"(?=^=== )", re.M)
+
+
+class _Interner:
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def __call__(self, value):
+        key = value if isinstance(value, str) else tuple(value)
+        if key not in self._index:
+            self._index[key] = len(self.values)
+            self.values.append(value)
+        return self._index[key]
+
+
+def _derived_result(node):
+    """Result of root/area nodes: the {child title: child result} map."""
+    subtasks = node.get("subtasks") or []
+    if not subtasks:
+        return None
+    return {child["title"]: child.get("result") for child in subtasks}
+
+
+def compact_task_tree(tree):
+    """
+    Convert a nested exported task tree into the compact representation.
+
+    Nodes become a flat table in pre-order keyed by task_id, each row pointing to
+    its parent row. Prompt system texts and "=== SECTION ===" blocks are interned in
+    a shared string table, and root/area results that only repeat their children's
+    results are dropped and rebuilt on load.
+
+    Args:
+        tree (dict): The nested tree, as written by export_task_tree.
+
+    Returns:
+        dict: The compact document.
+    """
+    strings = _Interner()
+    key_orders = _Interner()
+    nodes = {}
+    task_ids = []
+    stack = [(tree, -1)]
+    while stack:
+        node, parent_row = stack.pop()
+        row_index = len(nodes)
+        row = {"_k": key_orders(list(node.keys())), "_p": parent_row}
+        for key, value in node.items():
+            if key in ("task_id", "subtasks"):
+                continue
+            if key == "parent" and parent_row >= 0 and value == task_ids[parent_row]:
+                continue
+            if key == "result" and value is not None and value == _derived_result(node):
+                row["_r"] = 1
+                continue
+            if key == "prompt" and isinstance(value, dict) and all(isinstance(v, str) for v in value.values()):
+                row["prompt"] = {
+                    "_k": key_orders(list(value.keys())),
+                    "parts": [[strings(part) for part in SECTION_SPLIT.split(text)] for text in value.values()]
+                }
+                continue
+            row[key] = value
+        nodes[node["task_id"]] = row
+        task_ids.append(node["task_id"])
+        stack.extend((child, row_index) for child in reversed(node.get("subtasks") or []))
+    return {"format": FORMAT, "strings": strings.values, "key_orders": key_orders.values, "nodes": nodes}
+
+
+def expand_task_tree(compact):
+    """
+    Rebuild the nested task tree from its compact representation.
+
+    The result is identical to the original export, key order included.
+
+    Args:
+        compact (dict): A document produced by `compact_task_tree`.
+
+    Returns:
+        dict: The nested tree.
+    """
+    if compact.get("format") != FORMAT:
+        raise ValueError(f"Unsupported compact tree format: {compact.get('format')}")
+    strings = compact["strings"]
+    key_orders = compact["key_orders"]
+    task_ids = list(compact["nodes"])
+    rows = list(compact["nodes"].values())
+    children = [[] for _ in rows]
+    for index, row in enumerate(rows):
+        if row["_p"] >= 0:
+            children[row["_p"]].append(index)
+
+    built = [None] * len(rows)
+    for index in range(len(rows) - 1, -1, -1):
+        row = rows[index]
+        values = {"task_id": task_ids[index], "subtasks": [built[child] for child in children[index]]}
+        if row["_p"] >= 0:
+            values["parent"] = task_ids[row["_p"]]
+        for key, value in row.items():
+            if key == "prompt" and isinstance(value, dict) and "parts" in value:
+                value = {
+                    prompt_key: "".join(strings[part] for part in parts)
+                    for prompt_key, parts in zip(key_orders[value["_k"]], value["parts"])
+                }
+            if key not in ("_k", "_p", "_r"):
+                values[key] = value
+        if row.get("_r"):
+            values["result"] = {child["title"]: child.get("result") for child in values["subtasks"]}
+        built[index] = {key: values[key] for key in key_orders[row["_k"]]}
+    return built[0]
+
+
+def _dumps(data):
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _loads(data):
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_compact(tree, path, compression="gzip"):
+    """
+    Write a nested task tree to `path` in compact form.
+
+    Args:
+        tree (dict): The nested tree.
+        path (str): Destination file.
+        compression (str): "gzip", "zstd" (requires the zstandard package) or None.
+
+    Returns:
+        str: The path written.
+    """
+    data = _dumps(compact_task_tree(tree))
+    if compression == "gzip":
+        data = gzip.compress(data, compresslevel=9)
+    elif compression == "zstd":
+        if zstandard is None:
+            raise ImportError("zstd compression requires the 'zstandard' package")
+        data = zstandard.ZstdCompressor(level=19).compress(data)
+    elif compression is not None:
+        raise ValueError(f"Unknown compression: {compression}")
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def load_compact(path):
+    """
+    Load a compact task tree file (plain, gzip or zstd) back into the nested shape.
+
+    Args:
+        path (str): The compact file.
+
+    Returns:
+        dict: The nested tree, as export_task_tree would have written it.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if data.startswith(GZIP_MAGIC):
+        data = gzip.decompress(data)
+    elif data.startswith(ZSTD_MAGIC):
+        if zstandard is None:
+            raise ImportError("Reading zstd files requires the 'zstandard' package")
+        data = zstandard.ZstdDecompressor().decompress(data)
+    return expand_task_tree(_loads(data))
+
+
+def export_task_tree_compact(root_task, out_path, metadata=None, compression="gzip"):
+    """
+    Export a task tree straight to the compact format.
+
+    Args:
+        root_task (Task): The root task.
+        out_path (str): Destination file.
+        metadata (dict): Stored as `_metadata` on the root, like export_task_tree.
+        compression (str): "gzip", "zstd" or None.
+
+    Returns:
+        str: The path written.
+    """
+    tree = root_task.to_dict()
+    if metadata is not None:
+        tree["_metadata"] = metadata
+    return write_compact(tree, out_path, compression)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert exported task trees to/from the compact format.")
+    parser.add_argument("paths", nargs="+", help="Exported *_task_tree.json files (or compact files with --expand).")
+    parser.add_argument("--compression", choices=["gzip", "zstd", "none"], default="gzip")
+    parser.add_argument("--expand", action="store_true", help="Expand compact files back to nested JSON.")
+    args = parser.parse_args()
+    compression = None if args.compression == "none" else args.compression
+
+    for path in args.paths:
+        if args.expand:
+            out_path = re.sub(r"\.compact\.json(\.gz|\.zst)?$", "", path) + ".json"
+            with open(out_path, "w", encoding="utf-8") as f:
+                json.dump(load_compact(path), f, indent=2, ensure_ascii=False)
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                tree = json.load(f)
+            suffix = {"gzip": ".gz", "zstd": ".zst", None: ""}[compression]
+            out_path = re.sub(r"\.json$", "", path) + ".compact.json" + suffix
+            write_compact(tree, out_path, compression)
+        print(f"{path} ({os.path.getsize(path)} B) -> {out_path} ({os.path.getsize(out_path)} B)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_MAX_WORKERS = 4
+
+
+def map_concurrently(fn, items, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Apply a function to every item on a bounded thread pool.
+
+    Intended for fanning out independent, I/O-bound agent calls. With
+    `max_workers` <= 1 (or a single item) the calls run inline, one after another.
+
+    Args:
+        fn (callable): Function called with one item.
+        items (iterable): The items to process.
+        max_workers (int): Maximum number of calls in flight.
+
+    Returns:
+        list: The results, in the same order as `items`.
+
+    Raises:
+        Exception: The first error raised by `fn`, after all calls have finished.
+    """
+    items = list(items)
+    if max_workers is None or max_workers <= 1 or len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(items))) as pool:
+        return list(pool.map(fn, items))
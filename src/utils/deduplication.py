@@ -0,0 +1,116 @@
+import re
+
+from src.executor.task_scheduler import build_execution_units
+from src.utils.task_graph import CycleError, dependency_ids, iter_tasks, topological_order
+
+# Calibrated with evaluation/calibrate_dedup.py on the exported trees in output/: the
+# highest cross-area pairs there (0.27-0.31) are unrelated steps, and the one genuine
+# duplicate scores 0.21, so no threshold separates them. 0.35 keeps flags precise;
+# candidates below ~0.2 are not found by the LSH bands anyway.
+DEFAULT_DEDUP_THRESHOLD = 0.35
+NUMBER = re.compile(r"\d+")
+
+
+def find_duplicate_subtasks(task_manager, root_task, threshold=DEFAULT_DEDUP_THRESHOLD):
+    """
+    Find subtasks that nearly repeat a subtask of another area.
+
+    Candidates come from the task manager's MinHash/LSH index over titles and
+    descriptions. Only pairs from different areas count: within an area, near-identical
+    titles are usually deliberate series ("Argument 1", "Argument 2"), and so are
+    cross-area pairs whose titles carry different numbers.
+
+    Args:
+        task_manager (IndexedTaskManager): The task manager instance.
+        root_task (Task): The root task object.
+        threshold (float): Minimum Jaccard similarity of the word-stem shingles.
+
+    Returns:
+        list: (duplicate, original, similarity) tuples; the original is the one that
+            comes first in the tree.
+    """
+    order = {}
+    for task in iter_tasks(root_task):
+        if task.parent is not None and task.parent.parent is not None:
+            order[task.task_id] = len(order)
+    duplicates, claimed = [], set()
+    for task_id in order:
+        task = task_manager.tasks[task_id]
+        if task_id in claimed:
+            continue
+        for other, similarity in task_manager.near_duplicates(task, threshold):
+            if (other.task_id not in order or order[other.task_id] < order[task_id] or other.task_id in claimed
+                    or other.area == task.area
+                    or set(NUMBER.findall(task.title or "")) != set(NUMBER.findall(other.title or ""))):
+                continue
+            claimed.add(other.task_id)
+            duplicates.append((other, task, round(similarity, 3)))
+    return duplicates
+
+
+def merge_duplicate(task_manager, root_task, duplicate, original):
+    """
+    Drop a leaf duplicate from the tree and point its dependents at the original.
+
+    The merge is undone when the redirected dependencies would create a cycle.
+
+    Returns:
+        bool: True if the duplicate was merged.
+    """
+    if duplicate.subtasks or getattr(duplicate, "execution_type", "llm") != getattr(original, "execution_type", "llm"):
+        return False
+    parent = duplicate.parent
+    index = parent.subtasks.index(duplicate)
+    dependents = task_manager.dependents(duplicate.task_id)
+    previous = {task.task_id: list(task.dependencies) for task in dependents}
+    parent.subtasks.pop(index)
+    for task in dependents:
+        redirected = [original.task_id if dep_id == duplicate.task_id else dep_id for dep_id in dependency_ids(task)]
+        task.dependencies = list(dict.fromkeys(redirected))
+    try:
+        units, edges, _ = build_execution_units(root_task)
+        topological_order(list(units), edges)
+    except CycleError:
+        parent.subtasks.insert(index, duplicate)
+        for task in dependents:
+            task.dependencies = previous[task.task_id]
+        return False
+    del task_manager.tasks[duplicate.task_id]
+    for task in [duplicate] + dependents:
+        task_manager.reindex(task)
+    return True
+
+
+def deduplicate_subtasks(task_manager, root_task, mode="flag", threshold=DEFAULT_DEDUP_THRESHOLD, on_event=None):
+    """
+    Flag, or merge, near-duplicate subtasks across areas before execution.
+
+    Args:
+        task_manager (IndexedTaskManager): The task manager instance.
+        root_task (Task): The root task object.
+        mode (str): "flag" only reports duplicates (event and `duplicate_of`); they are
+            still executed. "merge" (opt-in) also removes leaf duplicates from the tree
+            (see `merge_duplicate`); duplicates it cannot merge keep `duplicate_of`.
+        threshold (float): Minimum similarity, see `find_duplicate_subtasks`.
+        on_event (callable): Called with a `duplicate_found` event per pair.
+
+    Returns:
+        list: The (duplicate, original, similarity) tuples found.
+    """
+    duplicates = find_duplicate_subtasks(task_manager, root_task, threshold)
+    for duplicate, original, similarity in duplicates:
+        duplicate.duplicate_of = original.task_id
+        merged = mode == "merge" and merge_duplicate(task_manager, root_task, duplicate, original)
+        print(f"  {'Merged' if merged else 'Duplicate'}: {duplicate.title} ({duplicate.area}) ~ "
+              f"{original.title} ({original.area}), similarity {similarity}")
+        if on_event:
+            on_event({
+                "event": "duplicate_found",
+                "task_id": duplicate.task_id,
+                "title": duplicate.title,
+                "area": duplicate.area,
+                "duplicate_of": original.task_id,
+                "similarity": similarity,
+                "merged": merged
+            })
+    return duplicates
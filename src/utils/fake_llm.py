@@ -0,0 +1,351 @@
+import glob
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+from src.utils.llm_cache import make_cache_key
+from src.utils.llm_client import ChatClientWrapper, attach_to_agent, split_messages
+
+TITLE = re.compile(r"^=== CURRENT TASK ===\nTitle: (.*)$", re.M)
+WORD = re.compile(r"[^\W\d_]{4,}")
+BATCH_LABEL = re.compile(r"^\[(T\d+)\]\nTitle: (.*)$", re.M)
+# Items in the "subtasks" list of a synthetic JSON answer
+JSON_ITEMS = 3
+
+
+def prompt_key(system, conversation):
+    """
+    Replay key of a call: its system prompt and conversation, ignoring model and sampling params.
+    """
+    return make_cache_key(None, {}, system, conversation)
+
+
+def _seed(*parts):
+    return int.from_bytes(hashlib.sha256("\x1f".join(map(str, parts)).encode("utf-8")).digest()[:8], "big")
+
+
+def wants_json(system, response_format=None):
+    """
+    Tell whether a call expects a JSON answer: JSON mode requested, or a system
+    prompt that asks for JSON (the decomposer, specialist, refiner and synthesizer).
+    """
+    if isinstance(response_format, dict) and response_format.get("type") in ("json_object", "json_schema"):
+        return True
+    return "json" in (system or "").lower()
+
+
+def synthetic_json(vocabulary, rng, heading):
+    """
+    A JSON object shaped for every structured agent at once.
+
+    It carries the synthesizer's `description`/`expected_output`, the decomposer's
+    `intro`, and a `subtasks` list whose items have the fields of both an area
+    (area, responsibilities) and a planned or refined subtask (title, dependencies).
+    """
+    def phrase(n):
+        return " ".join(rng.choice(vocabulary).lower() for _ in range(n))
+
+    items = []
+    for i in range(1, JSON_ITEMS + 1):
+        name = f"{phrase(2).title()} {i}"
+        items.append({
+            "area": name,
+            "title": name,
+            "description": phrase(12),
+            "expected_output": phrase(8),
+            "responsibilities": [phrase(4), phrase(4)],
+            "execution_type": "llm",
+            "dependencies": [],
+        })
+    return json.dumps({
+        "intro": f"{heading} {phrase(20)}",
+        "description": phrase(20),
+        "expected_output": phrase(10),
+        "area": heading.rstrip(":"),
+        "subtasks": items,
+    }, ensure_ascii=False)
+
+
+def synthetic_response(system, conversation, words=60, seed=0, response_format=None):
+    """
+    Deterministic stand-in answer built from the words of the prompt itself.
+
+    The same prompt and seed always give the same text, whatever the call order
+    or thread, so runs are reproducible. Batch prompts (labelled [T1]..[Tn] tasks)
+    get a JSON object with one answer per label, and calls that expect JSON (see
+    `wants_json`) get the object of `synthetic_json`.
+    """
+    user = (conversation[-1].get("content") or "") if conversation else ""
+    rng = random.Random(_seed(seed, system, user))
+    vocabulary = WORD.findall(user) or ["result"]
+
+    def answer(heading):
+        lines = [heading]
+        for _ in range(max(1, words // 10)):
+            lines.append("- " + " ".join(rng.choice(vocabulary).lower() for _ in range(10)))
+        return "\n".join(lines)
+
+    labels = BATCH_LABEL.findall(user)
+    if labels:
+        return json.dumps({label: answer(f"{title}:") for label, title in labels}, ensure_ascii=False)
+    title = TITLE.search(user)
+    heading = f"{title.group(1)}:" if title else "Result:"
+    if wants_json(system, response_format):
+        return synthetic_json(vocabulary, rng, heading)
+    return answer(heading)
+
+
+class ReplayResponder:
+    """
+    Answers calls with recorded responses, falling back to synthetic ones.
+
+    Recordings come from exported task trees (each executor prompt with its result)
+    or from JSONL cassettes written by `RecordingClient`. A call is matched on its
+    exact prompt first, then on the CURRENT TASK title of executor prompts.
+    """
+
+    def __init__(self, fallback=synthetic_response):
+        self.by_key = {}
+        self.by_title = {}
+        self.fallback = fallback
+        self.counters = {"exact": 0, "title": 0, "synthetic": 0}
+        self._lock = threading.Lock()
+
+    def add(self, system, conversation, content):
+        self.by_key[prompt_key(system, conversation)] = content
+        title = TITLE.search(conversation[-1].get("content") or "") if conversation else None
+        if title:
+            self.by_title.setdefault(title.group(1), content)
+
+    def add_export(self, tree):
+        """
+        Index the executor prompts and results of an exported task tree.
+        """
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            prompt = node.get("prompt")
+            if isinstance(prompt, dict) and isinstance(node.get("result"), str):
+                self.add(prompt.get("system", ""), [{"role": "user", "content": prompt.get("user", "")}], node["result"])
+            stack.extend(node.get("subtasks") or [])
+
+    def add_cassette(self, path):
+        """
+        Index a JSONL cassette written by `RecordingClient`.
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self.by_key[record["key"]] = record["content"]
+
+    @classmethod
+    def from_paths(cls, patterns, fallback=synthetic_response):
+        """
+        Build a responder from exported trees (*.json) and cassettes (*.jsonl) matching glob patterns.
+        """
+        responder = cls(fallback)
+        for pattern in patterns:
+            for path in sorted(glob.glob(pattern, recursive=True)):
+                if path.endswith(".jsonl"):
+                    responder.add_cassette(path)
+                elif path.endswith(".json"):
+                    with open(path, "r", encoding="utf-8") as f:
+                        responder.add_export(json.load(f))
+        return responder
+
+    def __call__(self, system, conversation, response_format=None):
+        content = self.by_key.get(prompt_key(system, conversation))
+        kind = "exact"
+        if content is None:
+            title = TITLE.search(conversation[-1].get("content") or "") if conversation else None
+            content = self.by_title.get(title.group(1)) if title else None
+            kind = "title"
+        if content is None:
+            content = self.fallback(system, conversation, response_format=response_format)
+            kind = "synthetic"
+        with self._lock:
+            self.counters[kind] += 1
+        return content
+
+
+def estimate_tokens(text):
+    return math.ceil(len(text) / 4)
+
+
+def make_completion(content, model, prompt_tokens, completion_tokens):
+    """
+    Build a chat completion object: the openai type when the package is installed,
+    an equivalent namespace otherwise.
+    """
+    payload = {
+        "id": "fake-" + hashlib.sha256(content.encode("utf-8")).hexdigest()[:24],
+        "object": "chat.completion",
+        "created": 0,
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                  "total_tokens": prompt_tokens + completion_tokens},
+    }
+    try:
+        from openai.types.chat import ChatCompletion
+    except ImportError:
+        completion = json.loads(json.dumps(payload), object_hook=lambda d: SimpleNamespace(**d))
+        completion.model_dump_json = lambda: json.dumps(payload)
+        return completion
+    return ChatCompletion.model_validate(payload)
+
+
+class FakeChatClient:
+    """
+    Offline stand-in for the OpenAI client (`client.chat.completions.create`).
+
+    Every call sleeps `latency` seconds, +/- up to `jitter` seconds drawn from a
+    generator seeded with the prompt, so timings are reproducible too. Answers come
+    from `responder(system, conversation, response_format=...)`: replayed or synthetic.
+
+    Args:
+        responder (callable): Defaults to `synthetic_response`.
+        latency (float): Mean simulated latency per call, in seconds.
+        jitter (float): Maximum deviation from `latency`, in seconds.
+        seed (int): Seed of the jitter.
+        model (str): Model name reported when the call does not set one.
+    """
+
+    def __init__(self, responder=None, latency=0.0, jitter=0.0, seed=0, model="fake-llm"):
+        self.responder = responder or synthetic_response
+        self.latency = latency
+        self.jitter = jitter
+        self.seed = seed
+        self.model = model
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, model=None, messages=(), **kwargs):
+        system, conversation = split_messages(list(messages))
+        content = self.responder(system, conversation, response_format=kwargs.get("response_format"))
+        if self.latency or self.jitter:
+            rng = random.Random(_seed(self.seed, prompt_key(system, conversation)))
+            time.sleep(max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter)))
+        with self._lock:
+            self.calls += 1
+        prompt_text = system + "".join(m.get("content") or "" for m in conversation)
+        return make_completion(content, model or self.model, estimate_tokens(prompt_text), estimate_tokens(content))
+
+
+class RecordingClient(ChatClientWrapper):
+    """
+    Appends every answered call to a JSONL cassette that `ReplayResponder` can replay.
+    """
+
+    def __init__(self, client, path):
+        super().__init__(client)
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def create(self, **kwargs):
+        response = super().create(**kwargs)
+        if not kwargs.get("stream"):
+            system, conversation = split_messages(kwargs.get("messages", []))
+            record = {"key": prompt_key(system, conversation), "model": kwargs.get("model"),
+                      "content": response.choices[0].message.content}
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return response
+
+
+def fake_backend_enabled():
+    """
+    True when STRATMIND_LLM_BACKEND selects an offline backend ("fake" or "replay").
+    """
+    return os.getenv("STRATMIND_LLM_BACKEND", "openai").lower() in ("fake", "replay")
+
+
+def fake_client_from_env():
+    """
+    Build the model backend selected by environment variables, or None for the real API.
+
+    STRATMIND_LLM_BACKEND: "openai" (default), "fake" (synthetic answers) or "replay"
+    (answers from STRATMIND_REPLAY_PATHS, comma-separated globs of exported trees and
+    cassettes, default "output/**/*_task_tree.json"). STRATMIND_FAKE_LATENCY and
+    STRATMIND_FAKE_JITTER set the simulated latency in seconds. "record" keeps the real
+    API and appends every call to the STRATMIND_RECORD_PATH cassette (see `use_backend`).
+    """
+    if not fake_backend_enabled():
+        return None
+    responder = None
+    if os.getenv("STRATMIND_LLM_BACKEND").lower() == "replay":
+        patterns = os.getenv("STRATMIND_REPLAY_PATHS", os.path.join("output", "**", "*_task_tree.json"))
+        responder = ReplayResponder.from_paths([p for p in patterns.split(",") if p])
+    return FakeChatClient(
+        responder,
+        latency=float(os.getenv("STRATMIND_FAKE_LATENCY", "0")),
+        jitter=float(os.getenv("STRATMIND_FAKE_JITTER", "0"))
+    )
+
+
+_env_client = None
+_env_client_lock = threading.Lock()
+
+
+def _shared_env_client():
+    global _env_client
+    with _env_client_lock:
+        if _env_client is None:
+            _env_client = fake_client_from_env()
+        return _env_client
+
+
+def default_client(max_connections=None):
+    """
+    Client for components that call the model directly rather than through an agent:
+    the configured offline backend, or a new `openai.OpenAI()` client.
+
+    Args:
+        max_connections (int): Size of the OpenAI client's HTTP connection pool
+            (default: the SDK's own limits).
+    """
+    client = _shared_env_client()
+    if client is not None:
+        return client
+    from openai import OpenAI
+    if not max_connections:
+        return OpenAI()
+    import httpx
+    limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    return OpenAI(http_client=httpx.Client(limits=limits, timeout=httpx.Timeout(600.0, connect=5.0)))
+
+
+def use_backend(agent, client=None):
+    """
+    Point an agent at the configured model backend.
+
+    Args:
+        agent: The agent whose `client` is replaced (or wrapped, when recording).
+        client: A fake client to use. Defaults to the one selected by `fake_client_from_env`,
+            shared by every agent of the process; with the real backend the agent is left as is.
+
+    Returns:
+        The same agent.
+    """
+    if client is None:
+        if os.getenv("STRATMIND_LLM_BACKEND", "openai").lower() == "record":
+            path = os.getenv("STRATMIND_RECORD_PATH", os.path.join(".cache", "llm_cassette.jsonl"))
+            return attach_to_agent(agent, lambda current: RecordingClient(current, path))
+        client = _shared_env_client()
+        if client is None:
+            return agent
+    return attach_to_agent(agent, lambda current: client)
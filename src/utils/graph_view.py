@@ -0,0 +1,230 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from src.utils.task_graph import dependency_ids
+
+LABEL_CHARS = 40
+TOOLTIP_CHARS = 300
+
+
+def _clip(text, limit):
+    text = "" if text is None else str(text)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def render_node(task, depth, parent_id):
+    """
+    vis-network node of a task: label, tooltip, area group and tree level.
+    """
+    result = task.result
+    tooltip = f"{task.title}\n\n{_clip(task.description, TOOLTIP_CHARS)}"
+    if isinstance(result, str):
+        tooltip += f"\n\nResult: {_clip(result, TOOLTIP_CHARS)}"
+    return {
+        "id": task.task_id,
+        "label": _clip(task.title, LABEL_CHARS),
+        "title": tooltip,
+        "group": task.area or "project",
+        "level": depth,
+        "parent": parent_id,
+        "execution_type": getattr(task, "execution_type", "llm"),
+        "status": "pending" if result is None else "done",
+        "child_count": len(task.subtasks),
+        "shape": "box" if task.subtasks else "ellipse",
+    }
+
+
+def render_edge(edge_id, source, target, kind):
+    edge = {"id": edge_id, "from": source, "to": target, "kind": kind, "arrows": "to"}
+    if kind == "dependency":
+        edge["dashes"] = True
+    return edge
+
+
+class GraphView:
+    """
+    Versioned vis-network view of a task tree, for cheap polling.
+
+    `refresh()` walks the tree and compares a signature of every task with the
+    previous walk; only changed tasks are re-rendered and stamped with the new
+    version, and removed tasks and edges leave a tombstone. `payload(since=N)` then
+    returns just what changed after version N, and `root`/`depth` restrict it to a
+    subtree so the UI can expand large trees lazily. Edges are `subtask` (parent ->
+    child) and `dependency` (dependency -> dependent, dashed).
+
+    Args:
+        root_task (Task): The root task of the tree.
+        min_interval (float): Refreshes closer together than this (seconds) reuse the last walk.
+        max_tombstones (int): Removals remembered for deltas; older `since` values get a full payload.
+    """
+
+    def __init__(self, root_task, min_interval=0.0, max_tombstones=10000):
+        self.root_id = root_task.task_id
+        self.view_id = uuid.uuid4().hex[:12]
+        self.min_interval = min_interval
+        self.max_tombstones = max_tombstones
+        self.version = 0
+        self._oldest = 0
+        self._nodes = {}
+        self._edges = {}
+        self._removed_nodes = OrderedDict()
+        self._removed_edges = OrderedDict()
+        self._refreshed_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def etag(self):
+        return f'W/"{self.view_id}-{self.version}"'
+
+    def __contains__(self, task_id):
+        return task_id in self._nodes
+
+    def _tombstone(self, removed, item_id, version):
+        removed[item_id] = version
+        removed.move_to_end(item_id)
+        while len(removed) > self.max_tombstones:
+            self._oldest = max(self._oldest, removed.popitem(last=False)[1])
+
+    def refresh(self, root_task, force=False):
+        """
+        Bring the view up to date with the tree.
+
+        Returns:
+            int: The current version.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if not force and self._refreshed_at is not None and now - self._refreshed_at < self.min_interval:
+                return self.version
+            self._refreshed_at = now
+            version = self.version + 1
+            changed = False
+            seen_nodes, edges = set(), []
+            stack = [(root_task, None, 0)]
+            while stack:
+                task, parent_id, depth = stack.pop()
+                task_id = task.task_id
+                seen_nodes.add(task_id)
+                child_ids = tuple(child.task_id for child in task.subtasks)
+                dep_ids = tuple(dependency_ids(task))
+                signature = (task.title, task.description, task.area, getattr(task, "execution_type", None),
+                             task.result, parent_id, depth, child_ids)
+                entry = self._nodes.get(task_id)
+                if entry is None or entry[0] != signature:
+                    self._nodes[task_id] = [signature, version, render_node(task, depth, parent_id), depth, parent_id]
+                    self._removed_nodes.pop(task_id, None)
+                    changed = True
+                edges.extend((f"{task_id}>{child_id}", task_id, child_id, "subtask") for child_id in child_ids)
+                edges.extend((f"{dep_id}~{task_id}", dep_id, task_id, "dependency") for dep_id in dep_ids)
+                stack.extend((child, task_id, depth + 1) for child in reversed(task.subtasks))
+
+            for task_id in [task_id for task_id in self._nodes if task_id not in seen_nodes]:
+                del self._nodes[task_id]
+                self._tombstone(self._removed_nodes, task_id, version)
+                changed = True
+
+            seen_edges = set()
+            for edge_id, source, target, kind in edges:
+                if source not in self._nodes or target not in self._nodes:
+                    continue
+                seen_edges.add(edge_id)
+                if edge_id not in self._edges:
+                    self._edges[edge_id] = [version, render_edge(edge_id, source, target, kind)]
+                    self._removed_edges.pop(edge_id, None)
+                    changed = True
+            for edge_id in [edge_id for edge_id in self._edges if edge_id not in seen_edges]:
+                del self._edges[edge_id]
+                self._tombstone(self._removed_edges, edge_id, version)
+                changed = True
+
+            if changed:
+                self.version = version
+            return self.version
+
+    def _visible(self, task_id, root_id, max_depth):
+        entry = self._nodes.get(task_id)
+        if entry is None or (max_depth is not None and entry[3] > max_depth):
+            return False
+        if root_id == self.root_id:
+            return True
+        while entry is not None:
+            if task_id == root_id:
+                return True
+            task_id = entry[4]
+            entry = self._nodes.get(task_id)
+        return False
+
+    def payload(self, since=None, root_id=None, depth=None):
+        """
+        Nodes and edges in vis-network format.
+
+        Args:
+            since (int): Only return what changed after this version (a full payload is
+                returned when it is unknown or too old to be served as a delta).
+            root_id (str): Subtree to return (default: the whole tree).
+            depth (int): Levels below `root_id` to include; nodes on the last level that
+                have children are flagged `collapsed`.
+
+        Returns:
+            dict: view_id, version, full, nodes, edges, removed_nodes, removed_edges.
+
+        Raises:
+            KeyError: If `root_id` is not in the tree.
+        """
+        with self._lock:
+            root_id = root_id or self.root_id
+            if root_id not in self._nodes:
+                raise KeyError(root_id)
+            full = since is None or since < self._oldest or since > self.version
+            max_depth = None if depth is None else self._nodes[root_id][3] + depth
+            nodes = []
+            for task_id, (_, version, node, node_depth, _) in self._nodes.items():
+                if (full or version > since) and self._visible(task_id, root_id, max_depth):
+                    if node_depth == max_depth and node["child_count"]:
+                        node = dict(node, collapsed=True)
+                    nodes.append(node)
+            edges = [
+                edge for version, edge in self._edges.values()
+                if (full or version > since)
+                and self._visible(edge["from"], root_id, max_depth) and self._visible(edge["to"], root_id, max_depth)
+            ]
+            return {
+                "view_id": self.view_id,
+                "version": self.version,
+                "full": full,
+                "root": root_id,
+                "depth": depth,
+                "nodes": nodes,
+                "edges": edges,
+                "removed_nodes": [] if full else [i for i, v in self._removed_nodes.items() if v > since],
+                "removed_edges": [] if full else [i for i, v in self._removed_edges.items() if v > since],
+            }
+
+
+class GraphViews:
+    """
+    Per-session graph views, kept in process and replaced when a session gets a new tree.
+
+    Args:
+        max_sessions (int): Views kept at once; the least recently used are dropped.
+        min_interval (float): Passed to every GraphView.
+    """
+
+    def __init__(self, max_sessions=256, min_interval=0.0):
+        self.max_sessions = max_sessions
+        self.min_interval = min_interval
+        self._views = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id, root_task):
+        with self._lock:
+            view = self._views.get(session_id)
+            if view is None or view.root_id != root_task.task_id:
+                view = GraphView(root_task, min_interval=self.min_interval)
+                self._views[session_id] = view
+            self._views.move_to_end(session_id)
+            while len(self._views) > self.max_sessions:
+                self._views.popitem(last=False)
+            return view
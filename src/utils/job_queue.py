@@ -0,0 +1,210 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a running job once it has been cancelled."""
+
+
+class Job:
+    """
+    A long pipeline stage running in the background.
+
+    The job function receives the job itself and reports progress through `emit`,
+    which also raises JobCancelled once cancellation has been requested, so stages
+    stop at their next progress event.
+    """
+
+    def __init__(self, kind, session_id):
+        self.job_id = str(uuid.uuid4())
+        self.kind = kind
+        self.session_id = session_id
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self.future = None
+        self.cancel_requested = threading.Event()
+
+    @property
+    def active(self):
+        return self.status in ("queued", "running")
+
+    def emit(self, event):
+        """
+        Record a progress event (usable as the pipeline `on_event` callback).
+
+        Raises:
+            JobCancelled: If the job has been cancelled.
+        """
+        self.events.append(dict(event, ts=time.time()))
+        if self.cancel_requested.is_set():
+            raise JobCancelled(self.job_id)
+
+    def to_dict(self, since=0):
+        """
+        Return the job status and the progress events from index `since` on.
+        """
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "session_id": self.session_id,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "events": self.events[since:],
+            "next_event": len(self.events),
+            "result": self.result,
+            "error": self.error
+        }
+
+
+class JobQueue:
+    """
+    In-process job runner with bounded concurrency.
+
+    At most `max_workers` jobs run at once and at most `max_queued` wait for a worker;
+    submitting beyond that raises QueueFullError so callers can push back. Only one
+    active job per (session_id, kind) exists: a duplicate submission returns it.
+    Jobs of the same session run one at a time, in submission order, so stages of a
+    session (e.g. refine then execute) never run concurrently.
+    """
+
+    def __init__(self, max_workers=4, max_queued=100, max_finished=1000):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = OrderedDict()
+        self._active = {}
+        self._waiting = {}
+        self._running_session = {}
+        self._lock = threading.Lock()
+        self.counters = {"submitted": 0, "deduplicated": 0, "rejected": 0,
+                         "done": 0, "failed": 0, "cancelled": 0}
+
+    def submit(self, kind, session_id, fn):
+        """
+        Queue `fn(job)` unless the session already has an active job of this kind.
+
+        The job waits, still "queued", while another job of the session is active.
+
+        Args:
+            kind (str): Pipeline stage (plan_subtasks, refine, execute, ...).
+            session_id (str): The session the job belongs to.
+            fn (callable): Runs the stage; receives the Job and returns a JSON-serializable result.
+
+        Returns:
+            Job: The new job, or the already active one for the same session and kind.
+
+        Raises:
+            QueueFullError: If `max_queued` jobs are already waiting.
+        """
+        with self._lock:
+            existing = self._active.get((session_id, kind))
+            if existing is not None and existing.active:
+                self.counters["deduplicated"] += 1
+                return existing
+            if self._queue_depth() >= self.max_queued:
+                self.counters["rejected"] += 1
+                raise QueueFullError(f"{self.max_queued} jobs already queued")
+            job = Job(kind, session_id)
+            self._jobs[job.job_id] = job
+            self._active[(session_id, kind)] = job
+            self.counters["submitted"] += 1
+            self._prune()
+            if session_id in self._running_session:
+                self._waiting.setdefault(session_id, deque()).append((job, fn))
+            else:
+                self._start(job, fn)
+            return job
+
+    def _start(self, job, fn):
+        self._running_session[job.session_id] = job
+        job.future = self._pool.submit(self._run, job, fn)
+
+    def _run(self, job, fn):
+        with self._lock:
+            if job.status != "queued":
+                return
+            job.status = "running"
+            job.started_at = time.time()
+        try:
+            result = fn(job)
+            status = "cancelled" if job.cancel_requested.is_set() else "done"
+            job.result = result
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as exc:
+            status = "failed"
+            job.error = repr(exc)
+        self._finish(job, status)
+
+    def _finish(self, job, status):
+        with self._lock:
+            job.status = status
+            job.finished_at = time.time()
+            self.counters[status] += 1
+            if self._active.get((job.session_id, job.kind)) is job:
+                del self._active[(job.session_id, job.kind)]
+            if self._running_session.get(job.session_id) is not job:
+                return
+            del self._running_session[job.session_id]
+            waiting = self._waiting.get(job.session_id)
+            while waiting:
+                next_job, fn = waiting.popleft()
+                if next_job.active:
+                    self._start(next_job, fn)
+                    break
+            if not waiting:
+                self._waiting.pop(job.session_id, None)
+
+    def cancel(self, job_id):
+        """
+        Cancel a job: queued jobs never start, running jobs stop at their next event.
+
+        Returns:
+            Job or None: The job, or None if the id is unknown.
+        """
+        job = self.get(job_id)
+        if job is None or not job.active:
+            return job
+        job.cancel_requested.set()
+        if job.future is None or job.future.cancel():
+            self._finish(job, "cancelled")
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _queue_depth(self):
+        return sum(1 for job in self._active.values() if job.status == "queued")
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def stats(self):
+        """
+        Return queue depth, running jobs and lifetime counters.
+        """
+        with self._lock:
+            running = sum(1 for job in self._active.values() if job.status == "running")
+            return dict(self.counters, queue_depth=self._queue_depth(), running=running,
+                        max_workers=self.max_workers, max_queued=self.max_queued)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
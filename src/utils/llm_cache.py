@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from src.utils.llm_client import ChatClientWrapper, attach_to_agent, split_messages
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite")
+
+
+def make_cache_key(model, params, system, user):
+    """
+    Build the content address of an LLM call.
+
+    Args:
+        model (str): Model name.
+        params (dict): Sampling parameters (temperature, max_tokens, ...).
+        system (str): System prompt.
+        user: User prompt or conversation (any JSON-serializable value).
+
+    Returns:
+        str: A SHA-256 hex digest identifying the call.
+    """
+    payload = json.dumps(
+        {"model": model, "params": params, "system": system, "user": user},
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    Two-tier cache for LLM responses: an in-memory LRU in front of an optional SQLite file.
+
+    Entries expire after `ttl` seconds (None = never). The memory tier holds at most
+    `max_entries` items and the disk tier at most `max_disk_entries`; the least
+    recently used entries are evicted first. All methods are thread-safe.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=1024, max_disk_entries=100000, ttl=None, enabled=True):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl = ttl
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0,
+                         "memory_evictions": 0, "disk_evictions": 0}
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def _expired(self, created, now):
+        return self.ttl is not None and now - created > self.ttl
+
+    def get(self, key):
+        """
+        Look up a cached value.
+
+        Args:
+            key (str): The cache key.
+
+        Returns:
+            str or None: The cached value, or None on a miss or when the cache is disabled.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created, now):
+                    self._memory.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+            if self._db is not None:
+                row = self._db.execute("SELECT value, created FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    value, created = row
+                    if not self._expired(created, now):
+                        self._db.execute("UPDATE llm_cache SET accessed = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, created, value)
+                        self.counters["disk_hits"] += 1
+                        return value
+                    self._db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                    self._db.commit()
+            self.counters["misses"] += 1
+            return None
+
+    def set(self, key, value):
+        """
+        Store a value in both tiers.
+
+        Args:
+            key (str): The cache key.
+            value (str): The serialized response.
+        """
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, value)
+            self.counters["writes"] += 1
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                self._evict_disk()
+                self._db.commit()
+
+    def _remember(self, key, created, value):
+        self._memory[key] = (created, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.counters["memory_evictions"] += 1
+
+    def _evict_disk(self):
+        if self.ttl is not None:
+            cursor = self._db.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl,))
+            self.counters["disk_evictions"] += cursor.rowcount
+        if self.max_disk_entries is None:
+            return
+        (count,) = self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        excess = count - self.max_disk_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM llm_cache WHERE key IN "
+                "(SELECT key FROM llm_cache ORDER BY accessed ASC LIMIT ?)",
+                (excess,)
+            )
+            self.counters["disk_evictions"] += excess
+
+    def clear(self):
+        """Remove every entry from both tiers."""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Return hit/miss counters and tier sizes.
+
+        Returns:
+            dict: Counters plus `memory_entries`, `disk_entries` and `hit_rate`.
+        """
+        with self._lock:
+            stats = dict(self.counters)
+            stats["memory_entries"] = len(self._memory)
+            stats["disk_entries"] = (
+                self._db.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] if self._db is not None else 0
+            )
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0
+        return stats
+
+
+class CachedClient(ChatClientWrapper):
+    """
+    Client wrapper that answers repeated chat completion calls from an LLMCache.
+
+    Streaming calls and calls made while `bypass` is set always go to the model.
+    """
+
+    def __init__(self, client, cache, bypass=False):
+        super().__init__(client)
+        self.cache = cache
+        self.bypass = bypass
+
+    def create(self, **kwargs):
+        if self.bypass or kwargs.get("stream"):
+            return super().create(**kwargs)
+        params = {k: v for k, v in kwargs.items() if k not in ("model", "messages")}
+        system, conversation = split_messages(kwargs.get("messages", []))
+        key = make_cache_key(kwargs.get("model"), params, system, conversation)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return _load_completion(cached)
+        response = super().create(**kwargs)
+        self.cache.set(key, response.model_dump_json())
+        return response
+
+
+def _load_completion(payload):
+    from openai.types.chat import ChatCompletion
+    return ChatCompletion.model_validate_json(payload)
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache():
+    """
+    Return the process-wide LLM cache, creating it on first use.
+
+    Configured through environment variables: STRATMIND_LLM_CACHE=off disables it,
+    STRATMIND_LLM_CACHE_PATH sets the SQLite file ("" keeps it in memory only) and
+    STRATMIND_LLM_CACHE_TTL sets the expiry in seconds.
+
+    Returns:
+        LLMCache: The shared cache.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            ttl = os.getenv("STRATMIND_LLM_CACHE_TTL")
+            _default_cache = LLMCache(
+                path=os.getenv("STRATMIND_LLM_CACHE_PATH", DEFAULT_CACHE_PATH) or None,
+                ttl=float(ttl) if ttl else None,
+                enabled=os.getenv("STRATMIND_LLM_CACHE", "on").lower() not in ("0", "off", "false")
+            )
+        return _default_cache
+
+
+def enable_llm_cache(agent, cache=None, bypass=False):
+    """
+    Route an agent's model calls through an LLM cache.
+
+    Args:
+        agent: The agent whose `client` is wrapped.
+        cache (LLMCache): The cache to use. Defaults to the process-wide cache.
+        bypass (bool): Skip the cache for this agent (calls still reach the model).
+
+    Returns:
+        The same agent.
+    """
+    cache = cache or get_default_cache()
+    return attach_to_agent(agent, lambda client: CachedClient(client, cache, bypass=bypass))
@@ -0,0 +1,68 @@
+from types import SimpleNamespace
+
+
+class ChatClientWrapper:
+    """
+    Base class for middleware around an OpenAI-style client.
+
+    Exposes the same `client.chat.completions.create(**kwargs)` surface the agents
+    already call, routed through `create`. Subclasses override `create` and call
+    `super().create(**kwargs)` to reach the wrapped client. Any other attribute is
+    forwarded to the wrapped client, so wrappers can be stacked.
+    """
+
+    def __init__(self, client):
+        self._client = client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        """
+        Forward a chat completion request to the wrapped client.
+
+        Args:
+            **kwargs: Arguments of `chat.completions.create` (model, messages, temperature, ...).
+
+        Returns:
+            The completion returned by the wrapped client.
+        """
+        return self._client.chat.completions.create(**kwargs)
+
+    def __getattr__(self, name):
+        if name == "_client":
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+
+def split_messages(messages):
+    """
+    Split chat messages into the system prompt and the rest of the conversation.
+
+    Args:
+        messages (list): Chat messages with `role` and `content`.
+
+    Returns:
+        tuple: (system, conversation) where `system` joins every system message and
+            `conversation` is the list of non-system messages.
+    """
+    system = "\n".join(m.get("content") or "" for m in messages if m.get("role") == "system")
+    conversation = [m for m in messages if m.get("role") != "system"]
+    return system, conversation
+
+
+def attach_to_agent(agent, wrap):
+    """
+    Wrap the model client of an agent in place.
+
+    Agents keep their OpenAI client on `agent.client`; agents without one are left untouched.
+
+    Args:
+        agent: Any agent instance (SpecifyAgent, Decomposer, TaskRefiner, ...).
+        wrap (callable): Takes the current client and returns the wrapped one.
+
+    Returns:
+        The same agent, for chaining.
+    """
+    client = getattr(agent, "client", None)
+    if client is not None:
+        agent.client = wrap(client)
+    return agent
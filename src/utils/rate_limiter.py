@@ -0,0 +1,331 @@
+import heapq
+import itertools
+import math
+import os
+import random
+import threading
+import time
+from functools import partial
+
+from src.utils.llm_client import ChatClientWrapper, attach_to_agent
+
+# Lower value = served first. Interactive calls (/clarify) overtake queued batch work (/execute).
+LANES = {"interactive": 0, "default": 1, "batch": 2}
+RETRYABLE_ERRORS = ("RateLimitError", "APITimeoutError", "APIConnectionError", "InternalServerError")
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` units per second up to `capacity` (one minute's worth by default).
+
+    Not thread-safe on its own; RequestGovernor uses it under its lock.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        """Seconds until `amount` units are available (amounts above capacity wait for a full bucket)."""
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount, now):
+        self._refill(now)
+        self.level -= amount
+
+    def give(self, amount):
+        self.level = min(self.capacity, self.level + amount)
+
+
+def classify_error(exc):
+    """
+    Decide whether a failed model call should be retried.
+
+    Returns:
+        tuple: (retryable, retry_after) where `retry_after` is the server's Retry-After
+            delay in seconds, or None.
+    """
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    retryable = (
+        status == 429
+        or (isinstance(status, int) and status >= 500)
+        or type(exc).__name__ in RETRYABLE_ERRORS
+        or isinstance(exc, (TimeoutError, ConnectionError))
+    )
+    retry_after = None
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            retry_after = float(headers["retry-after-ms"]) / 1000
+        elif headers.get("retry-after"):
+            retry_after = float(headers["retry-after"])
+    except (TypeError, ValueError):
+        retry_after = None
+    return retryable, retry_after
+
+
+def estimate_request_tokens(kwargs, completion_tokens):
+    """
+    Tokens a chat request will consume: ~4 characters per prompt token plus the completion allowance.
+    """
+    chars = sum(len(m.get("content") or "") for m in kwargs.get("messages", []) if isinstance(m.get("content"), str))
+    return math.ceil(chars / 4) + (kwargs.get("max_tokens") or completion_tokens)
+
+
+class RequestGovernor:
+    """
+    Admission control shared by every model call of the process.
+
+    A call is admitted when it is first in its priority order (lane, then arrival),
+    fewer than `limit` calls are in flight, and the request-per-minute and
+    token-per-minute buckets can pay for it. The concurrency limit follows AIMD:
+    +1/limit after each success, halved (at most once per `decrease_interval`)
+    after a 429/5xx/timeout, and all admissions pause for the server's Retry-After.
+    Failed calls are retried with exponential backoff and full jitter.
+
+    Args:
+        rpm (int): Requests per minute (None = unlimited).
+        tpm (int): Tokens per minute (None = unlimited).
+        max_concurrency (int): Upper bound of the adaptive concurrency limit.
+        min_concurrency (int): Lower bound of the adaptive concurrency limit.
+        max_retries (int): Retries of a retryable failure before it is raised.
+        base_delay (float): First backoff delay in seconds.
+        max_delay (float): Backoff cap in seconds.
+        completion_tokens (int): Completion allowance when a call sets no max_tokens.
+        decrease_interval (float): Minimum seconds between two multiplicative decreases.
+    """
+
+    def __init__(self, rpm=500, tpm=200000, max_concurrency=16, min_concurrency=1, max_retries=6,
+                 base_delay=0.5, max_delay=60.0, completion_tokens=512, decrease_interval=2.0):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = float(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.completion_tokens = completion_tokens
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self._last_decrease = 0.0
+        self._waiting = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.counters = {"requests": 0, "retries": 0, "throttled": 0, "failures": 0,
+                         "decreases": 0, "tokens": 0, "wait_s": 0.0}
+
+    def _admission_wait(self, tokens, now):
+        wait = self.paused_until - now
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(tokens, now))
+        return wait
+
+    def _acquire(self, lane, tokens):
+        ticket = (LANES.get(lane, LANES["default"]), next(self._seq))
+        start = time.monotonic()
+        with self._cond:
+            heapq.heappush(self._waiting, ticket)
+            try:
+                while True:
+                    timeout = None
+                    if self._waiting[0] == ticket and self.in_flight < int(self.limit):
+                        now = time.monotonic()
+                        timeout = self._admission_wait(tokens, now)
+                        if timeout <= 0:
+                            if self.requests is not None:
+                                self.requests.take(1, now)
+                            if self.tokens is not None:
+                                self.tokens.take(tokens, now)
+                            self.in_flight += 1
+                            self.counters["requests"] += 1
+                            self.counters["wait_s"] += now - start
+                            return
+                    self._cond.wait(timeout=timeout)
+            finally:
+                self._waiting.remove(ticket)
+                heapq.heapify(self._waiting)
+                self._cond.notify_all()
+
+    def _release(self, reserved, used=None, throttled=False, retry_after=None):
+        with self._cond:
+            self.in_flight -= 1
+            if self.tokens is not None and used is not None:
+                self.tokens.give(reserved - used)
+            self.counters["tokens"] += reserved if used is None else used
+            now = time.monotonic()
+            if throttled:
+                self.counters["throttled"] += 1
+                if now - self._last_decrease >= self.decrease_interval:
+                    self.limit = max(self.min_concurrency, self.limit / 2)
+                    self._last_decrease = now
+                    self.counters["decreases"] += 1
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+            elif used is not None:
+                self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def call(self, fn, lane="default", tokens=0):
+        """
+        Run one model call under admission control, retrying retryable failures.
+
+        Args:
+            fn (callable): Makes the call; takes no arguments.
+            lane (str): "interactive", "default" or "batch".
+            tokens (int): Estimated tokens of the call, reconciled with `usage` afterwards.
+
+        Returns:
+            The value returned by `fn`.
+        """
+        if self.tokens is not None:
+            tokens = min(tokens, self.tokens.capacity)
+        for attempt in range(self.max_retries + 1):
+            self._acquire(lane, tokens)
+            try:
+                response = fn()
+            except Exception as exc:
+                retryable, retry_after = classify_error(exc)
+                self._release(tokens, throttled=retryable, retry_after=retry_after)
+                if not retryable or attempt == self.max_retries:
+                    with self._cond:
+                        self.counters["failures"] += 1
+                    raise
+                with self._cond:
+                    self.counters["retries"] += 1
+                time.sleep(retry_after if retry_after is not None else self.backoff(attempt))
+                continue
+            usage = getattr(response, "usage", None)
+            self._release(tokens, used=getattr(usage, "total_tokens", None) or tokens)
+            return response
+
+    def stats(self):
+        with self._cond:
+            waiting = {lane: 0 for lane in LANES}
+            names = {value: lane for lane, value in LANES.items()}
+            for priority, _ in self._waiting:
+                waiting[names[priority]] += 1
+            return dict(self.counters, wait_s=round(self.counters["wait_s"], 3), limit=round(self.limit, 2),
+                        in_flight=self.in_flight, waiting=waiting,
+                        paused_s=round(max(0.0, self.paused_until - time.monotonic()), 2))
+
+
+class GovernedClient(ChatClientWrapper):
+    """
+    Routes every chat completion of the wrapped client through a RequestGovernor lane.
+    """
+
+    def __init__(self, client, governor, lane="default"):
+        super().__init__(client)
+        self.governor = governor
+        self.lane = lane
+
+    def create(self, **kwargs):
+        tokens = estimate_request_tokens(kwargs, self.governor.completion_tokens)
+        return self.governor.call(partial(super().create, **kwargs), lane=self.lane, tokens=tokens)
+
+
+_default_governor = None
+_default_governor_lock = threading.Lock()
+
+
+def governor_budget(shares=1):
+    """
+    Return the configured governor budget, divided between `shares` processes.
+
+    Read from STRATMIND_RPM, STRATMIND_TPM (0 = unlimited) and STRATMIND_MAX_CONCURRENCY.
+    Each share gets at least one request per minute, one token per minute and one call
+    in flight; unlimited budgets stay unlimited.
+
+    Returns:
+        dict: rpm, tpm and max_concurrency for one share.
+    """
+    shares = max(1, shares)
+    rpm = int(os.getenv("STRATMIND_RPM", "500"))
+    tpm = int(os.getenv("STRATMIND_TPM", "200000"))
+    concurrency = int(os.getenv("STRATMIND_MAX_CONCURRENCY", "16"))
+    return {
+        "rpm": max(1, rpm // shares) if rpm else 0,
+        "tpm": max(1, tpm // shares) if tpm else 0,
+        "max_concurrency": max(1, concurrency // shares)
+    }
+
+
+def get_default_governor():
+    """
+    Return the process-wide governor, creating it on first use with `governor_budget()`.
+    """
+    global _default_governor
+    with _default_governor_lock:
+        if _default_governor is None:
+            _default_governor = RequestGovernor(**governor_budget())
+        return _default_governor
+
+
+def share_default_governor(shares):
+    """
+    Give this process's governor its share of a budget split between `shares` processes.
+
+    The governor only sees the calls of its own process, so worker processes that share
+    an API key each call this once (e.g. as a pool initializer) to stay within the
+    configured budget together.
+
+    Returns:
+        RequestGovernor: The new process-wide governor.
+    """
+    global _default_governor
+    with _default_governor_lock:
+        _default_governor = RequestGovernor(**governor_budget(shares))
+        return _default_governor
+
+
+def without_sdk_retries(client):
+    """
+    Switch off the OpenAI client's built-in retries, looking through any middleware wrappers.
+    """
+    parent, inner = None, client
+    while isinstance(inner, ChatClientWrapper):
+        parent, inner = inner, inner._client
+    with_options = getattr(inner, "with_options", None)
+    if not callable(with_options) or getattr(inner, "max_retries", None) == 0:
+        return client
+    inner = with_options(max_retries=0)
+    if parent is None:
+        return inner
+    parent._client = inner
+    return client
+
+
+def enable_governor(agent, lane="default", governor=None):
+    """
+    Send an agent's model calls through the request governor.
+
+    The governor owns retries, so the OpenAI client's own retries are switched off.
+    Apply it outside `enable_tracing` (every attempt is traced) and inside
+    `enable_llm_cache` (cache hits skip the governor).
+
+    Args:
+        agent: The agent whose `client` is wrapped.
+        lane (str): Priority lane of the agent's calls.
+        governor (RequestGovernor): Defaults to the process-wide governor.
+
+    Returns:
+        The same agent.
+    """
+    governor = governor or get_default_governor()
+    return attach_to_agent(agent, lambda client: GovernedClient(without_sdk_retries(client), governor, lane))
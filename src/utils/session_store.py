@@ -0,0 +1,265 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+
+
+class SessionBusyError(RuntimeError):
+    """Raised when a session is locked by another stage and the lock could not be taken in time."""
+
+
+def _acquire(lock, timeout):
+    if timeout is None:
+        return lock.acquire()
+    return lock.acquire(timeout=timeout) if timeout > 0 else lock.acquire(blocking=False)
+
+
+class MemorySessionStore:
+    """
+    Bounded in-process session store.
+
+    Keeps at most `max_sessions` sessions, evicting the least recently used one, and
+    drops sessions that have not been touched for `ttl` seconds (None = never).
+    Sessions are stored by reference: `get` returns the live session, shared by every
+    request of the process. Stages that change a session hold `lock(session_id)` from
+    their `get` to their `set`, so two stages never modify it at the same time.
+    """
+
+    backend = "memory"
+
+    def __init__(self, max_sessions=1000, ttl=24 * 3600):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "busy": 0}
+
+    @contextmanager
+    def lock(self, session_id, timeout=0):
+        """
+        Hold the session's lock for the duration of a stage.
+
+        Args:
+            session_id (str): The session id.
+            timeout (float): Seconds to wait for another stage to finish (0 = fail at once,
+                None = wait as long as it takes).
+
+        Raises:
+            SessionBusyError: If the lock could not be taken in time.
+        """
+        with self._lock:
+            lock = self._locks.setdefault(session_id, threading.Lock())
+        if not _acquire(lock, timeout):
+            with self._lock:
+                self.counters["busy"] += 1
+            raise SessionBusyError(f"Session {session_id} is busy with another stage")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def get(self, session_id, default=None):
+        """
+        Return the session dict for `session_id`, or `default` if it is missing or expired.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and self.ttl is not None and now - entry[0] > self.ttl:
+                del self._sessions[session_id]
+                self.counters["expirations"] += 1
+                entry = None
+            if entry is None:
+                self.counters["misses"] += 1
+                return default
+            self._sessions[session_id] = (now, entry[1])
+            self._sessions.move_to_end(session_id)
+            self.counters["hits"] += 1
+            return entry[1]
+
+    def set(self, session_id, session):
+        """
+        Store (or replace) a session, evicting the least recently used ones over capacity.
+        """
+        with self._lock:
+            self._sessions[session_id] = (time.time(), session)
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                evicted, _ = self._sessions.popitem(last=False)
+                self._drop_lock(evicted)
+                self.counters["evictions"] += 1
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._drop_lock(session_id)
+
+    def _drop_lock(self, session_id):
+        lock = self._locks.get(session_id)
+        if lock is not None and not lock.locked():
+            del self._locks[session_id]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._sessions)
+
+    def stats(self):
+        """
+        Return size and eviction counters.
+        """
+        return dict(self.counters, backend=self.backend, size=len(self), max_sessions=self.max_sessions)
+
+
+class SQLiteSessionStore:
+    """
+    Session store backed by a SQLite file, shared by every process that opens it.
+
+    Sessions (task managers and task trees included) are pickled, so they survive
+    restarts and can be read by any uvicorn worker. Each `get` returns a fresh copy:
+    changes are only persisted by calling `set`, which overwrites the whole session.
+    Stages that change a session therefore hold `lock(session_id)` from their `get` to
+    their `set`; the lock is a lease row in the same file, so it holds across workers,
+    and expires after `lock_ttl` seconds if its holder died.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path, max_sessions=10000, ttl=7 * 24 * 3600, lock_ttl=3600):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "busy": 0}
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS session_locks ("
+            "session_id TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+        )
+        self._db.commit()
+
+    def _try_lock(self, session_id, owner):
+        now = time.time()
+        with self._lock:
+            self._db.execute("DELETE FROM session_locks WHERE session_id = ? AND expires < ?", (session_id, now))
+            cursor = self._db.execute(
+                "INSERT OR IGNORE INTO session_locks (session_id, owner, expires) VALUES (?, ?, ?)",
+                (session_id, owner, now + self.lock_ttl)
+            )
+            self._db.commit()
+            return cursor.rowcount == 1
+
+    @contextmanager
+    def lock(self, session_id, timeout=0, poll_interval=0.05):
+        """
+        Hold the session's lock for the duration of a stage (see `MemorySessionStore.lock`).
+
+        Raises:
+            SessionBusyError: If the lock could not be taken in time.
+        """
+        owner = uuid.uuid4().hex
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self._try_lock(session_id, owner):
+            if deadline is not None and time.monotonic() >= deadline:
+                with self._lock:
+                    self.counters["busy"] += 1
+                raise SessionBusyError(f"Session {session_id} is busy with another stage")
+            time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._db.execute("DELETE FROM session_locks WHERE session_id = ? AND owner = ?", (session_id, owner))
+                self._db.commit()
+
+    def get(self, session_id, default=None):
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT data, updated FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+                self._db.commit()
+                self.counters["expirations"] += 1
+                row = None
+            if row is None:
+                self.counters["misses"] += 1
+                return default
+            self._db.execute("UPDATE sessions SET updated = ? WHERE session_id = ?", (now, session_id))
+            self._db.commit()
+            self.counters["hits"] += 1
+        return pickle.loads(row[0])
+
+    def set(self, session_id, session):
+        data = pickle.dumps(session, protocol=pickle.HIGHEST_PROTOCOL)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated) VALUES (?, ?, ?)",
+                (session_id, data, now)
+            )
+            if self.ttl is not None:
+                cursor = self._db.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,))
+                self.counters["expirations"] += cursor.rowcount
+            (count,) = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            excess = count - self.max_sessions
+            if excess > 0:
+                self._db.execute(
+                    "DELETE FROM sessions WHERE session_id IN "
+                    "(SELECT session_id FROM sessions ORDER BY updated ASC LIMIT ?)",
+                    (excess,)
+                )
+                self.counters["evictions"] += excess
+            self._db.commit()
+
+    def delete(self, session_id):
+        with self._lock:
+            self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            self._db.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self):
+        stats = dict(self.counters, backend=self.backend, size=len(self), max_sessions=self.max_sessions)
+        stats["bytes"] = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return stats
+
+
+def create_session_store():
+    """
+    Create the session store configured through environment variables.
+
+    STRATMIND_SESSION_STORE selects the backend ("memory", default, or "sqlite"),
+    STRATMIND_SESSION_DB the SQLite file, STRATMIND_MAX_SESSIONS the capacity and
+    STRATMIND_SESSION_TTL the idle expiry in seconds.
+
+    The memory store hands out the live session and the SQLite store a copy; with
+    either, a stage that changes a session must `get` and `set` it under `lock`.
+
+    Returns:
+        MemorySessionStore or SQLiteSessionStore: The store.
+    """
+    backend = os.getenv("STRATMIND_SESSION_STORE", "memory").lower()
+    kwargs = {}
+    if os.getenv("STRATMIND_MAX_SESSIONS"):
+        kwargs["max_sessions"] = int(os.getenv("STRATMIND_MAX_SESSIONS"))
+    if os.getenv("STRATMIND_SESSION_TTL"):
+        kwargs["ttl"] = float(os.getenv("STRATMIND_SESSION_TTL"))
+    if backend == "sqlite":
+        return SQLiteSessionStore(os.getenv("STRATMIND_SESSION_DB", os.path.join(".cache", "sessions.sqlite")), **kwargs)
+    if backend != "memory":
+        raise ValueError(f"Unknown session store backend: {backend}")
+    return MemorySessionStore(**kwargs)
@@ -0,0 +1,161 @@
+import hashlib
+import math
+import random
+import re
+from collections import defaultdict
+
+WORD = re.compile(r"\w\w+")
+STEM_CHARS = 6
+NUM_PERM = 64
+BANDS = 32
+# Fixed seed: signatures must not change between processes
+_rng = random.Random(1729)
+MASKS = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+
+def task_text(task):
+    """
+    Text a task is compared on: title and description.
+    """
+    return f"{task.title or ''} {task.description or ''}"
+
+
+def shingles(text):
+    """
+    Set of word stems (first STEM_CHARS characters, so plurals and inflections match)
+    plus adjacent stem pairs.
+    """
+    stems = [word[:STEM_CHARS] for word in WORD.findall((text or "").lower())]
+    return set(stems) | {f"{a} {b}" for a, b in zip(stems, stems[1:])}
+
+
+def minhash(features):
+    """
+    NUM_PERM-value MinHash signature of a feature set.
+
+    Each feature is hashed once (64-bit BLAKE2b, stable across processes) and the
+    permutations are XOR masks of that hash, which keeps a signature to one min()
+    per permutation.
+    """
+    hashes = [int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+              for feature in features] or [0]
+    return tuple(min(h ^ mask for h in hashes) for mask in MASKS)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class SimilarityIndex:
+    """
+    Incremental near-duplicate and relevance index over short texts.
+
+    Near-duplicates come from MinHash/LSH (BANDS bands of NUM_PERM / BANDS rows, i.e.
+    candidates from roughly 0.2 Jaccard up) confirmed with the exact Jaccard of the
+    shingle sets. Relevance ranking uses an inverted index over single stems scored
+    with IDF weights. Adding, removing and querying cost O(shingles + matches); the
+    index is not thread-safe on its own (IndexedTaskManager calls it under its lock).
+    """
+
+    def __init__(self):
+        self._features = {}
+        self._groups = {}
+        self._signatures = {}
+        self._buckets = defaultdict(set)
+        self._postings = defaultdict(set)
+
+    def __len__(self):
+        return len(self._features)
+
+    def add(self, key, text, group=None):
+        """
+        Index (or re-index) a text under `key`, tagged with a group (e.g. the task's area).
+        """
+        self.remove(key)
+        features = shingles(text)
+        signature = minhash(features)
+        self._features[key] = features
+        self._groups[key] = group
+        self._signatures[key] = signature
+        for bucket in self._band_keys(signature):
+            self._buckets[bucket].add(key)
+        for feature in features:
+            if " " not in feature:
+                self._postings[feature].add(key)
+
+    def remove(self, key):
+        features = self._features.pop(key, None)
+        if features is None:
+            return
+        self._groups.pop(key, None)
+        for bucket in self._band_keys(self._signatures.pop(key)):
+            self._buckets[bucket].discard(key)
+            if not self._buckets[bucket]:
+                del self._buckets[bucket]
+        for feature in features:
+            postings = self._postings.get(feature)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._postings[feature]
+
+    @staticmethod
+    def _band_keys(signature):
+        rows = NUM_PERM // BANDS
+        return [(band, signature[band * rows:(band + 1) * rows]) for band in range(BANDS)]
+
+    def near_duplicates(self, key, threshold=0.5):
+        """
+        Keys whose shingle Jaccard with `key` is at least `threshold`.
+
+        Returns:
+            list: (other_key, similarity) pairs, most similar first.
+        """
+        features = self._features.get(key)
+        if features is None:
+            return []
+        candidates = set()
+        for bucket in self._band_keys(self._signatures[key]):
+            candidates |= self._buckets.get(bucket, set())
+        candidates.discard(key)
+        matches = [(other, jaccard(features, self._features[other])) for other in candidates]
+        return sorted((m for m in matches if m[1] >= threshold), key=lambda m: -m[1])
+
+    def score(self, query, keys=None):
+        """
+        IDF-weighted stem overlap between a query text and the indexed texts.
+
+        Args:
+            query (str): The query text.
+            keys (iterable): Restrict scoring to these keys (default: every match).
+
+        Returns:
+            dict: key -> score, for keys sharing at least one stem with the query.
+        """
+        total = len(self._features) or 1
+        allowed = set(keys) if keys is not None else None
+        scores = defaultdict(float)
+        for feature in shingles(query):
+            postings = self._postings.get(feature)
+            if " " in feature or not postings:
+                continue
+            weight = math.log(1 + total / len(postings))
+            for key in postings:
+                if allowed is None or key in allowed:
+                    scores[key] += weight
+        return scores
+
+    def top_k(self, query, k, exclude_group=None):
+        """
+        The `k` keys most relevant to a query, optionally outside one group.
+
+        Returns:
+            list: (key, score) pairs, best first.
+        """
+        scores = self.score(query)
+        ranked = sorted(
+            ((key, score) for key, score in scores.items() if exclude_group is None
+             or self._groups.get(key) != exclude_group),
+            key=lambda item: -item[1]
+        )
+        return ranked[:k]
@@ -0,0 +1,208 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, TimeoutError
+
+
+def history_key(history):
+    """
+    Content hash of a clarification history; speculations are only reused for the same key.
+    """
+    payload = json.dumps(history, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def looks_complete(history, agent_response, min_turns=0):
+    """
+    Is the clarification done, so synthesis can start before the user asks for it?
+
+    True on the explicit completion signals /clarify reports as `finished`: the agent
+    says the task is fully specified, or the user's last message is "finish". With
+    `min_turns` > 0, also once the user has answered `min_turns` times.
+    """
+    if "fully specified" in (agent_response or "").lower():
+        return True
+    user_messages = [message.get("content") or "" for message in history if message.get("role") == "user"]
+    if user_messages and user_messages[-1].strip().lower() == "finish":
+        return True
+    return bool(min_turns) and len(user_messages) >= min_turns
+
+
+class Speculation:
+    """
+    Background synthesis, then decomposition, of one clarification history.
+
+    `synthesis` and `decomposition` are futures that /synthesize and /decompose can
+    wait on; `cancel()` drops whatever has not started yet.
+    """
+
+    def __init__(self, key):
+        self.key = key
+        self.synthesis = Future()
+        self.decomposition = Future()
+        self._cancelled = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        self._cancelled.set()
+        self.synthesis.cancel()
+        self.decomposition.cancel()
+
+    def run(self, history, synthesize_fn, decompose_fn):
+        if self.cancelled:
+            return
+        try:
+            spec = synthesize_fn(history)
+        except Exception as exc:
+            self._fail(self.synthesis, exc)
+            self._fail(self.decomposition, exc)
+            return
+        self._resolve(self.synthesis, spec)
+        if self.cancelled:
+            return
+        try:
+            self._resolve(self.decomposition, decompose_fn(spec))
+        except Exception as exc:
+            self._fail(self.decomposition, exc)
+
+    @staticmethod
+    def _resolve(future, value):
+        if future.set_running_or_notify_cancel():
+            future.set_result(value)
+
+    @staticmethod
+    def _fail(future, exc):
+        if future.set_running_or_notify_cancel():
+            future.set_exception(exc)
+
+
+class Speculator:
+    """
+    Runs synthesis and decomposition ahead of the user, one speculation per session.
+
+    Each clarify turn that looks complete starts a speculation keyed by the hash of
+    the history; a new history for the same session cancels the previous one (a
+    model call already in flight finishes, but its result is dropped and the next
+    stage never starts). /synthesize and /decompose take the speculative result when
+    the history, and for decomposition the spec, are unchanged, waiting for it up to
+    a timeout if it is still running, and fall back to computing it themselves
+    otherwise.
+
+    Args:
+        executor (Executor): Runs the speculations. It must not be the pool the
+            callers of `take_*` wait on, or a full pool deadlocks.
+        max_sessions (int): Sessions tracked at once; the least recently used are dropped.
+    """
+
+    def __init__(self, executor, max_sessions=1000):
+        self.executor = executor
+        self.max_sessions = max_sessions
+        self._by_session = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"started": 0, "cancelled": 0, "synthesis_hits": 0, "decomposition_hits": 0,
+                         "misses": 0, "failed": 0, "timeouts": 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def speculate(self, session_id, history, synthesize_fn, decompose_fn):
+        """
+        Start a speculation for this history, unless one is already running for it.
+
+        Args:
+            session_id (str): The session id.
+            history (list): The clarification history.
+            synthesize_fn (callable): history -> spec dict.
+            decompose_fn (callable): spec -> decomposition result.
+
+        Returns:
+            Speculation: The session's speculation.
+        """
+        key = history_key(history)
+        with self._lock:
+            current = self._by_session.get(session_id)
+            if current is not None and current.key == key and not current.cancelled:
+                self._by_session.move_to_end(session_id)
+                return current
+            speculation = Speculation(key)
+            self._by_session[session_id] = speculation
+            self._by_session.move_to_end(session_id)
+            stale = [current] if current is not None else []
+            while len(self._by_session) > self.max_sessions:
+                stale.append(self._by_session.popitem(last=False)[1])
+            self.counters["started"] += 1
+        for old in stale:
+            self._cancel(old)
+        self.executor.submit(speculation.run, list(history), synthesize_fn, decompose_fn)
+        return speculation
+
+    def _cancel(self, speculation):
+        if not speculation.cancelled:
+            speculation.cancel()
+            self._count("cancelled")
+
+    def discard(self, session_id, keep_history=None):
+        """
+        Cancel the session's speculation, unless it was started for `keep_history`.
+        """
+        keep = history_key(keep_history) if keep_history is not None else None
+        with self._lock:
+            current = self._by_session.get(session_id)
+            if current is None or current.key == keep:
+                return
+            del self._by_session[session_id]
+        self._cancel(current)
+
+    def _take(self, session_id, history, stage, timeout, spec=None):
+        with self._lock:
+            current = self._by_session.get(session_id)
+        if current is None or current.key != history_key(history) or current.cancelled:
+            self._count("misses")
+            return None
+        try:
+            if spec is not None and current.synthesis.result(timeout=timeout) != spec:
+                self._count("misses")
+                return None
+            value = getattr(current, stage).result(timeout=timeout)
+        except CancelledError:
+            self._count("misses")
+            return None
+        except TimeoutError:
+            self._count("timeouts")
+            return None
+        except Exception:
+            self._count("failed")
+            return None
+        self._count(f"{stage}_hits")
+        return value
+
+    def take_synthesis(self, session_id, history, timeout=None):
+        """
+        Return the speculative spec for this history, or None.
+
+        Waits at most `timeout` seconds (None = no limit) for a running speculation.
+        """
+        return self._take(session_id, history, "synthesis", timeout)
+
+    def take_decomposition(self, session_id, history, spec, timeout=None):
+        """
+        Return the speculative decomposition for this history and spec, or None.
+
+        The speculation is consumed: a later /decompose computes a fresh one. Waits at
+        most `timeout` seconds, like `take_synthesis`.
+        """
+        value = self._take(session_id, history, "decomposition", timeout, spec=spec)
+        if value is not None:
+            with self._lock:
+                self._by_session.pop(session_id, None)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, sessions=len(self._by_session),
+                        running=sum(1 for s in self._by_session.values() if not s.decomposition.done()))
@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+from src.utils.task_graph import iter_tasks
+
+# Task attributes set by the pipeline that `to_dict` may leave out of the planned tree
+EXTRA_FIELDS = ("intro", "duplicate_of")
+# Tree keys that `restore_task_tree` passes to `create_task` or handles itself
+STRUCTURE_FIELDS = ("task_id", "title", "description", "expected_output", "area", "responsibilities",
+                    "execution_type", "parent", "parent_id", "dependencies", "subtasks")
+
+
+def tree_dict(root_task):
+    """
+    Return `root_task.to_dict()` with the EXTRA_FIELDS of every task filled in.
+    """
+    tree = root_task.to_dict()
+    tasks = {task.task_id: task for task in iter_tasks(root_task)}
+    stack = [tree]
+    while stack:
+        node = stack.pop()
+        task = tasks.get(node.get("task_id"))
+        for name in EXTRA_FIELDS:
+            if name not in node and getattr(task, name, None) is not None:
+                node[name] = getattr(task, name)
+        stack.extend(node.get("subtasks") or [])
+    return tree
+
+
+class TaskCheckpoint:
+    """
+    Append-only JSONL checkpoint of a task tree execution.
+
+    The first record holds the planned tree (`tree_dict(root_task)` before execution);
+    every following record holds the result and prompt of one task the moment it
+    finishes. Each line is flushed and fsynced, so a crash loses at most the task that
+    was running. A trailing partial line (crash mid-write) is ignored when loading.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _append(self, record):
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def write_tree(self, root_task):
+        """
+        Record the planned tree, unless the checkpoint already holds one.
+
+        Args:
+            root_task (Task): The root task, after planning and refinement.
+        """
+        if self.load()[0] is None:
+            self._append({"type": "tree", "ts": time.time(), "tree": tree_dict(root_task)})
+
+    def record(self, task_id, result, prompt=None):
+        """
+        Record the result of one finished task.
+        """
+        self._append({"type": "result", "ts": time.time(), "task_id": task_id, "result": result, "prompt": prompt})
+
+    def on_event(self, event):
+        """
+        Pipeline `on_event` callback: records every `task_finished` event.
+        """
+        if event.get("event") == "task_finished":
+            self.record(event["task_id"], event.get("result"), event.get("prompt"))
+
+    def wrap_events(self, on_event=None):
+        """
+        Return an `on_event` callback that records into the checkpoint and then calls `on_event`.
+        """
+        def callback(event):
+            self.on_event(event)
+            if on_event is not None:
+                on_event(event)
+        return callback
+
+    def load(self):
+        """
+        Read the checkpoint.
+
+        Returns:
+            tuple: (tree, results) where `tree` is the planned tree dict (or None) and
+                `results` maps task_id to its latest result record.
+        """
+        tree, results = None, {}
+        if not os.path.exists(self.path):
+            return tree, results
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                if record["type"] == "tree" and tree is None:
+                    tree = record["tree"]
+                elif record["type"] == "result":
+                    results[record["task_id"]] = record
+        return tree, results
+
+    def restore(self, root_task):
+        """
+        Copy checkpointed results and prompts onto the matching tasks of a tree.
+
+        Args:
+            root_task (Task): A tree whose task ids match the checkpoint.
+
+        Returns:
+            set: Ids of the tasks that got their result back.
+        """
+        _, results = self.load()
+        restored = set()
+        for task in iter_tasks(root_task):
+            record = results.get(task.task_id)
+            if record is not None:
+                task.result = record["result"]
+                if record.get("prompt") is not None:
+                    task.prompt = record["prompt"]
+                restored.add(task.task_id)
+        return restored
+
+    def compact(self, metadata=None):
+        """
+        Build the final nested tree from the checkpoint, in the export_task_tree shape.
+
+        Args:
+            metadata (dict): Stored as `_metadata` on the root.
+
+        Returns:
+            dict: The nested tree with every checkpointed result and prompt filled in.
+        """
+        tree, results = self.load()
+        if tree is None:
+            raise ValueError(f"No tree recorded in checkpoint {self.path}")
+        stack = [tree]
+        while stack:
+            node = stack.pop()
+            record = results.get(node["task_id"])
+            if record is not None:
+                if record.get("prompt") is not None:
+                    node["prompt"] = record["prompt"]
+                node["result"] = record["result"]
+            stack.extend(node.get("subtasks") or [])
+        if metadata is not None:
+            tree["_metadata"] = metadata
+        return tree
+
+
+def restore_task_tree(tree, task_manager):
+    """
+    Recreate Task objects, with their original ids, from a checkpointed tree dict.
+
+    Every other recorded field (intro, duplicate_of, result, prompt, ...) is set back
+    on its task as an attribute.
+
+    Args:
+        tree (dict): The planned tree recorded in a checkpoint.
+        task_manager (IndexedTaskManager): An empty task manager to create the tasks in.
+
+    Returns:
+        Task: The restored root task.
+    """
+    stack = [(tree, None)]
+    root_task = None
+    while stack:
+        node, parent = stack.pop()
+        task = task_manager.create_task(
+            title=node["title"],
+            description=node["description"],
+            expected_output=node["expected_output"],
+            area=node.get("area"),
+            responsibilities=node.get("responsibilities", []),
+            parent_id=parent.task_id if parent is not None else None,
+            execution_type=node.get("execution_type", "llm")
+        )
+        del task_manager.tasks[task.task_id]
+        task.task_id = node["task_id"]
+        task.dependencies = list(node.get("dependencies", []))
+        for name, value in node.items():
+            if name not in STRUCTURE_FIELDS and not name.startswith("_"):
+                setattr(task, name, value)
+        task_manager.tasks[task.task_id] = task
+        root_task = root_task or task
+        stack.extend((child, task) for child in reversed(node.get("subtasks") or []))
+    task_manager.rebuild_indexes()
+    return root_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compact a JSONL execution checkpoint into a task tree JSON.")
+    parser.add_argument("checkpoint", help="Checkpoint .jsonl file.")
+    parser.add_argument("output", help="Destination .json file.")
+    args = parser.parse_args()
+    tree = TaskCheckpoint(args.checkpoint).compact()
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(tree, f, indent=2, ensure_ascii=False)
+    print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
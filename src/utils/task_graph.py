@@ -0,0 +1,356 @@
+from collections import deque
+
+
+class CycleError(ValueError):
+    """
+    Raised when the dependency graph of a task tree contains a cycle.
+
+    Attributes:
+        cycle (list): Node keys involved in the cycle, in order.
+    """
+
+    def __init__(self, cycle):
+        self.cycle = list(cycle)
+        super().__init__(f"Dependency cycle detected: {' -> '.join(map(str, self.cycle))}")
+
+
+def iter_tasks(root_task):
+    """
+    Iterate over every task of the tree in pre-order (parent before children).
+
+    Args:
+        root_task (Task): The root of the tree.
+
+    Yields:
+        Task: Each task of the tree.
+    """
+    stack = [root_task]
+    while stack:
+        task = stack.pop()
+        yield task
+        stack.extend(reversed(getattr(task, "subtasks", []) or []))
+
+
+def dependency_ids(task):
+    """
+    Return the dependency task ids of a task.
+
+    Dependencies may be stored as task ids or as Task objects; both are normalized to ids.
+
+    Args:
+        task (Task): The task.
+
+    Returns:
+        list: The task ids this task depends on.
+    """
+    return [getattr(dep, "task_id", dep) for dep in (getattr(task, "dependencies", None) or [])]
+
+
+def topological_order(nodes, edges):
+    """
+    Order the nodes of a directed graph so every edge goes from an earlier to a later node.
+
+    Uses Kahn's algorithm; ties keep the input order of `nodes`, so the result is deterministic.
+
+    Args:
+        nodes (list): Hashable node keys.
+        edges (dict): Maps a node to the nodes that must come after it.
+
+    Returns:
+        list: The nodes in topological order.
+
+    Raises:
+        CycleError: If the graph contains a cycle.
+    """
+    indegree = {node: 0 for node in nodes}
+    for node in nodes:
+        for succ in edges.get(node, ()):
+            indegree[succ] += 1
+    ready = deque(node for node in nodes if indegree[node] == 0)
+    order = []
+    while ready:
+        node = ready.popleft()
+        order.append(node)
+        for succ in edges.get(node, ()):
+            indegree[succ] -= 1
+            if indegree[succ] == 0:
+                ready.append(succ)
+    if len(order) != len(nodes):
+        remaining = {node for node in nodes if indegree[node] > 0}
+        raise CycleError(find_cycle(remaining, edges))
+    return order
+
+
+def find_cycle(nodes, edges):
+    """
+    Find one cycle among the nodes left over by Kahn's algorithm.
+
+    Every leftover node still has a leftover predecessor, so walking predecessors
+    always ends up revisiting a node.
+
+    Args:
+        nodes (set): Nodes that could not be ordered.
+        edges (dict): Maps a node to its successors.
+
+    Returns:
+        list: The nodes of one cycle in edge direction, with the first node repeated at the end.
+    """
+    preds = {}
+    for node in nodes:
+        for succ in edges.get(node, ()):
+            if succ in nodes:
+                preds.setdefault(succ, node)
+    node = next(iter(nodes))
+    seen = {}
+    walk = []
+    while node not in seen:
+        seen[node] = len(walk)
+        walk.append(node)
+        node = preds[node]
+    cycle = walk[seen[node]:]
+    cycle.reverse()
+    return cycle + [cycle[0]]
+
+
+class DanglingDependencyError(ValueError):
+    """
+    Raised by a strict graph check when tasks depend on ids that are not in the tree.
+
+    Attributes:
+        dangling (list): (task_id, missing dependency id) pairs.
+    """
+
+    def __init__(self, dangling):
+        self.dangling = list(dangling)
+        super().__init__(f"{len(self.dangling)} dependencies point outside the tree: "
+                         + ", ".join(f"{task_id} -> {dep_id}" for task_id, dep_id in self.dangling[:5]))
+
+
+def _fields(node):
+    """
+    (task_id, dependency ids, subtasks) of a Task or of an exported task dict.
+    """
+    if isinstance(node, dict):
+        deps = node.get("dependencies") or []
+        return (node.get("task_id"), [dep.get("task_id") if isinstance(dep, dict) else dep for dep in deps],
+                node.get("subtasks") or [])
+    return node.task_id, dependency_ids(node), getattr(node, "subtasks", None) or []
+
+
+def cyclic_components(nodes, edges):
+    """
+    Strongly connected components that contain a cycle (iterative Tarjan, linear time).
+
+    Args:
+        nodes (list): Node keys.
+        edges (dict): Maps a node to its successors; successors outside `nodes` are ignored.
+
+    Returns:
+        list: One set of nodes per component with more than one node or a self-loop.
+    """
+    members = set(nodes)
+    index, low, on_stack = {}, {}, set()
+    stack, components = [], []
+    for start in nodes:
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(edges.get(start, ())))]
+        while work:
+            node, successors = work[-1]
+            for succ in successors:
+                if succ not in members:
+                    continue
+                if succ not in index:
+                    index[succ] = low[succ] = len(index)
+                    stack.append(succ)
+                    on_stack.add(succ)
+                    work.append((succ, iter(edges.get(succ, ()))))
+                    break
+                if succ in on_stack:
+                    low[node] = min(low[node], index[succ])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = set()
+                    while True:
+                        member = stack.pop()
+                        on_stack.discard(member)
+                        component.add(member)
+                        if member == node:
+                            break
+                    if len(component) > 1 or node in edges.get(node, ()):
+                        components.append(component)
+    return components
+
+
+def analyze_task_graph(root_task):
+    """
+    Validate the dependency graph of a task tree and measure its parallelism, in linear time.
+
+    The graph has an edge from every dependency to its dependent and from every
+    child to its parent (a parent consumes its children's results). The root and
+    area tasks with subtasks only aggregate, so they weigh nothing; every other task
+    weighs one. A task's level is the number of tasks on the longest chain before
+    it, so all tasks of a level can run at once: the widest level is the maximum
+    parallelism the tree allows, and work / critical path the average.
+
+    Args:
+        root_task (Task | dict): The root task, or an exported task tree.
+
+    Returns:
+        dict: order (task ids, children and dependencies first), task_count,
+            dependency_edges, dangling ((task_id, dep_id) pairs), duplicate_ids,
+            cycles (one id cycle per strongly connected component), cyclic_tasks,
+            blocked_tasks (downstream of a cycle), work (weighted tasks),
+            critical_path (task ids), critical_path_length, level_widths,
+            max_parallelism and avg_parallelism. With cycles, the path and level
+            metrics cover the tasks that can still be ordered.
+    """
+    # Flat arrays (no list per task) keep 100k-task trees cheap for the garbage collector
+    ids, weights, heads, tails = [], [], [], []
+    dep_tasks, dep_ids = [], []
+    position = {}
+    duplicate_ids = 0
+    stack = [(root_task, 0, -1)]
+    while stack:
+        node, depth, parent = stack.pop()
+        task_id, deps, children = _fields(node)
+        if task_id in position:
+            duplicate_ids += 1
+            continue
+        i = len(ids)
+        position[task_id] = i
+        ids.append(task_id)
+        weights.append(0 if depth <= 1 and children else 1)
+        if parent >= 0:
+            heads.append(i)
+            tails.append(parent)
+        for dep_id in deps:
+            dep_tasks.append(i)
+            dep_ids.append(dep_id)
+        stack.extend((child, depth + 1, i) for child in reversed(children))
+
+    dangling = []
+    for i, dep_id in zip(dep_tasks, dep_ids):
+        j = position.get(dep_id)
+        if j is None:
+            dangling.append((ids[i], dep_id))
+        else:
+            heads.append(j)
+            tails.append(i)
+    dependency_edges = len(dep_ids) - len(dangling)
+
+    # Successors in compressed sparse row form: succ[offset[i]:offset[i + 1]]
+    n = len(ids)
+    offset = [0] * (n + 1)
+    indegree = [0] * n
+    for head, tail in zip(heads, tails):
+        offset[head + 1] += 1
+        indegree[tail] += 1
+    for i in range(n):
+        offset[i + 1] += offset[i]
+    cursor = offset[:-1]
+    succ = [0] * len(heads)
+    for head, tail in zip(heads, tails):
+        succ[cursor[head]] = tail
+        cursor[head] += 1
+
+    # Kahn's algorithm, relaxing the longest path as nodes are released
+    start = [0] * n
+    best_pred = [-1] * n
+    ready = deque(i for i in range(n) if indegree[i] == 0)
+    order = []
+    while ready:
+        i = ready.popleft()
+        order.append(i)
+        finish = start[i] + weights[i]
+        for k in range(offset[i], offset[i + 1]):
+            j = succ[k]
+            if finish > start[j]:
+                start[j] = finish
+                best_pred[j] = i
+            indegree[j] -= 1
+            if indegree[j] == 0:
+                ready.append(j)
+
+    cycles = []
+    cyclic = 0
+    if len(order) < n:
+        left = [i for i in range(n) if indegree[i] > 0]
+        edges = {i: succ[offset[i]:offset[i + 1]] for i in left}
+        for component in cyclic_components(left, edges):
+            cyclic += len(component)
+            cycles.append([ids[i] for i in find_cycle(component, edges)])
+
+    widths = []
+    work = 0
+    end, last = 0, -1
+    for i in order:
+        if weights[i]:
+            work += 1
+            level = start[i]
+            if level == len(widths):
+                widths.append(0)
+            widths[level] += 1
+            if start[i] + 1 > end:
+                end, last = start[i] + 1, i
+    path = []
+    while last >= 0:
+        if weights[last]:
+            path.append(ids[last])
+        last = best_pred[last]
+    path.reverse()
+
+    return {
+        "order": [ids[i] for i in order],
+        "task_count": n,
+        "dependency_edges": dependency_edges,
+        "dangling": dangling,
+        "duplicate_ids": duplicate_ids,
+        "cycles": cycles,
+        "cyclic_tasks": cyclic,
+        "blocked_tasks": n - len(order) - cyclic,
+        "work": work,
+        "critical_path": path,
+        "critical_path_length": end,
+        "level_widths": widths,
+        "max_parallelism": max(widths, default=0),
+        "avg_parallelism": work / end if end else 0,
+    }
+
+
+def check_task_graph(root_task, strict=False):
+    """
+    Pre-execution check of a task tree's dependency graph.
+
+    Cycles always fail: no execution order exists for them, and a cycle inside one
+    unit would otherwise run silently out of order. Dependencies on ids outside the
+    tree are ignored by the scheduler, so they only fail when `strict` is set.
+
+    Args:
+        root_task (Task): The root task of the tree.
+        strict (bool): Also fail on dangling dependencies.
+
+    Returns:
+        dict: The `analyze_task_graph` result.
+
+    Raises:
+        CycleError: If the graph contains a cycle (reported with task titles).
+        DanglingDependencyError: If `strict` and some dependency is not in the tree.
+    """
+    analysis = analyze_task_graph(root_task)
+    if analysis["cycles"]:
+        titles = {task.task_id: task.title for task in iter_tasks(root_task)}
+        raise CycleError(titles.get(task_id, task_id) for task_id in analysis["cycles"][0])
+    if strict and analysis["dangling"]:
+        raise DanglingDependencyError(analysis["dangling"])
+    print(f"Dependency graph: {analysis['work']} tasks, {analysis['dependency_edges']} dependencies, "
+          f"critical path {analysis['critical_path_length']}, max parallelism {analysis['max_parallelism']} "
+          f"(avg {analysis['avg_parallelism']:.1f}), {len(analysis['dangling'])} dangling")
+    return analysis
@@ -0,0 +1,189 @@
+import threading
+from collections import defaultdict
+
+from src.utils.class_task import TaskManager
+from src.utils.similarity_index import SimilarityIndex, task_text
+from src.utils.task_graph import dependency_ids
+
+
+class IndexedTaskManager(TaskManager):
+    """
+    TaskManager with secondary indexes for the lookups the pipeline repeats.
+
+    Tasks are indexed by parent, area and execution type as they are created.
+    Dependencies are resolved after creation (see `create_and_link_subtasks`), so
+    new tasks are kept in a pending set and folded into the reverse-dependency
+    index on the next dependency query. Every query is O(result size) instead of
+    a scan over `tasks`. Titles and descriptions feed a similarity index the same
+    way, flushed on the next similarity query (see `similar_tasks`, `near_duplicates`).
+
+    Call `reindex(task)` after changing a task's parent, area, execution type,
+    dependencies, title or description in place.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_indexes()
+
+    def _init_indexes(self):
+        self._lock = threading.RLock()
+        self._by_parent = defaultdict(dict)
+        self._by_area = defaultdict(dict)
+        self._by_execution_type = defaultdict(dict)
+        self._dependents = defaultdict(dict)
+        self._keys = {}
+        self._pending_dependencies = {}
+        self._similarity = SimilarityIndex()
+        self._pending_similarity = {}
+        for task in self.tasks.values():
+            self._add(task)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ("_lock", "_by_parent", "_by_area", "_by_execution_type",
+                     "_dependents", "_keys", "_pending_dependencies", "_similarity", "_pending_similarity"):
+            state.pop(name, None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_indexes()
+
+    def create_task(self, *args, **kwargs):
+        task = super().create_task(*args, **kwargs)
+        with self._lock:
+            self._add(task)
+        return task
+
+    def _add(self, task):
+        parent = getattr(task, "parent", None)
+        keys = (
+            getattr(parent, "task_id", parent),
+            getattr(task, "area", None),
+            getattr(task, "execution_type", None),
+            ()
+        )
+        self._keys[task.task_id] = keys
+        self._by_parent[keys[0]][task.task_id] = task
+        self._by_area[keys[1]][task.task_id] = task
+        self._by_execution_type[keys[2]][task.task_id] = task
+        self._pending_dependencies[task.task_id] = task
+        self._pending_similarity[task.task_id] = task
+
+    def _remove(self, task_id):
+        keys = self._keys.pop(task_id, None)
+        if keys is None:
+            return
+        self._by_parent[keys[0]].pop(task_id, None)
+        self._by_area[keys[1]].pop(task_id, None)
+        self._by_execution_type[keys[2]].pop(task_id, None)
+        for dep_id in keys[3]:
+            self._dependents[dep_id].pop(task_id, None)
+        self._pending_dependencies.pop(task_id, None)
+        self._pending_similarity.pop(task_id, None)
+        self._similarity.remove(task_id)
+
+    def _flush_dependencies(self):
+        for task_id, task in self._pending_dependencies.items():
+            parent_id, area, execution_type, old_deps = self._keys[task_id]
+            for dep_id in old_deps:
+                self._dependents[dep_id].pop(task_id, None)
+            deps = tuple(dependency_ids(task))
+            for dep_id in deps:
+                self._dependents[dep_id][task_id] = task
+            self._keys[task_id] = (parent_id, area, execution_type, deps)
+        self._pending_dependencies.clear()
+
+    def _flush_similarity(self):
+        for task_id, task in self._pending_similarity.items():
+            self._similarity.add(task_id, task_text(task), getattr(task, "area", None))
+        self._pending_similarity.clear()
+
+    def rebuild_indexes(self):
+        """
+        Rebuild every index from `tasks` (after tasks were added or re-keyed directly).
+        """
+        with self._lock:
+            self._init_indexes()
+
+    def reindex(self, task):
+        """
+        Refresh the index entries of a task changed in place.
+
+        Args:
+            task (Task): The modified task.
+        """
+        with self._lock:
+            self._remove(task.task_id)
+            if task.task_id in self.tasks:
+                self._add(task)
+
+    def children(self, task):
+        """
+        Return the direct subtasks of a task (the area tasks, for the root), in creation order.
+        """
+        with self._lock:
+            return list(self._by_parent.get(task.task_id, {}).values())
+
+    def area_tasks(self, root_task):
+        """
+        Return the area tasks of a project (the direct children of its root task).
+        """
+        return self.children(root_task)
+
+    def area_task(self, root_task, area_name):
+        """
+        Return the area task named `area_name` under `root_task`, or None.
+        """
+        with self._lock:
+            for task in self._by_parent.get(root_task.task_id, {}).values():
+                if task.area == area_name:
+                    return task
+        return None
+
+    def tasks_in_area(self, area_name):
+        """
+        Return every task (the area task included) belonging to `area_name`.
+        """
+        with self._lock:
+            return list(self._by_area.get(area_name, {}).values())
+
+    def tasks_by_execution_type(self, execution_type):
+        """
+        Return every task with the given execution type ("llm", "simulation", ...).
+        """
+        with self._lock:
+            return list(self._by_execution_type.get(execution_type, {}).values())
+
+    def dependents(self, task_id):
+        """
+        Return the tasks that list `task_id` in their dependencies.
+        """
+        with self._lock:
+            self._flush_dependencies()
+            return list(self._dependents.get(task_id, {}).values())
+
+    def similar_tasks(self, query, k=10, exclude_area=None):
+        """
+        Return the `k` tasks most relevant to a query text, optionally outside one area.
+
+        Returns:
+            list: (task, score) pairs, best first.
+        """
+        with self._lock:
+            self._flush_similarity()
+            ranked = self._similarity.top_k(query, k, exclude_group=exclude_area)
+            return [(self.tasks[task_id], score) for task_id, score in ranked if task_id in self.tasks]
+
+    def near_duplicates(self, task, threshold=0.5):
+        """
+        Return the tasks whose title and description nearly match `task`'s.
+
+        Returns:
+            list: (task, similarity) pairs, most similar first; similarity is the Jaccard
+                index of the word-stem shingles.
+        """
+        with self._lock:
+            self._flush_similarity()
+            matches = self._similarity.near_duplicates(task.task_id, threshold)
+            return [(self.tasks[task_id], similarity) for task_id, similarity in matches if task_id in self.tasks]
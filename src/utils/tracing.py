@@ -0,0 +1,315 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from src.utils.llm_client import ChatClientWrapper, attach_to_agent
+
+# USD per million (prompt, completion) tokens; override with STRATMIND_PRICES='{"model": [in, out]}'
+DEFAULT_PRICES = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-3.5-turbo": (0.50, 1.50),
+}
+
+
+def load_prices():
+    prices = dict(DEFAULT_PRICES)
+    override = os.getenv("STRATMIND_PRICES")
+    if override:
+        prices.update({model: tuple(price) for model, price in json.loads(override).items()})
+    return prices
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens, prices=None):
+    """
+    Cost in USD of one call, matching the longest price-table prefix of the model name.
+
+    Returns 0.0 for models missing from the table.
+    """
+    prices = prices or load_prices()
+    matches = [name for name in prices if model and model.startswith(name)]
+    if not matches:
+        return 0.0
+    price_in, price_out = prices[max(matches, key=len)]
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+def format_value(value):
+    """
+    Format a metric value at full precision: ints as they are, floats through repr.
+    """
+    return str(value) if isinstance(value, int) else repr(float(value))
+
+
+class MetricsRegistry:
+    """
+    Process-wide counters rendered in the Prometheus text exposition format.
+    """
+
+    HELP = {
+        "stratmind_stage_runs_total": "Pipeline stage executions.",
+        "stratmind_stage_errors_total": "Pipeline stage executions that raised.",
+        "stratmind_stage_seconds_total": "Wall time spent in each pipeline stage.",
+        "stratmind_llm_calls_total": "Model calls per agent.",
+        "stratmind_llm_errors_total": "Model calls that raised.",
+        "stratmind_llm_retries_total": "Model calls repeating a failed request.",
+        "stratmind_llm_tokens_total": "Tokens used per agent and kind (prompt/completion).",
+        "stratmind_llm_latency_seconds_total": "Model call latency per agent.",
+        "stratmind_llm_cost_usd_total": "Estimated model cost per agent.",
+        "stratmind_executor_prompt_tokens_total": "Prompt tokens of executed tasks.",
+        "stratmind_executor_tasks_total": "Executed tasks.",
+    }
+
+    def __init__(self):
+        self._values = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1.0, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._values[key] += value
+
+    def render(self, gauges=None):
+        """
+        Render every counter, plus optional gauges given as {name: value}.
+
+        Returns:
+            str: The metrics page.
+        """
+        with self._lock:
+            values = sorted(self._values.items())
+        lines, seen = [], set()
+        for (name, labels), value in values:
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# HELP {name} {self.HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} counter")
+            label_text = ",".join(f'{key}="{val}"' for key, val in labels)
+            text = format_value(value)
+            lines.append(f"{name}{{{label_text}}} {text}" if label_text else f"{name} {text}")
+        for name, value in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def _empty_totals():
+    return {"calls": 0, "errors": 0, "retries": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "latency_s": 0.0, "cost_usd": 0.0}
+
+
+class Tracer:
+    """
+    Collects spans for one pipeline run: one per stage and one per model call.
+
+    Stage spans time a block (`with tracer.span("decompose"):`); call spans are
+    recorded by `TracingClient` with token usage, latency and retries. Executed
+    tasks are counted from the scheduler's task_finished events. `summary()` is what
+    goes into the `_metadata` of the exported tree, and every span is also added to
+    the process-wide Prometheus counters.
+
+    Args:
+        metrics (MetricsRegistry): Counters to feed. Defaults to the process-wide one.
+        max_spans (int): Spans kept for `summary(include_spans=True)`; totals are always complete.
+    """
+
+    def __init__(self, metrics=None, max_spans=10000):
+        self.metrics = metrics or METRICS
+        self.max_spans = max_spans
+        self.prices = load_prices()
+        self._init_state()
+        self.started = time.time()
+        self.spans = []
+        self.stages = defaultdict(lambda: {"runs": 0, "errors": 0, "duration_s": 0.0})
+        self.agents = defaultdict(_empty_totals)
+        self.executor = {"tasks": 0, "prompt_tokens": 0}
+
+    def _init_state(self):
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("_lock", None)
+        state.pop("metrics", None)
+        state["stages"] = dict(self.stages)
+        state["agents"] = dict(self.agents)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.metrics = METRICS
+        self.stages = defaultdict(lambda: {"runs": 0, "errors": 0, "duration_s": 0.0}, self.stages)
+        self.agents = defaultdict(_empty_totals, self.agents)
+        self._init_state()
+
+    def _keep(self, span):
+        if len(self.spans) < self.max_spans:
+            self.spans.append(span)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        """
+        Time a pipeline stage.
+
+        Args:
+            name (str): Stage name (specify, synthesize, decompose, plan, refine, execute, export).
+            **attrs: Extra fields stored on the span.
+        """
+        start, t0, error = time.time(), time.perf_counter(), None
+        try:
+            yield
+        except Exception as exc:
+            error = repr(exc)
+            raise
+        finally:
+            duration = time.perf_counter() - t0
+            with self._lock:
+                stage = self.stages[name]
+                stage["runs"] += 1
+                stage["duration_s"] += duration
+                stage["errors"] += error is not None
+                self._keep(dict(kind="stage", name=name, start=start, duration_s=round(duration, 4),
+                                error=error, **attrs))
+            self.metrics.inc("stratmind_stage_runs_total", stage=name)
+            self.metrics.inc("stratmind_stage_seconds_total", duration, stage=name)
+            if error is not None:
+                self.metrics.inc("stratmind_stage_errors_total", stage=name)
+
+    def record_call(self, agent, model, prompt_tokens, completion_tokens, duration_s, retry=False, error=None):
+        """
+        Record one model call.
+        """
+        cost = estimate_cost(model, prompt_tokens, completion_tokens, self.prices)
+        with self._lock:
+            totals = self.agents[agent]
+            totals["calls"] += 1
+            totals["errors"] += error is not None
+            totals["retries"] += retry
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["latency_s"] += duration_s
+            totals["cost_usd"] += cost
+            self._keep({"kind": "llm", "agent": agent, "model": model, "start": time.time() - duration_s,
+                        "duration_s": round(duration_s, 4), "prompt_tokens": prompt_tokens,
+                        "completion_tokens": completion_tokens, "retry": retry, "error": error})
+        self.metrics.inc("stratmind_llm_calls_total", agent=agent)
+        self.metrics.inc("stratmind_llm_tokens_total", prompt_tokens, agent=agent, kind="prompt")
+        self.metrics.inc("stratmind_llm_tokens_total", completion_tokens, agent=agent, kind="completion")
+        self.metrics.inc("stratmind_llm_latency_seconds_total", duration_s, agent=agent)
+        self.metrics.inc("stratmind_llm_cost_usd_total", cost, agent=agent)
+        if retry:
+            self.metrics.inc("stratmind_llm_retries_total", agent=agent)
+        if error is not None:
+            self.metrics.inc("stratmind_llm_errors_total", agent=agent)
+
+    def on_event(self, event):
+        """
+        Pipeline `on_event` callback: counts executed tasks and their prompt tokens.
+        """
+        if event.get("event") == "task_finished" and event.get("prompt_tokens"):
+            with self._lock:
+                self.executor["tasks"] += 1
+                self.executor["prompt_tokens"] += event["prompt_tokens"]
+            self.metrics.inc("stratmind_executor_tasks_total")
+            self.metrics.inc("stratmind_executor_prompt_tokens_total", event["prompt_tokens"])
+
+    def wrap_events(self, on_event=None):
+        """
+        Return an `on_event` callback that records into the tracer and then calls `on_event`.
+        """
+        def callback(event):
+            self.on_event(event)
+            if on_event is not None:
+                on_event(event)
+        return callback
+
+    def summary(self, include_spans=False):
+        """
+        Totals per stage and per agent, ready for the `_metadata` block of an export.
+
+        Returns:
+            dict: wall_s, stages, agents, llm (totals over every agent), executor and,
+                with `include_spans`, the raw spans.
+        """
+        with self._lock:
+            agents = {name: dict(totals) for name, totals in self.agents.items()}
+            summary = {
+                "wall_s": round(time.time() - self.started, 3),
+                "stages": {name: dict(stage, duration_s=round(stage["duration_s"], 3))
+                           for name, stage in self.stages.items()},
+                "agents": agents,
+                "executor": dict(self.executor),
+            }
+            if include_spans:
+                summary["spans"] = list(self.spans)
+        llm = _empty_totals()
+        for totals in agents.values():
+            for key in llm:
+                llm[key] += totals[key]
+        summary["llm"] = dict(llm, latency_s=round(llm["latency_s"], 3), cost_usd=round(llm["cost_usd"], 6))
+        for totals in agents.values():
+            totals["latency_s"] = round(totals["latency_s"], 3)
+            totals["cost_usd"] = round(totals["cost_usd"], 6)
+        return summary
+
+
+class TracingClient(ChatClientWrapper):
+    """
+    Records latency and token usage of every call made through the wrapped client.
+
+    A call whose messages equal those of the previous failed call is counted as a retry.
+    """
+
+    def __init__(self, client, tracer, agent_name):
+        super().__init__(client)
+        self.tracer = tracer
+        self.agent_name = agent_name
+        self._last_failed = None
+
+    def create(self, **kwargs):
+        key = hashlib.sha256(json.dumps(kwargs.get("messages"), sort_keys=True, default=str).encode()).hexdigest()
+        retry = key == self._last_failed
+        start = time.perf_counter()
+        try:
+            response = super().create(**kwargs)
+        except Exception as exc:
+            self._last_failed = key
+            self.tracer.record_call(self.agent_name, kwargs.get("model"), 0, 0,
+                                    time.perf_counter() - start, retry=retry, error=repr(exc))
+            raise
+        self._last_failed = None
+        usage = getattr(response, "usage", None)
+        self.tracer.record_call(
+            self.agent_name, getattr(response, "model", None) or kwargs.get("model"),
+            getattr(usage, "prompt_tokens", 0) or 0, getattr(usage, "completion_tokens", 0) or 0,
+            time.perf_counter() - start, retry=retry
+        )
+        return response
+
+
+def enable_tracing(agent, tracer):
+    """
+    Record the model calls of an agent in a tracer.
+
+    Apply it before `enable_llm_cache`, so the tracer sits next to the model client
+    and cache hits are not counted as spent tokens.
+
+    Args:
+        agent: The agent whose `client` is wrapped.
+        tracer (Tracer): The run's tracer.
+
+    Returns:
+        The same agent.
+    """
+    name = type(agent).__name__
+    return attach_to_agent(agent, lambda client: TracingClient(client, tracer, name))
@@ -0,0 +1,90 @@
+import itertools
+import sys
+import types
+
+import pytest
+
+
+class Task:
+    """Minimal stand-in for src.utils.class_task.Task: the attributes the executor and scheduler use."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, title, description="", expected_output="", area=None, parent=None,
+                 execution_type="llm", dependencies=None, responsibilities=None):
+        self.task_id = f"t{next(self._ids)}"
+        self.title = title
+        self.description = description
+        self.expected_output = expected_output
+        self.area = area if area is not None else (parent.area if parent is not None else None)
+        self.responsibilities = list(responsibilities or [])
+        self.parent = parent
+        self.execution_type = execution_type
+        self.dependencies = list(dependencies or [])
+        self.subtasks = []
+        self.result = None
+        self.prompt = None
+        if parent is not None:
+            parent.subtasks.append(self)
+
+    def to_dict(self):
+        return {
+            "task_id": self.task_id, "title": self.title, "description": self.description,
+            "expected_output": self.expected_output, "area": self.area,
+            "responsibilities": list(self.responsibilities), "execution_type": self.execution_type,
+            "dependencies": list(self.dependencies), "result": self.result, "prompt": self.prompt,
+            "subtasks": [child.to_dict() for child in self.subtasks],
+        }
+
+
+class TaskManager:
+    """Minimal stand-in for src.utils.class_task.TaskManager: a task_id -> Task map and `create_task`."""
+
+    def __init__(self):
+        self.tasks = {}
+
+    def create_task(self, title, description, expected_output, area=None, responsibilities=None, parent_id=None,
+                    execution_type="llm"):
+        task = Task(title, description, expected_output, area=area, parent=self.tasks.get(parent_id),
+                    execution_type=execution_type, responsibilities=responsibilities)
+        self.tasks[task.task_id] = task
+        return task
+
+
+# IndexedTaskManager subclasses the private class_task.TaskManager; without that module
+# the doubles above stand in for it, so the index and dedup tests still run.
+try:
+    import src.utils.class_task  # noqa: F401
+except ImportError:
+    sys.modules["src.utils.class_task"] = types.ModuleType("src.utils.class_task")
+    sys.modules["src.utils.class_task"].Task = Task
+    sys.modules["src.utils.class_task"].TaskManager = TaskManager
+
+
+def build_tree(areas=3, per_area=3, depth=2, fanout=2):
+    """
+    Root -> areas -> `per_area` tasks, each with `depth` levels of `fanout` subtasks below it.
+
+    The last task of every area depends on the first task of the area, and the last task
+    of the last area on the first task of the first area.
+    """
+    root = Task("Project", "Launch the product", "Launch plan")
+    firsts, lasts = [], []
+    for a in range(areas):
+        area = Task(f"Area {a}", f"Everything about area {a}", area=f"Area {a}", parent=root)
+        level = [Task(f"Task {a}.{i}", f"Work item {i} of area {a}", "Deliverable", parent=area)
+                 for i in range(per_area)]
+        firsts.append(level[0])
+        lasts.append(level[-1])
+        level[-1].dependencies.append(level[0].task_id)
+        for d in range(depth):
+            level = [Task(f"{parent.title}.{k}", f"Detail {k} of {parent.title}", "Detail", parent=parent)
+                     for parent in level for k in range(fanout)]
+    if areas > 1:
+        lasts[-1].dependencies.append(firsts[0].task_id)
+    return root
+
+
+@pytest.fixture
+def tree_factory():
+    return build_tree
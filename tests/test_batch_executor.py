@@ -0,0 +1,91 @@
+import json
+import re
+
+from src.executor.batch_executor import BatchLeafExecutor, batch_sections, execute_tasks_batched
+from src.executor.context_budget import estimate_tokens
+from src.executor.task_executor import SYSTEM_PROMPT
+from src.utils.fake_llm import FakeChatClient
+from src.utils.task_graph import iter_tasks
+
+GARBLED = "Sorry, here are the answers: T1 ..."
+
+
+def batch_responder(answer, sent=None):
+    """
+    Answer a batch prompt with {label: answer(area, label)}: None leaves the label out,
+    GARBLED replaces the whole answer with text that is not JSON.
+    """
+    def respond(system, conversation, response_format=None):
+        user = conversation[-1]["content"]
+        if sent is not None:
+            sent.append(system + user)
+        area = re.search(r"=== AREA ===\nTitle: (.*)", user).group(1)
+        answers = {label: answer(area, label) for label in re.findall(r"^\[(T\d+)\]$", user, re.M)}
+        if GARBLED in answers.values():
+            return GARBLED
+        return json.dumps({label: value for label, value in answers.items() if value is not None})
+    return respond
+
+
+def run(root, answer, sent=None):
+    batch_executor = BatchLeafExecutor(client=FakeChatClient(responder=batch_responder(answer, sent)), batch_size=8)
+    singles, events = [], []
+
+    def execute_task(task):
+        singles.append(task)
+        task.result = f"Single answer for {task.title}"
+
+    execute_tasks_batched(root, batch_executor=batch_executor, execute_task=execute_task, on_event=events.append)
+    return batch_executor, singles, events
+
+
+def finished(events, task):
+    return next(event for event in events if event["event"] == "task_finished" and event["task_id"] == task.task_id)
+
+
+def test_good_batches_answer_every_independent_leaf(tree_factory):
+    root = tree_factory(areas=2, per_area=4, depth=0)
+
+    batch_executor, singles, events = run(root, lambda area, label: f"{area} {label} answer")
+
+    assert batch_executor.counters == {"requests": 2, "batched_tasks": 6, "fallback_tasks": 0}
+    assert [task.title for task in singles] == ["Task 0.3", "Task 1.3"]
+    first = root.subtasks[1].subtasks[1]
+    assert first.result == "Area 1 T2 answer"
+    assert first.prompt["batch"]["index"] == 2 and first.prompt["batch"]["size"] == 3
+    assert "[T2]\nTitle: Task 1.1\n" in first.prompt["user"] and "[T1]" not in first.prompt["user"]
+    assert finished(events, first)["batch_size"] == 3
+    assert all(task.result is not None for task in iter_tasks(root))
+
+
+def test_missing_or_invalid_answers_fall_back_to_single_calls(tree_factory):
+    root = tree_factory(areas=2, per_area=4, depth=0)
+    partial = {"T1": "First answer", "T2": None, "T3": "  "}
+
+    def answer(area, label):
+        return partial[label] if area == "Area 0" else GARBLED
+
+    batch_executor, singles, events = run(root, answer)
+
+    area0, area1 = root.subtasks[0].subtasks, root.subtasks[1].subtasks
+    assert batch_executor.counters == {"requests": 2, "batched_tasks": 1, "fallback_tasks": 5}
+    assert area0[0].result == "First answer"
+    assert {task.task_id for task in singles} == {task.task_id for task in area0[1:] + area1}
+    assert all(task.result == f"Single answer for {task.title}" for task in singles)
+    assert sum(1 for event in events if event["event"] == "task_finished" and "batch_size" in event) == 1
+
+
+def test_leaf_prompt_tokens_add_up_to_the_request(tree_factory):
+    root = tree_factory(areas=1, per_area=6, depth=0)
+    sent = []
+
+    batch_executor, singles, events = run(root, lambda area, label: f"Answer {label}", sent)
+
+    area = root.subtasks[0]
+    leaves = [task for task in area.subtasks if task.prompt and "batch" in task.prompt]
+    assert len(leaves) == 5 and len(sent) == 1
+    header, blocks, footer = batch_sections(root, area, leaves)
+    assert sent[0] == SYSTEM_PROMPT + header + "\n".join(blocks) + footer
+    tokens = [finished(events, task)["prompt_tokens"] for task in leaves]
+    assert sum(tokens) == sum(estimate_tokens(part) for part in [SYSTEM_PROMPT, header, footer] + blocks)
+    assert abs(sum(tokens) - estimate_tokens(sent[0])) <= len(leaves) + 3
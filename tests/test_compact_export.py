@@ -0,0 +1,32 @@
+import pytest
+
+from src.executor.task_scheduler import execute_tasks_parallel
+from src.utils.compact_export import compact_task_tree, expand_task_tree, load_compact, write_compact
+
+
+def executed_tree(tree_factory):
+    root = tree_factory(areas=3, per_area=3, depth=2, fanout=2)
+
+    def execute_task(task):
+        task.prompt = {
+            "system": "You are an expert.",
+            "user": f"=== PROJECT ===\nTitle: {root.title}\n\n\n=== CURRENT TASK ===\nTitle: {task.title}\n",
+        }
+        task.result = f"Answer for {task.title}"
+
+    execute_tasks_parallel(root, max_workers=2, execute_task=execute_task)
+    tree = root.to_dict()
+    tree["_metadata"] = {"trace": {"llm": {"calls": 21}}, "case_id": "CASE1"}
+    return tree
+
+
+def test_compact_round_trip(tree_factory):
+    tree = executed_tree(tree_factory)
+    assert expand_task_tree(compact_task_tree(tree)) == tree
+
+
+@pytest.mark.parametrize("compression", ["gzip", None])
+def test_compact_file_round_trip(tree_factory, tmp_path, compression):
+    tree = executed_tree(tree_factory)
+    path = write_compact(tree, str(tmp_path / "CASE1_task_tree.compact.json"), compression)
+    assert load_compact(path) == tree
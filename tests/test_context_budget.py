@@ -0,0 +1,27 @@
+from src.executor.context_budget import ContextAssembler, enable_context_budget, estimate_tokens
+from src.executor.task_executor import TaskExecutor
+from src.executor.task_scheduler import execute_tasks_parallel
+from src.utils.fake_llm import FakeChatClient
+from src.utils.task_graph import iter_tasks
+
+
+def test_deep_tree_prompts_stay_under_budget(tree_factory):
+    root = tree_factory(areas=3, per_area=4, depth=3, fanout=3)
+    client = FakeChatClient(responder=lambda system, conversation, response_format=None: "Detailed answer line.\n" * 120)
+    assembler = ContextAssembler(max_tokens=900)
+    executor = TaskExecutor(client, context_assembler=assembler)
+
+    execute_tasks_parallel(root, max_workers=4, executor=executor)
+
+    prompts = [task.prompt["user"] for task in iter_tasks(root) if task.prompt]
+    assert prompts
+    assert max(estimate_tokens(prompt) for prompt in prompts) <= 900
+    report = assembler.report()
+    assert report["max_tokens_before"] > 900
+    assert report["summarized"] > 0
+
+
+def test_enable_context_budget_sets_assembler():
+    executor = enable_context_budget(TaskExecutor(FakeChatClient()), ContextAssembler(max_tokens=100))
+    assert executor.context_assembler.max_tokens == 100
+    assert TaskExecutor(FakeChatClient()).context_assembler is None
@@ -0,0 +1,88 @@
+from src.utils.deduplication import deduplicate_subtasks, find_duplicate_subtasks, merge_duplicate
+from src.utils.task_index import IndexedTaskManager
+
+SHARED = ("Design the customer onboarding survey", "Write the questions of the onboarding survey for new customers")
+
+
+def project(*areas):
+    """Build root -> areas -> tasks from (area name, [(title, description), ...]) pairs."""
+    tm = IndexedTaskManager()
+    root = tm.create_task("Project", "Launch the product", "Launch plan")
+    tasks = {}
+    for name, items in areas:
+        area = tm.create_task(name, f"{name} work", "", area=name, responsibilities=[], parent_id=root.task_id)
+        for title, description in items:
+            tasks[(name, title)] = tm.create_task(title, description, "Deliverable", area=name, parent_id=area.task_id)
+    return tm, root, tasks
+
+
+def test_only_cross_area_pairs_with_the_same_numbers_are_flagged():
+    tm, root, tasks = project(
+        ("Research", [SHARED, ("Argument 1", "Gather evidence for the argument about pricing")]),
+        ("Marketing", [SHARED, ("Argument 2", "Gather evidence for the argument about pricing"),
+                       ("Book the launch venue", "Reserve a hall for the launch party")]),
+        ("Sales", [("Design the customer onboarding survey", "Write the questions of the onboarding survey for new customers!")]),
+    )
+    original = tasks[("Research", SHARED[0])]
+
+    duplicates = find_duplicate_subtasks(tm, root, threshold=0.35)
+
+    assert sorted((dup.area, orig.task_id) for dup, orig, _ in duplicates) == \
+           [("Marketing", original.task_id), ("Sales", original.task_id)]
+    assert all(similarity >= 0.35 for _, _, similarity in duplicates)
+
+
+def test_flag_mode_keeps_the_tree():
+    tm, root, tasks = project(("Research", [SHARED]), ("Marketing", [SHARED]))
+    duplicate = tasks[("Marketing", SHARED[0])]
+    events = []
+
+    deduplicate_subtasks(tm, root, threshold=0.35, on_event=events.append)
+
+    assert duplicate in duplicate.parent.subtasks and duplicate.task_id in tm.tasks
+    assert duplicate.duplicate_of == tasks[("Research", SHARED[0])].task_id
+    assert [(event["event"], event["merged"]) for event in events] == [("duplicate_found", False)]
+
+
+def test_merge_redirects_dependents_to_the_original():
+    tm, root, tasks = project(("Research", [SHARED]), ("Marketing", [SHARED, ("Send the survey", "Email it")]))
+    original, duplicate = tasks[("Research", SHARED[0])], tasks[("Marketing", SHARED[0])]
+    dependent = tasks[("Marketing", "Send the survey")]
+    dependent.dependencies = [duplicate.task_id, original.task_id]
+
+    assert merge_duplicate(tm, root, duplicate, original)
+
+    assert duplicate not in duplicate.parent.subtasks and duplicate.task_id not in tm.tasks
+    assert dependent.dependencies == [original.task_id]
+    assert tm.dependents(original.task_id) == [dependent]
+    assert tm.dependents(duplicate.task_id) == []
+
+
+def test_merge_is_rolled_back_when_it_would_create_a_cycle():
+    tm, root, tasks = project(("Research", [SHARED]), ("Marketing", [("Send the survey", "Email it"), SHARED]))
+    original, duplicate = tasks[("Research", SHARED[0])], tasks[("Marketing", SHARED[0])]
+    dependent = tasks[("Marketing", "Send the survey")]
+    dependent.dependencies = [duplicate.task_id]
+    original.dependencies = [dependent.task_id]
+
+    assert not merge_duplicate(tm, root, duplicate, original)
+
+    assert duplicate.parent.subtasks.index(duplicate) == 1 and duplicate.task_id in tm.tasks
+    assert dependent.dependencies == [duplicate.task_id]
+    assert tm.dependents(duplicate.task_id) == [dependent]
+
+
+def test_similar_tasks_returns_the_top_k_outside_the_area():
+    tm, root, tasks = project(
+        ("Research", [("Survey customers about pricing", "Ask customers which price they expect")]),
+        ("Marketing", [("Price the launch offer", "Set the customer price of the launch offer"),
+                       ("Customer pricing interviews", "Interview customers about the price"),
+                       ("Book the launch venue", "Reserve a hall")]),
+    )
+
+    ranked = tm.similar_tasks("customer price", k=2, exclude_area="Research")
+
+    assert len(ranked) == 2
+    assert {task.area for task, _ in ranked} == {"Marketing"}
+    assert tasks[("Marketing", "Book the launch venue")] not in [task for task, _ in ranked]
+    assert ranked[0][1] >= ranked[1][1]
@@ -0,0 +1,52 @@
+import glob
+import json
+
+import pytest
+
+from src.utils import fake_llm
+from src.utils.fake_llm import FakeChatClient, synthetic_response
+
+
+def ask(client, system, user, **kwargs):
+    response = client.chat.completions.create(
+        model="fake-llm", messages=[{"role": "system", "content": system}, {"role": "user", "content": user}], **kwargs
+    )
+    return response.choices[0].message.content
+
+
+def test_structured_agents_get_schema_shaped_json():
+    client = FakeChatClient()
+    for kwargs in ({"response_format": {"type": "json_object"}}, {}):
+        data = json.loads(ask(client, "Answer ONLY with valid JSON.", "Decompose: launch a bakery", **kwargs))
+        assert data["intro"] and data["description"] and data["expected_output"]
+        titles = [item["title"] for item in data["subtasks"]]
+        assert len(set(titles)) == len(titles) == fake_llm.JSON_ITEMS
+        for item in data["subtasks"]:
+            assert {"area", "description", "expected_output", "responsibilities", "execution_type",
+                    "dependencies"} <= set(item)
+
+
+def test_executor_answers_stay_plain_text():
+    content = synthetic_response("You are an expert.", [{"role": "user", "content": "=== CURRENT TASK ===\nTitle: X"}])
+    assert content.startswith("X:")
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(content)
+
+
+def test_full_pipeline_smoke(tmp_path, monkeypatch):
+    pytest.importorskip("src.utils.class_task")
+    pytest.importorskip("src.agents.decomposer_agent")
+    monkeypatch.setenv("STRATMIND_LLM_BACKEND", "fake")
+    monkeypatch.setattr(fake_llm, "_env_client", None)
+    monkeypatch.chdir(tmp_path)
+    from evaluation.run_batch_evaluation import run_test_case
+
+    trace = run_test_case({"id": "CASE99", "description": "Open a neighbourhood bakery",
+                           "expected_output": "A launch plan"})
+
+    assert trace["llm"]
+    exports = glob.glob(str(tmp_path / "output" / "*_CASE99_task_tree.json"))
+    assert exports
+    with open(exports[0], encoding="utf-8") as f:
+        tree = json.load(f)
+    assert tree["subtasks"] and all(area["result"] for area in tree["subtasks"])
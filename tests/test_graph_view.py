@@ -0,0 +1,101 @@
+import pytest
+
+from src.utils.graph_view import GraphView
+from src.utils.task_graph import iter_tasks
+
+
+def view_of(tree_factory, **kwargs):
+    root = tree_factory(areas=2, per_area=3, depth=1, fanout=2)
+    view = GraphView(root, **kwargs)
+    view.refresh(root)
+    return root, view, {task.title: task for task in iter_tasks(root)}
+
+
+def ids(items):
+    return sorted(item["id"] for item in items)
+
+
+def test_full_payload_and_stable_version(tree_factory):
+    root, view, tasks = view_of(tree_factory)
+    payload = view.payload()
+
+    assert payload["full"] and payload["version"] == 1
+    assert ids(payload["nodes"]) == sorted(task.task_id for task in iter_tasks(root))
+    dependency = f"{tasks['Task 0.0'].task_id}~{tasks['Task 0.2'].task_id}"
+    edges = {edge["id"]: edge for edge in payload["edges"]}
+    assert edges[dependency]["kind"] == "dependency" and edges[dependency]["dashes"]
+    assert sum(edge["kind"] == "subtask" for edge in edges.values()) == len(payload["nodes"]) - 1
+
+    etag = view.etag
+    assert view.refresh(root) == 1 and view.etag == etag
+
+
+def test_since_returns_only_edited_tasks(tree_factory):
+    root, view, tasks = view_of(tree_factory)
+    tasks["Task 1.1.0"].result = "Done"
+
+    assert view.refresh(root) == 2
+    delta = view.payload(since=1)
+
+    assert not delta["full"]
+    assert [(node["id"], node["status"]) for node in delta["nodes"]] == [(tasks["Task 1.1.0"].task_id, "done")]
+    assert delta["edges"] == [] and delta["removed_nodes"] == [] and delta["removed_edges"] == []
+    assert view.payload(since=2)["nodes"] == []
+
+
+def test_deleted_tasks_leave_tombstones(tree_factory):
+    root, view, tasks = view_of(tree_factory)
+    area, deleted = tasks["Area 0"], tasks["Task 0.0"]
+    area.subtasks.remove(deleted)
+    dependents = [tasks["Task 0.2"], tasks["Task 1.2"]]
+    for dependent in dependents:
+        dependent.dependencies.remove(deleted.task_id)
+
+    view.refresh(root)
+    delta = view.payload(since=1)
+
+    removed = [deleted.task_id] + [child.task_id for child in deleted.subtasks]
+    assert sorted(delta["removed_nodes"]) == sorted(removed)
+    assert sorted(delta["removed_edges"]) == sorted(
+        [f"{area.task_id}>{deleted.task_id}"]
+        + [f"{deleted.task_id}>{child_id}" for child_id in removed[1:]]
+        + [f"{deleted.task_id}~{dependent.task_id}" for dependent in dependents]
+    )
+    assert ids(delta["nodes"]) == [area.task_id]
+    assert deleted.task_id not in view
+
+
+def test_old_or_unknown_versions_get_a_full_payload(tree_factory):
+    root, view, tasks = view_of(tree_factory, max_tombstones=1)
+    for title in ["Task 0.0.0", "Task 0.0.1"]:
+        tasks["Task 0.0"].subtasks.remove(tasks[title])
+        view.refresh(root)
+
+    assert view.payload(since=2)["removed_nodes"] == [tasks["Task 0.0.1"].task_id]
+    assert view.payload(since=1)["full"]
+    assert view.payload(since=99)["full"]
+
+
+def test_root_and_depth_expand_lazily(tree_factory):
+    root, view, tasks = view_of(tree_factory)
+    area = tasks["Area 1"]
+
+    top = view.payload(depth=1)
+    assert ids(top["nodes"]) == sorted([root.task_id] + [child.task_id for child in root.subtasks])
+    assert all(node["collapsed"] for node in top["nodes"] if node["id"] != root.task_id)
+
+    subtree = view.payload(root_id=area.task_id, depth=1)
+    children = [child.task_id for child in area.subtasks]
+    assert ids(subtree["nodes"]) == sorted([area.task_id] + children)
+    assert all(node.get("collapsed") for node in subtree["nodes"] if node["id"] in children)
+    assert ids(subtree["edges"]) == sorted(
+        [f"{area.task_id}>{child_id}" for child_id in children]
+        + [f"{tasks['Task 1.0'].task_id}~{tasks['Task 1.2'].task_id}"]
+    )
+
+    leaves = view.payload(root_id=tasks["Task 1.1"].task_id)
+    assert not any(node.get("collapsed") for node in leaves["nodes"])
+    assert len(leaves["nodes"]) == 3
+
+    with pytest.raises(KeyError):
+        view.payload(root_id="missing")
@@ -0,0 +1,77 @@
+from src.executor.incremental import IncrementalExecution, compute_fingerprints
+from src.utils.task_graph import iter_tasks
+
+
+def by_title(root):
+    return {task.title: task for task in iter_tasks(root)}
+
+
+def titles(tasks, ids):
+    return {title for title, task in tasks.items() if task.task_id in ids}
+
+
+def edited_tree(tree_factory):
+    """Tree whose Task 1.1.0 also depends on the leaf Task 0.0.1, which the caller then edits."""
+    root = tree_factory(areas=3, per_area=3, depth=1, fanout=2)
+    tasks = by_title(root)
+    tasks["Task 1.1.0"].dependencies.append(tasks["Task 0.0.1"].task_id)
+    return root, tasks
+
+
+# Task 0.0.1, its dependent Task 1.1.0, and whatever depends on or contains them:
+# Task 0.2 and Task 2.2 depend on Task 0.0.
+DIRTY = {"Task 0.0.1", "Task 0.0", "Area 0", "Task 0.2",
+         "Task 1.1.0", "Task 1.1", "Area 1",
+         "Task 2.2", "Area 2", "Project"}
+
+
+def test_fingerprints_change_only_along_the_edit(tree_factory):
+    root, tasks = edited_tree(tree_factory)
+    before = compute_fingerprints(root)
+    assert compute_fingerprints(root) == before
+
+    tasks["Task 0.0.1"].description = "Edited detail"
+    after = compute_fingerprints(root)
+
+    assert titles(tasks, {task_id for task_id in before if before[task_id] != after[task_id]}) == DIRTY
+
+
+def test_dirty_tasks_after_an_edit(tree_factory):
+    root, tasks = edited_tree(tree_factory)
+    incremental = IncrementalExecution()
+    assert incremental.dirty_tasks(root) == set(compute_fingerprints(root))
+
+    incremental.execute(root, execute_task=lambda task: setattr(task, "result", f"Answer for {task.title}"))
+    assert incremental.dirty_tasks(root) == set()
+
+    tasks["Task 0.0.1"].description = "Edited detail"
+    assert titles(tasks, incremental.dirty_tasks(root)) == DIRTY
+
+
+def test_reexecution_skips_unchanged_units(tree_factory):
+    root, tasks = edited_tree(tree_factory)
+    incremental = IncrementalExecution()
+    executed = []
+
+    def execute_task(task):
+        executed.append(task.title)
+        task.result = f"Answer for {task.title} ({task.description})"
+
+    incremental.execute(root, execute_task=execute_task)
+    first_run = len(executed)
+    tasks["Task 0.0.1"].description = "Edited detail"
+    executed.clear()
+
+    incremental.execute(root, execute_task=execute_task)
+
+    # Dirty units run whole: Task 0.0, Task 0.2, Task 1.1 and Task 2.2 with their subtasks.
+    assert sorted(executed) == sorted(
+        f"Task {unit}{suffix}" for unit in ("0.0", "0.2", "1.1", "2.2") for suffix in ("", ".0", ".1")
+    )
+    assert len(executed) < first_run
+    assert tasks["Task 0.0.1"].result == "Answer for Task 0.0.1 (Edited detail)"
+    assert tasks["Task 1.0.0"].result == "Answer for Task 1.0.0 (Detail 0 of Task 1.0)"
+
+    executed.clear()
+    assert incremental.execute(root, execute_task=execute_task) == set()
+    assert executed == []
@@ -0,0 +1,45 @@
+import threading
+import time
+
+from src.utils.job_queue import JobQueue
+
+
+def test_jobs_of_a_session_run_one_at_a_time():
+    queue = JobQueue(max_workers=4)
+    running, overlaps, finished = {}, [], []
+    lock = threading.Lock()
+
+    def stage(job):
+        with lock:
+            if running.get(job.session_id):
+                overlaps.append(job.kind)
+            running[job.session_id] = True
+        time.sleep(0.02)
+        with lock:
+            running[job.session_id] = False
+            finished.append((job.session_id, job.kind))
+        return job.kind
+
+    jobs = [queue.submit(kind, session_id, stage)
+            for session_id in ("a", "b") for kind in ("plan_subtasks", "refine", "execute")]
+    deadline = time.time() + 5
+    while any(job.active for job in jobs) and time.time() < deadline:
+        time.sleep(0.01)
+    queue.shutdown()
+
+    assert [job.status for job in jobs] == ["done"] * 6
+    assert overlaps == []
+    assert [kind for session_id, kind in finished if session_id == "a"] == ["plan_subtasks", "refine", "execute"]
+
+
+def test_waiting_job_can_be_cancelled():
+    queue = JobQueue(max_workers=2)
+    release = threading.Event()
+    first = queue.submit("refine", "s1", lambda job: release.wait(5))
+    second = queue.submit("execute", "s1", lambda job: "ran")
+    queue.cancel(second.job_id)
+    release.set()
+    first.future.result(timeout=5)
+    queue.shutdown()
+
+    assert second.status == "cancelled" and second.result is None
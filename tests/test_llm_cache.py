@@ -0,0 +1,153 @@
+import json
+import sys
+import types
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import llm_cache
+from src.utils.agent_registry import AgentRegistry
+from src.utils.fake_llm import FakeChatClient
+from src.utils.llm_cache import CachedClient, LLMCache, make_cache_key
+from src.utils.rate_limiter import GovernedClient, get_default_governor
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Replace the cache's wall clock with one the test moves by hand."""
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now.value)
+    return now
+
+
+@pytest.fixture
+def completions(monkeypatch):
+    """Load cached completions without the openai package."""
+    monkeypatch.setattr(llm_cache, "_load_completion",
+                        lambda payload: json.loads(payload, object_hook=lambda d: SimpleNamespace(**d)))
+
+
+def test_cache_key_is_stable_and_covers_every_input():
+    key = make_cache_key("gpt-4o-mini", {"temperature": 0, "max_tokens": 10}, "system", [{"role": "user"}])
+
+    assert key == make_cache_key("gpt-4o-mini", {"max_tokens": 10, "temperature": 0}, "system", [{"role": "user"}])
+    assert len({
+        key,
+        make_cache_key("gpt-4o", {"temperature": 0, "max_tokens": 10}, "system", [{"role": "user"}]),
+        make_cache_key("gpt-4o-mini", {"temperature": 1, "max_tokens": 10}, "system", [{"role": "user"}]),
+        make_cache_key("gpt-4o-mini", {"temperature": 0, "max_tokens": 10}, "other", [{"role": "user"}]),
+        make_cache_key("gpt-4o-mini", {"temperature": 0, "max_tokens": 10}, "system", [{"role": "assistant"}]),
+    }) == 5
+
+
+def test_memory_tier_evicts_the_least_recently_used():
+    cache = LLMCache(path=None, max_entries=2)
+    cache.set("a", "A")
+    cache.set("b", "B")
+    assert cache.get("a") == "A"
+
+    cache.set("c", "C")
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["misses"], stats["memory_evictions"]) == (3, 1, 1)
+    assert stats["hit_rate"] == 0.75 and stats["memory_entries"] == 2
+
+
+def test_entries_expire_after_the_ttl(clock, tmp_path):
+    cache = LLMCache(path=str(tmp_path / "cache.sqlite"), ttl=10)
+    cache.set("a", "A")
+
+    clock.value += 5
+    assert cache.get("a") == "A"
+    clock.value += 6
+    assert cache.get("a") is None
+
+    assert cache.stats()["disk_entries"] == 0
+    assert LLMCache(path=cache.path, ttl=10).get("a") is None
+
+
+def test_sqlite_tier_outlives_the_process_and_evicts_by_access(clock, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = LLMCache(path=path, max_disk_entries=2)
+    for key in ["a", "b"]:
+        cache.set(key, key.upper())
+        clock.value += 1
+
+    reopened = LLMCache(path=path, max_disk_entries=2)
+    assert reopened.get("a") == "A" and reopened.get("a") == "A"
+    assert (reopened.stats()["disk_hits"], reopened.stats()["memory_hits"]) == (1, 1)
+
+    clock.value += 1
+    reopened.set("c", "C")
+
+    fresh = LLMCache(path=path)
+    assert fresh.get("b") is None
+    assert fresh.get("a") == "A" and fresh.get("c") == "C"
+    assert reopened.stats()["disk_evictions"] == 1
+
+
+def test_disabled_cache_never_stores():
+    cache = LLMCache(path=None, enabled=False)
+    cache.set("a", "A")
+    assert cache.get("a") is None
+    assert cache.stats()["writes"] == 0 and cache.stats()["misses"] == 0
+
+
+def test_cached_client_answers_repeated_calls(completions):
+    model = FakeChatClient()
+    client = CachedClient(model, LLMCache(path=None))
+    call = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Hello"}], "temperature": 0}
+
+    first = client.chat.completions.create(**call)
+    second = client.chat.completions.create(**call)
+    client.chat.completions.create(**dict(call, temperature=1))
+    client.chat.completions.create(**dict(call, stream=True))
+
+    assert second.choices[0].message.content == first.choices[0].message.content
+    assert model.calls == 3
+    assert client.cache.stats()["memory_hits"] == 1 and client.cache.stats()["misses"] == 2
+
+    client.bypass = True
+    client.chat.completions.create(**call)
+    assert model.calls == 4
+
+
+class EchoAgent:
+    def __init__(self):
+        self.client = "replaced by the registry"
+
+    def answer(self, text):
+        return self.client.chat.completions.create(
+            model="gpt-4o-mini", messages=[{"role": "user", "content": text}]
+        ).choices[0].message.content
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    module = types.ModuleType("echo_agents")
+    module.EchoAgent = EchoAgent
+    monkeypatch.setitem(sys.modules, "echo_agents", module)
+    monkeypatch.delenv("STRATMIND_LLM_BACKEND", raising=False)
+    return AgentRegistry(classes={"echo": "echo_agents:EchoAgent"}, client_factory=FakeChatClient,
+                         cache=LLMCache(path=None))
+
+
+def test_registry_caches_outside_the_governor(registry, completions):
+    agent = registry.get("echo")
+    assert isinstance(agent.client, CachedClient) and isinstance(agent.client._client, GovernedClient)
+    admitted = get_default_governor().stats()["requests"]
+
+    assert agent.answer("Hello") == registry.get("echo").answer("Hello")
+
+    assert registry.client.calls == 1
+    assert get_default_governor().stats()["requests"] == admitted + 1
+
+
+def test_registry_bypass_and_offline_backends(registry, monkeypatch):
+    registry.get("echo")
+    assert registry.get("echo", bypass_cache=True).client.bypass
+
+    monkeypatch.setenv("STRATMIND_LLM_BACKEND", "fake")
+    assert isinstance(registry.get("echo").client, GovernedClient)
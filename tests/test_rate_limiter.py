@@ -0,0 +1,187 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.utils import rate_limiter
+from src.utils.llm_client import ChatClientWrapper
+from src.utils.rate_limiter import RequestGovernor, governor_budget, without_sdk_retries
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    def __init__(self, headers=None):
+        super().__init__("429 Too Many Requests")
+        self.response = SimpleNamespace(status_code=429, headers=headers or {})
+
+
+def failing(times, error=RateLimited, total_tokens=None):
+    """fn for RequestGovernor.call that raises `error()` `times` times, then answers."""
+    calls = []
+
+    def fn():
+        calls.append(time.monotonic())
+        if len(calls) <= times:
+            raise error()
+        return SimpleNamespace(usage=SimpleNamespace(total_tokens=total_tokens))
+    return fn, calls
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Record backoff sleeps instead of sleeping; backoff draws its upper bound."""
+    recorded = []
+    monkeypatch.setattr(rate_limiter.time, "sleep", recorded.append)
+    monkeypatch.setattr(rate_limiter.random, "uniform", lambda low, high: high)
+    return recorded
+
+
+def governor(**kwargs):
+    return RequestGovernor(**dict({"rpm": None, "tpm": None, "decrease_interval": 0}, **kwargs))
+
+
+def test_retries_until_success(sleeps):
+    gov = governor(max_retries=3, base_delay=0.5)
+    fn, calls = failing(2)
+
+    gov.call(fn)
+
+    assert len(calls) == 3
+    assert sleeps == [0.5, 1.0]
+    assert gov.stats()["retries"] == 2 and gov.stats()["throttled"] == 2 and gov.stats()["failures"] == 0
+
+
+def test_gives_up_after_max_retries(sleeps):
+    gov = governor(max_retries=2)
+    fn, calls = failing(5)
+
+    with pytest.raises(RateLimited):
+        gov.call(fn)
+
+    assert len(calls) == 3
+    assert gov.stats()["retries"] == 2 and gov.stats()["failures"] == 1
+
+
+def test_non_retryable_errors_are_raised_at_once(sleeps):
+    gov = governor(max_concurrency=8)
+    fn, calls = failing(1, error=ValueError)
+
+    with pytest.raises(ValueError):
+        gov.call(fn)
+
+    assert len(calls) == 1 and sleeps == []
+    assert gov.stats()["limit"] == 8 and gov.stats()["throttled"] == 0
+
+
+def test_throttling_halves_the_limit_then_grows_it_back(sleeps):
+    gov = governor(max_concurrency=8, min_concurrency=1, max_retries=5)
+
+    gov.call(failing(2)[0])
+    assert gov.stats()["limit"] == 2.5
+    assert gov.stats()["decreases"] == 2
+
+    gov.call(failing(4)[0])
+    assert gov.limit == 2
+
+
+def test_one_decrease_per_interval(sleeps):
+    gov = governor(max_concurrency=8, max_retries=3, decrease_interval=60)
+    gov._last_decrease = -60.0
+
+    gov.call(failing(3)[0])
+
+    assert gov.stats()["throttled"] == 3 and gov.stats()["decreases"] == 1
+    assert gov.limit == 4 + 1 / 4
+
+
+def test_retry_after_pauses_every_admission(sleeps):
+    gov = governor(max_retries=1)
+    fn, calls = failing(1, error=lambda: RateLimited({"retry-after-ms": "150"}))
+
+    gov.call(fn)
+
+    assert sleeps == [0.15]
+    assert calls[1] - calls[0] >= 0.14
+    assert gov.stats()["wait_s"] >= 0.1
+
+
+def test_waiting_calls_are_admitted_by_lane_then_arrival():
+    gov = governor(max_concurrency=1)
+    gov._acquire("default", 0)
+    admitted = []
+
+    def call(lane):
+        gov._acquire(lane, 0)
+        admitted.append(lane)
+        gov._release(0, used=0)
+
+    threads = []
+    for lane in ["batch", "default", "interactive", "batch"]:
+        threads.append(threading.Thread(target=call, args=(lane,)))
+        threads[-1].start()
+        while len(gov._waiting) < len(threads):
+            time.sleep(0.001)
+    assert gov.stats()["waiting"] == {"interactive": 1, "default": 1, "batch": 2}
+
+    gov._release(0, used=0)
+    for thread in threads:
+        thread.join()
+
+    assert admitted == ["interactive", "default", "batch", "batch"]
+
+
+def test_unused_tokens_are_refunded():
+    gov = governor(tpm=6000)
+    gov._acquire("default", 1000)
+    assert gov.tokens.level == pytest.approx(5000, abs=5)
+
+    gov._release(1000, used=200)
+
+    assert gov.tokens.level == pytest.approx(5800, abs=5)
+    assert gov.stats()["tokens"] == 200
+
+
+def test_failed_calls_keep_their_reservation(sleeps):
+    gov = governor(tpm=6000, max_retries=0)
+
+    with pytest.raises(RateLimited):
+        gov.call(failing(1)[0], tokens=1000)
+    assert gov.tokens.level == pytest.approx(5000, abs=5)
+
+    gov.call(failing(0, total_tokens=300)[0], tokens=1000)
+    assert gov.tokens.level == pytest.approx(4700, abs=5)
+    assert gov.stats()["tokens"] == 1300
+
+
+def test_governor_budget_splits_between_shares(monkeypatch):
+    monkeypatch.setenv("STRATMIND_RPM", "500")
+    monkeypatch.setenv("STRATMIND_TPM", "0")
+    monkeypatch.setenv("STRATMIND_MAX_CONCURRENCY", "6")
+
+    assert governor_budget() == {"rpm": 500, "tpm": 0, "max_concurrency": 6}
+    assert governor_budget(4) == {"rpm": 125, "tpm": 0, "max_concurrency": 1}
+    assert governor_budget(1000) == {"rpm": 1, "tpm": 0, "max_concurrency": 1}
+    assert governor_budget(0) == governor_budget(1)
+
+
+class SDKClient:
+    def __init__(self, max_retries=2):
+        self.max_retries = max_retries
+
+    def with_options(self, max_retries):
+        return SDKClient(max_retries)
+
+
+def test_without_sdk_retries_looks_through_wrappers():
+    outer = ChatClientWrapper(ChatClientWrapper(SDKClient()))
+
+    assert without_sdk_retries(outer) is outer
+    assert outer._client._client.max_retries == 0
+
+    bare = SDKClient()
+    assert without_sdk_retries(bare).max_retries == 0 and bare.max_retries == 2
+
+    plain = ChatClientWrapper(SimpleNamespace())
+    assert without_sdk_retries(plain) is plain
@@ -0,0 +1,84 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+
+from evaluation.semantic_similarity import alignment_matrix, similarity_tables, tfidf  # noqa: E402
+
+
+def unit(*weights):
+    vector = np.array(weights, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_tfidf_rows_are_normalized():
+    vectors = tfidf(np.array([[2, 0, 1], [0, 0, 0], [1, 1, 0]], dtype=np.float32))
+
+    assert np.allclose(np.linalg.norm(vectors, axis=1), [1, 0, 1])
+    assert vectors[0, 0] > vectors[0, 2] > 0
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 2048])
+def test_alignment_matrix_from_hand_made_vectors(chunk_size):
+    # Tree 0 = {x, y}, tree 1 = {x, y}, tree 2 = {x}, tree 3 = {z}
+    x, y, z = unit(1, 0, 0), unit(0, 1, 0), unit(0, 0, 1)
+    vectors = np.stack([x, y, y, x, x, z])
+    tree_index = np.array([0, 0, 1, 1, 2, 3])
+
+    alignment = alignment_matrix(vectors, tree_index, chunk_size=chunk_size)
+
+    assert np.allclose(alignment, alignment.T)
+    assert np.allclose(np.diag(alignment), 1)
+    assert alignment[0, 1] == pytest.approx(1)
+    # Tree 2 is fully covered by tree 0, tree 0 half covered by tree 2
+    assert alignment[0, 2] == pytest.approx(0.75)
+    assert alignment[3, :3] == pytest.approx([0, 0, 0])
+
+
+def test_alignment_matrix_with_partial_matches():
+    vectors = np.stack([unit(1, 0), unit(1, 1), unit(0, 1)])
+
+    alignment = alignment_matrix(vectors, np.array([0, 1, 1]), chunk_size=1)
+
+    cosine = float(unit(1, 0) @ unit(1, 1))
+    # Tree 0's node matches (1, 1); tree 1's nodes match tree 0 by cosine and 0
+    assert alignment[0, 1] == pytest.approx((cosine + (cosine + 0) / 2) / 2)
+
+
+def tree(title, leaves, result):
+    return {
+        "task_id": "t1", "title": title, "description": "Project", "expected_output": "Plan", "result": None,
+        "subtasks": [{"task_id": f"t{i + 2}", "title": leaf, "description": leaf, "expected_output": "Step",
+                      "result": f"{result} {leaf}", "subtasks": []} for i, leaf in enumerate(leaves)],
+    }
+
+
+def test_similarity_tables_per_case(tmp_path):
+    steps = ["Survey customers", "Set the price", "Book the venue"]
+    trees = {
+        "run_CASE01_ORIG_task_tree.json": tree("Launch", steps, "We will"),
+        "run_CASE01_SHORT_task_tree.json": tree("Launch", steps[:2], "We will"),
+        "run_CASE01_NOISY_task_tree.json": tree("Launch", ["Paint the office", "Hire a chef"], "Maybe"),
+        "run_CASE02_SHORT_task_tree.json": tree("Hire", ["Write the job ad"], "Post"),
+        "run_CASE02_NOISY_task_tree.json": tree("Hire", ["Write the job ad", "Interview"], "Post"),
+    }
+    for name, data in trees.items():
+        (tmp_path / name).write_text(json.dumps(data), encoding="utf-8")
+
+    frame, matrices = similarity_tables(str(tmp_path), n_features=256)
+
+    by_file = frame.set_index("file")
+    assert by_file.loc["run_CASE01_ORIG_task_tree.json", "alignment_to_orig"] == pytest.approx(1)
+    assert by_file.loc["run_CASE01_SHORT_task_tree.json", "alignment_to_orig"] > \
+           by_file.loc["run_CASE01_NOISY_task_tree.json", "alignment_to_orig"]
+    case02 = frame[frame["case_id"] == "CASE02"]
+    assert case02["alignment_to_orig"].isna().all() and case02["result_similarity_to_orig"].isna().all()
+    assert case02["alignment_mean"].notna().all()
+
+    for (case_id, metric), group in matrices.groupby(["case_id", "metric"]):
+        size = int(len(group) ** 0.5)
+        matrix = group["value"].to_numpy().reshape(size, size)
+        assert size == (3 if case_id == "CASE01" else 2)
+        assert np.allclose(matrix, matrix.T) and np.allclose(np.diag(matrix), 1, atol=1e-5)
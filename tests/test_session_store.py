@@ -0,0 +1,55 @@
+import threading
+import time
+
+import pytest
+
+from src.utils.session_store import MemorySessionStore, SessionBusyError, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite"))
+    return MemorySessionStore()
+
+
+def test_lock_rejects_a_second_stage(store):
+    with store.lock("s1"):
+        with pytest.raises(SessionBusyError):
+            with store.lock("s1"):
+                pass
+        with store.lock("s2"):
+            pass
+    with store.lock("s1"):
+        pass
+    assert store.stats()["busy"] == 1
+
+
+def test_locked_updates_are_not_lost(store):
+    store.set("s1", {"count": 0})
+
+    def increment():
+        for _ in range(20):
+            with store.lock("s1", timeout=None):
+                session = store.get("s1")
+                time.sleep(0.001)
+                session["count"] += 1
+                store.set("s1", session)
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert store.get("s1")["count"] == 80
+
+
+def test_sqlite_lock_holds_across_store_instances(tmp_path):
+    path = str(tmp_path / "sessions.sqlite")
+    first, second = SQLiteSessionStore(path), SQLiteSessionStore(path)
+    with first.lock("s1"):
+        with pytest.raises(SessionBusyError):
+            with second.lock("s1", timeout=0.1):
+                pass
+    with second.lock("s1"):
+        pass
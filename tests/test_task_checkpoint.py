@@ -0,0 +1,73 @@
+import pytest
+
+from src.executor.task_scheduler import execute_tasks_parallel
+from src.utils.task_checkpoint import TaskCheckpoint, restore_task_tree
+from src.utils.task_graph import iter_tasks
+
+
+def answer(task):
+    task.result = f"Answer for {task.title}"
+
+
+def test_resume_only_runs_unfinished_units(tree_factory, tmp_path):
+    root = tree_factory(areas=3, per_area=2, depth=1, fanout=2)
+    checkpoint = TaskCheckpoint(str(tmp_path / "run.jsonl"))
+    checkpoint.write_tree(root)
+
+    def crash_in_last_area(task):
+        if task.area == "Area 2":
+            raise RuntimeError("crash")
+        answer(task)
+
+    with pytest.raises(RuntimeError):
+        execute_tasks_parallel(root, max_workers=1, execute_task=crash_in_last_area, on_event=checkpoint.on_event)
+
+    for task in iter_tasks(root):
+        task.result = None
+    done = checkpoint.restore(root)
+    executed = []
+
+    def execute_task(task):
+        executed.append(task)
+        answer(task)
+
+    execute_tasks_parallel(root, execute_task=execute_task, on_event=checkpoint.on_event,
+                           skip_fn=lambda unit: all(task.task_id in done for task in iter_tasks(unit)))
+
+    assert done and not any(task.task_id in done for task in executed)
+    assert len(done) + len(executed) == sum(1 for _ in iter_tasks(root)) - 1 - len(root.subtasks)
+    assert "Area 2" in {task.area for task in executed}
+    assert all(task.result is not None for task in iter_tasks(root))
+    assert checkpoint.compact()["subtasks"][0]["subtasks"][0]["result"] == "Answer for Task 0.0"
+
+
+def test_partial_last_line_is_ignored(tree_factory, tmp_path):
+    root = tree_factory(areas=1, per_area=1, depth=0)
+    checkpoint = TaskCheckpoint(str(tmp_path / "run.jsonl"))
+    checkpoint.write_tree(root)
+    checkpoint.record(root.subtasks[0].subtasks[0].task_id, "kept")
+    with open(checkpoint.path, "a", encoding="utf-8") as f:
+        f.write('{"type": "result", "task_id": "t')
+
+    tree, results = checkpoint.load()
+    assert tree["task_id"] == root.task_id
+    assert [record["result"] for record in results.values()] == ["kept"]
+
+
+def test_restored_tree_keeps_every_field(tree_factory, tmp_path):
+    pytest.importorskip("src.utils.class_task")
+    from src.utils.task_index import IndexedTaskManager
+
+    root = tree_factory(areas=2, per_area=2, depth=1, fanout=2)
+    root.intro = "Project intro"
+    duplicate, original = root.subtasks[1].subtasks[0], root.subtasks[0].subtasks[0]
+    duplicate.duplicate_of = original.task_id
+    checkpoint = TaskCheckpoint(str(tmp_path / "run.jsonl"))
+    checkpoint.write_tree(root)
+
+    restored = restore_task_tree(checkpoint.load()[0], IndexedTaskManager())
+
+    assert restored.intro == "Project intro"
+    assert restored.subtasks[1].subtasks[0].duplicate_of == original.task_id
+    assert [task.task_id for task in iter_tasks(restored)] == [task.task_id for task in iter_tasks(root)]
+    assert [task.dependencies for task in iter_tasks(restored)] == [task.dependencies for task in iter_tasks(root)]
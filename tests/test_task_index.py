@@ -0,0 +1,86 @@
+from src.utils.task_index import IndexedTaskManager
+
+
+def small_project():
+    tm = IndexedTaskManager()
+    root = tm.create_task("Project", "Launch the product", "Launch plan")
+    areas = [tm.create_task(f"Area {a}", f"Area {a} work", "", area=f"Area {a}", responsibilities=[],
+                            parent_id=root.task_id) for a in range(2)]
+    tasks = [tm.create_task(f"Task {a}.{i}", "Work", "Deliverable", area=area.area, parent_id=area.task_id)
+             for a, area in enumerate(areas) for i in range(3)]
+    return tm, root, areas, tasks
+
+
+def ids(tasks):
+    return [task.task_id for task in tasks]
+
+
+def test_lookups_after_create_task():
+    tm, root, areas, tasks = small_project()
+
+    assert ids(tm.area_tasks(root)) == ids(areas)
+    assert ids(tm.children(areas[0])) == ids(tasks[:3])
+    assert tm.area_task(root, "Area 1") is areas[1]
+    assert ids(tm.tasks_in_area("Area 1")) == ids([areas[1]] + tasks[3:])
+    assert len(tm.tasks_by_execution_type("llm")) == len(tm.tasks)
+
+
+def test_dependencies_set_after_creation_are_indexed():
+    tm, root, areas, tasks = small_project()
+    tasks[2].dependencies = [tasks[0].task_id]
+    tasks[4].dependencies = [tasks[0].task_id, tasks[3].task_id]
+
+    assert set(ids(tm.dependents(tasks[0].task_id))) == {tasks[2].task_id, tasks[4].task_id}
+    assert ids(tm.dependents(tasks[3].task_id)) == [tasks[4].task_id]
+    assert tm.dependents(tasks[1].task_id) == []
+
+
+def test_reindex_follows_in_place_changes():
+    tm, root, areas, tasks = small_project()
+    moved = tasks[0]
+    moved.dependencies = [tasks[1].task_id]
+    assert ids(tm.dependents(tasks[1].task_id)) == [moved.task_id]
+
+    areas[0].subtasks.remove(moved)
+    areas[1].subtasks.append(moved)
+    moved.parent, moved.area = areas[1], "Area 1"
+    moved.dependencies = [tasks[3].task_id]
+    moved.execution_type = "simulation"
+    tm.reindex(moved)
+
+    assert moved.task_id not in ids(tm.children(areas[0]))
+    assert ids(tm.children(areas[1]))[-1] == moved.task_id
+    assert moved.task_id in ids(tm.tasks_in_area("Area 1"))
+    assert moved.task_id not in ids(tm.tasks_in_area("Area 0"))
+    assert ids(tm.tasks_by_execution_type("simulation")) == [moved.task_id]
+    assert tm.dependents(tasks[1].task_id) == []
+    assert ids(tm.dependents(tasks[3].task_id)) == [moved.task_id]
+
+
+def test_deleted_task_leaves_every_index():
+    tm, root, areas, tasks = small_project()
+    deleted = tasks[1]
+    deleted.dependencies = [tasks[0].task_id]
+    assert ids(tm.dependents(tasks[0].task_id)) == [deleted.task_id]
+
+    areas[0].subtasks.remove(deleted)
+    del tm.tasks[deleted.task_id]
+    tm.reindex(deleted)
+
+    assert deleted.task_id not in ids(tm.children(areas[0]))
+    assert deleted.task_id not in ids(tm.tasks_in_area("Area 0"))
+    assert deleted.task_id not in ids(tm.tasks_by_execution_type("llm"))
+    assert tm.dependents(tasks[0].task_id) == []
+    assert deleted.task_id not in [task.task_id for task, _ in tm.similar_tasks("Task Work Deliverable", k=10)]
+
+
+def test_rebuild_indexes_after_direct_changes():
+    tm, root, areas, tasks = small_project()
+    extra = tm.create_task("Late task", "Work", "", area="Area 0", parent_id=areas[0].task_id)
+    del tm.tasks[extra.task_id]
+    extra.task_id = "renamed"
+    tm.tasks[extra.task_id] = extra
+    tm.rebuild_indexes()
+
+    assert ids(tm.children(areas[0]))[-1] == "renamed"
+    assert "renamed" in ids(tm.tasks_in_area("Area 0"))
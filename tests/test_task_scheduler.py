@@ -0,0 +1,87 @@
+import threading
+
+import pytest
+
+from src.executor.task_scheduler import execute_tasks_parallel, is_aggregate_task
+from src.utils.task_graph import CycleError, check_task_graph, iter_tasks
+
+
+def execute_sequentially(task, execute_task, depth=0):
+    """Reference run: plain recursive post-order, aggregating the root and areas."""
+    for child in task.subtasks:
+        execute_sequentially(child, execute_task, depth + 1)
+    if is_aggregate_task(task, depth):
+        task.result = {child.title: child.result for child in task.subtasks}
+    else:
+        execute_task(task)
+
+
+def recording_executor(root):
+    """Execute a task from its children's and dependencies' results, recording the order."""
+    tasks = {task.task_id: task for task in iter_tasks(root)}
+    order = []
+    lock = threading.Lock()
+
+    def execute_task(task):
+        inputs = [child.result for child in task.subtasks] + [tasks[dep].result for dep in task.dependencies]
+        assert None not in inputs, f"{task.title} ran before its inputs"
+        task.result = f"{task.title}({', '.join(inputs)})"
+        with lock:
+            order.append(task)
+
+    return execute_task, order
+
+
+def test_parallel_execution_matches_sequential_postorder(tree_factory):
+    sequential = tree_factory(areas=4, per_area=3, depth=2, fanout=2)
+    execute_sequentially(sequential, recording_executor(sequential)[0])
+
+    parallel = tree_factory(areas=4, per_area=3, depth=2, fanout=2)
+    execute_task, order = recording_executor(parallel)
+    events = []
+    execute_tasks_parallel(parallel, max_workers=4, execute_task=execute_task, on_event=events.append)
+
+    assert {task.title: task.result for task in iter_tasks(parallel)} == \
+           {task.title: task.result for task in iter_tasks(sequential)}
+    executed = len(order)
+    aggregates = 1 + len(parallel.subtasks)
+    assert executed == sum(1 for _ in iter_tasks(parallel)) - aggregates
+    counts = {name: sum(1 for event in events if event["event"] == name)
+              for name in ("task_started", "task_finished", "task_failed")}
+    assert counts == {"task_started": executed, "task_finished": executed + aggregates, "task_failed": 0}
+    assert events[-1]["task_id"] == parallel.task_id
+
+
+def test_failed_task_reports_and_raises(tree_factory):
+    root = tree_factory(areas=2, per_area=2, depth=1, fanout=2)
+    events = []
+
+    def execute_task(task):
+        if task.title == "Task 1.0":
+            raise RuntimeError("boom")
+        task.result = task.title
+
+    with pytest.raises(RuntimeError, match="boom"):
+        execute_tasks_parallel(root, max_workers=2, execute_task=execute_task, on_event=events.append)
+    assert [event["title"] for event in events if event["event"] == "task_failed"] == ["Task 1.0"]
+
+
+def test_dependency_cycles_are_detected(tree_factory):
+    root = tree_factory(areas=2, per_area=2, depth=1, fanout=2)
+    first_area, second_area = root.subtasks
+    first_area.subtasks[0].dependencies.append(second_area.subtasks[0].task_id)
+    second_area.subtasks[0].dependencies.append(first_area.subtasks[0].task_id)
+
+    with pytest.raises(CycleError):
+        check_task_graph(root)
+    with pytest.raises(CycleError):
+        execute_tasks_parallel(root, execute_task=lambda task: None)
+
+
+def test_dependency_on_own_ancestor_is_a_cycle(tree_factory):
+    root = tree_factory(areas=1, per_area=1, depth=1, fanout=2)
+    task = root.subtasks[0].subtasks[0]
+    task.subtasks[0].dependencies.append(task.task_id)
+
+    with pytest.raises(CycleError):
+        check_task_graph(root)